@@ -6,33 +6,26 @@ import requests
 import threading
 import glob
 import time
-import io
-import base64 # <--- ADDED: Required for image attachment
-from PIL import Image
+import contextvars
+import hmac
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as futures_wait
 from google import genai
+from google.genai import types, errors as genai_errors
 from geopy.distance import geodesic
 from datetime import datetime, timezone, timedelta
 from astral import LocationInfo
 from astral.sun import sun, elevation, azimuth
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, make_response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, make_response, g, has_app_context, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_migrate import Migrate
 from authlib.integrations.flask_client import OAuth
-import openmeteo_requests
 import pandas as pd
 import requests_cache
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
-# --- Global Caching ---
-meteoblue_cache = requests_cache.CachedSession('meteoblue_cache', expire_after=3600)
-retry_strategy = Retry(total=3, status_forcelist=[429, 500, 502, 503, 504], backoff_factor=1)
-adapter = HTTPAdapter(max_retries=retry_strategy)
-meteoblue_cache.mount("https://", adapter)
-meteoblue_cache.mount("http://", adapter)
-from retry_requests import retry
 import numpy as np
 from dotenv import load_dotenv
 import markdown # <--- ADDED: Markdown Support
@@ -42,9 +35,36 @@ import stripe # <--- ADDED: Stripe Support
 import brevo_python as brevo
 from brevo_python.rest import ApiException
 
+from openmeteo_client import OpenMeteoPool, HOURLY_VARIABLES
+from forecast_cache import ForecastCache, current_run_hour
+from forecast_cube import ForecastCube
+from singleflight import SingleFlight
+from shared_cache import SharedCache, create_backend
+from prefetch_executor import PrefetchExecutor
+from stage_timings import StageTimings
+from token_usage import TokenUsage
+from meteogram_store import MeteogramArtifact, SLICE_MIME_TYPE
+from job_queue import JobQueue
+from model_guard import ModelGuard, CircuitOpenError
+from xc_score import score_forecast, NO_GO
+from route_analysis import (EARTH_RADIUS_KM, densify_route, flyable_times, sample_fields, summarize_legs,
+                            format_leg_summary)
+
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, 'xcthermal.env'))
 
+# --- Global Caching ---
+# Meteoblue refreshes at most hourly: serve expired images for a grace window while
+# requests_cache re-fetches them in a background thread.
+meteoblue_cache = requests_cache.CachedSession(
+    'meteoblue_cache', expire_after=3600,
+    stale_while_revalidate=int(os.environ.get("METEOBLUE_STALE_GRACE", 3600))
+)
+retry_strategy = Retry(total=3, status_forcelist=[429, 500, 502, 503, 504], backoff_factor=1)
+adapter = HTTPAdapter(max_retries=retry_strategy)
+meteoblue_cache.mount("https://", adapter)
+meteoblue_cache.mount("http://", adapter)
+
 # --- Flask Application Initialization ---
 # --- Flask Application Initialization ---
 template_dir = os.path.join(basedir, 'templates')
@@ -87,7 +107,7 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 # --- Database URI Configuration ---
 basedir = os.path.abspath(os.path.dirname(__file__))
 db_path = os.path.join(basedir, 'instance', 'site.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # --- Ensure 'instance' directory exists ---
@@ -147,9 +167,103 @@ if not METEOBLUE_API_KEY:
 MAPBOX_ACCESS_TOKEN = os.environ.get("MAPBOX_ACCESS_TOKEN")
 ESRI_API_KEY = os.environ.get("ESRI_API_KEY")
 
-CACHE = {}
-CACHE_LOCK = threading.Lock()
-CACHE_TTL = 300
+# --- Cross-worker Shared Cache (forecasts, meteograms, AI results, site lists) ---
+# SHARED_CACHE_BACKEND: 'mmap' (files on local disk/tmpfs, default), 'redis' or 'none'
+# SHARED_CACHE_DIR must be private to the app user (0700); entries are unpickled
+shared_cache = SharedCache(
+    create_backend(
+        os.environ.get("SHARED_CACHE_BACKEND", "mmap"),
+        directory=os.environ.get("SHARED_CACHE_DIR"),
+        max_bytes=int(os.environ.get("SHARED_CACHE_MAX_MB", 256)) * 1024 * 1024,
+        url=os.environ.get("SHARED_CACHE_REDIS_URL"),
+    ),
+    l1_max_bytes=int(os.environ.get("SHARED_CACHE_L1_MB", 32)) * 1024 * 1024,
+)
+METEOGRAM_NAMESPACE = 'meteogram_artifact'
+METEOGRAM_SHARED_TTL = 3600
+SITES_CACHE_TTL = int(os.environ.get("SITES_CACHE_TTL", 6 * 3600))
+
+# --- Shared Open-Meteo Client (one keep-alive pool per worker) ---
+openmeteo_pool = OpenMeteoPool(
+    cache_name='.cache',
+    expire_after=3600,
+    pool_size=int(os.environ.get("OPENMETEO_POOL_SIZE", 10)),
+    connect_timeout=float(os.environ.get("OPENMETEO_CONNECT_TIMEOUT", 5)),
+    read_timeout=float(os.environ.get("OPENMETEO_READ_TIMEOUT", 20)),
+)
+
+# --- Decoded Forecast Cache (keyed by grid cell + model run hour) ---
+forecast_cache = ForecastCache(
+    max_bytes=int(os.environ.get("FORECAST_CACHE_MAX_MB", 64)) * 1024 * 1024,
+    resolution=float(os.environ.get("FORECAST_GRID_DEG", 0.1)),
+    grace_seconds=int(os.environ.get("FORECAST_STALE_GRACE", 3600)),
+)
+
+# --- Single-flight: concurrent identical upstream fetches share one call ---
+forecast_flight = SingleFlight('openmeteo')
+meteogram_flight = SingleFlight('meteoblue')
+
+# --- Bounded background pool for /api/prefetch-weather ---
+prefetch_executor = PrefetchExecutor(
+    'prefetch',
+    workers=int(os.environ.get("PREFETCH_WORKERS", 2)),
+    max_queue=int(os.environ.get("PREFETCH_QUEUE_MAX", 64)),
+)
+
+# --- Concurrent upstream fetches for AI interpretations ---
+ai_fetch_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("AI_FETCH_WORKERS", 8)),
+                                       thread_name_prefix='ai-fetch')
+AI_FORECAST_DEADLINE = float(os.environ.get("AI_FORECAST_DEADLINE", 20))    # seconds
+AI_METEOGRAM_DEADLINE = float(os.environ.get("AI_METEOGRAM_DEADLINE", 25))  # seconds
+ai_stage_timings = StageTimings('ai_interpretation')
+token_usage = TokenUsage()
+
+
+# --- Gemini calls: per-call deadline, optional hedged request, circuit breaker ---
+# Keep GEMINI_DEADLINE below the gunicorn worker timeout (120 s) so a slow model fails the
+# request cleanly instead of getting the worker killed.
+GEMINI_DEADLINE = float(os.environ.get("GEMINI_DEADLINE", 90))  # seconds
+
+
+def _is_gemini_failure(exc):
+    # A rejected prompt (4xx) is our problem, not a sign the endpoint is down; rate limiting is
+    if isinstance(exc, genai_errors.ClientError):
+        return exc.code == 429
+    return True
+
+
+gemini_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("GEMINI_WORKERS", 16)),
+                                     thread_name_prefix='gemini')
+gemini_guard = ModelGuard(
+    'gemini',
+    gemini_executor,
+    deadline=GEMINI_DEADLINE,
+    # e.g. 95: send a second request once a call is slower than 95% of recent ones (costs tokens twice)
+    hedge_percentile=float(os.environ.get("GEMINI_HEDGE_PERCENTILE", 0)) / 100 or None,
+    failure_threshold=int(os.environ.get("GEMINI_BREAKER_FAILURES", 5)),
+    reset_after=float(os.environ.get("GEMINI_BREAKER_RESET", 30)),
+    is_failure=_is_gemini_failure,
+)
+
+
+def _gemini_config():
+    # Transport timeout too, so abandoned calls free their executor thread
+    return types.GenerateContentConfig(http_options=types.HttpOptions(timeout=int(GEMINI_DEADLINE * 1000)))
+
+
+def gemini_generate(contents):
+    """generate_content under the deadline, hedging and circuit breaker (raises CircuitOpenError / TimeoutError)."""
+    return gemini_guard.call(gemini_client.models.generate_content, model='gemini-3.1-pro-preview',
+                             contents=contents, config=_gemini_config())
+
+
+def gemini_generate_stream(contents):
+    return gemini_guard.stream(lambda: gemini_client.models.generate_content_stream(
+        model='gemini-3.1-pro-preview', contents=contents, config=_gemini_config()))
+
+# /api/metrics exposes pool, cache, limiter and breaker internals: it only exists when METRICS_TOKEN
+# is set, and callers must send it (X-Metrics-Token header or ?token=)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 
 INTERPRETATION_COST = 1
 SOUNDING_COST = 1
@@ -242,6 +356,75 @@ class AIReport(db.Model):
         return f'<AIReport {self.id} User:{self.user_id}>'
 
 
+class InterpretationCache(db.Model):
+    """Shared AI interpretations, reusable by any pilot asking for the same cell/prompt/forecast run."""
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(200), unique=True, nullable=False)
+    lat_cell = db.Column(db.Float, nullable=False)
+    lon_cell = db.Column(db.Float, nullable=False)
+    asl_bucket = db.Column(db.Integer, nullable=False)
+    language = db.Column(db.String(50), nullable=False)
+    style = db.Column(db.String(20), nullable=False)
+    units = db.Column(db.String(20), nullable=False)
+    run_hour = db.Column(db.Integer, nullable=False, index=True)
+    content = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<InterpretationCache {self.cache_key}>'
+
+
+class InterpretationJob(db.Model):
+    """A queued AI interpretation; processed by job_queue workers, polled by the client."""
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_type = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued/running/done/failed
+    payload = db.Column(db.Text, nullable=False)  # JSON request data
+    cost = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<InterpretationJob {self.id} {self.job_type} {self.status}>'
+
+
+class DailyRun(db.Model):
+    """One daily interpreter run (keyed by date), shared by every invocation and host working on it."""
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running/done
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<DailyRun {self.id} {self.status}>'
+
+
+class DailyRunOutcome(db.Model):
+    """Checkpoint of one user's decision in a daily run; the row is also the user's claim."""
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(32), db.ForeignKey('daily_run.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, index=True)  # claimed/sending/done/failed
+    outcome = db.Column(db.String(20), nullable=True)  # no_go/no_match/sent/send_failed/error
+    detail = db.Column(db.String(500), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claimed_by = db.Column(db.String(100), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.UniqueConstraint('run_id', 'user_id', name='uq_daily_run_outcome_run_user'),)
+
+    def __repr__(self):
+        return f'<DailyRunOutcome {self.run_id} {self.user_id} {self.status} {self.outcome}>'
+
+
 class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -260,7 +443,12 @@ class UserActivity(db.Model):
     action = db.Column(db.String(50), nullable=False)
     details = db.Column(db.Text, nullable=True)
     ip_address = db.Column(db.String(50), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Latest report per user for the daily run: WHERE action = ... GROUP BY user_id, MAX(timestamp)
+    __table_args__ = (
+        db.Index('ix_user_activity_action_user_timestamp', 'action', 'user_id', 'timestamp'),
+    )
 
     def __repr__(self):
         return f'<UserActivity {self.user_id} {self.action}>'
@@ -287,219 +475,613 @@ class Flight(db.Model):
         return f'<Flight {self.public_id} User:{self.user_id}>'
 
 
+# --- Interpretation Job Queue ---
+job_queue = JobQueue(
+    app, db, InterpretationJob,
+    workers=int(os.environ.get("JOB_WORKERS", 2)),
+    poll_interval=float(os.environ.get("JOB_POLL_INTERVAL", 1.0)),
+    stale_after=int(os.environ.get("JOB_STALE_AFTER", 600)),
+)
+
+
 # --- Flask-Login User Loader ---
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
 
-# --- Helper to get Open-Meteo Data ---
-def get_openmeteo_data(lat, lon):
-    try:
-        cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-        openmeteo = openmeteo_requests.Client(session=retry_session)
-
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "hourly": [
-                "temperature_2m", "relative_humidity_2m", "precipitation", "cloud_cover", "wind_speed_10m",
-                "wind_gusts_10m", "cape", "convective_inhibition", "surface_pressure",
-                "direct_normal_irradiance_instant", "soil_moisture_0_to_1cm",
-                "temperature_1000hPa", "temperature_950hPa", "temperature_900hPa", "temperature_850hPa",
-                "temperature_800hPa", "wind_speed_1000hPa", "wind_speed_950hPa", "wind_speed_900hPa",
-                "wind_speed_850hPa", "wind_speed_800hPa", "wind_direction_1000hPa", "wind_direction_950hPa",
-                "wind_direction_900hPa", "wind_direction_850hPa", "wind_direction_800hPa",
-                "geopotential_height_1000hPa", "geopotential_height_950hPa", "geopotential_height_900hPa",
-                "geopotential_height_850hPa", "geopotential_height_800hPa"
-            ],
-            "models": "best_match",
-            "timezone": "auto",
-            "forecast_days": 3
-        }
+# --- Helpers to get Open-Meteo Data ---
+OPENMETEO_BATCH_SIZE = int(os.environ.get("OPENMETEO_BATCH_SIZE", 50))
 
-        responses = openmeteo.weather_api("https://api.open-meteo.com/v1/forecast", params=params)
-        response = responses[0]
 
-        hourly = response.Hourly()
-        hourly_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                freq=pd.Timedelta(seconds=hourly.Interval()),
-                inclusive="left"
-            )
-        }
+def _openmeteo_params(latitudes, longitudes):
+    return {
+        "latitude": ",".join(str(lat) for lat in latitudes),
+        "longitude": ",".join(str(lon) for lon in longitudes),
+        "hourly": HOURLY_VARIABLES,
+        "models": "best_match",
+        "timezone": "auto",
+        "forecast_days": 3
+    }
+
+
+def _record_data_age(source, age_seconds):
+    # Remember how old the upstream data behind this request is (surfaced in API responses)
+    if has_app_context():
+        ages = g.setdefault('data_ages', {})
+        ages[source] = max(ages.get(source, 0), int(age_seconds))
+
+
+def _store_forecast(cache_key, cube, fetched_at=None):
+    # Stamped with the upstream fetch time, so a payload from the HTTP cache keeps its real age and run hour
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    forecast_cache.put(cache_key, cube, stored_at=fetched_at)
+    # The ForecastCache is already this worker's L1, so skip the shared cache's own L1
+    shared_cache.set('forecast', cache_key, (cube, fetched_at),
+                     ttl=max(3600 + forecast_cache.grace_seconds - (time.time() - fetched_at), 1), l1=False)
+
+
+def _forecast_from_shared(cache_key):
+    """Pulls a cell another worker already fetched into the local cache; returns a lookup tuple or None."""
+    entry = shared_cache.get('forecast', cache_key, l1=False)
+    if entry is None:
+        return None
+    cube, stored_at = entry
+    forecast_cache.put(cache_key, cube, stored_at=stored_at)
+    return forecast_cache.lookup(cache_key)
+
+
+def _fetch_forecast_cells(cell_keys, force_refresh=False):
+    """
+    Fetches and caches grid cells, OPENMETEO_BATCH_SIZE per upstream request. Returns {key: cube}.
+    `force_refresh` bypasses the HTTP cache (background refreshes after the run hour rolls over).
+    """
+    fetched = {}
+    remaining = []
+    for cache_key in cell_keys:
+        # Another worker may already have refreshed this cell
+        hit = _forecast_from_shared(cache_key)
+        if hit is not None and hit[2]:
+            fetched[cache_key] = hit[0]
+            _record_data_age('forecast', hit[1])
+        else:
+            remaining.append(cache_key)
+
+    def fetch_cells(keys):
+        # Leader for these cells: single-point requests and other batches asking meanwhile wait for it
+        cubes = {}
+        if not force_refresh:
+            # Cells another flight filled while we were checking the shared cache
+            for cache_key in keys:
+                filled = forecast_cache.lookup(cache_key)
+                if filled is not None and filled[2]:
+                    cubes[cache_key] = (filled[0], time.time() - filled[1])
+            keys = [key for key in keys if key not in cubes]
+        for start in range(0, len(keys), OPENMETEO_BATCH_SIZE):
+            chunk = keys[start:start + OPENMETEO_BATCH_SIZE]
+            try:
+                responses, fetched_at = openmeteo_pool.fetch(
+                    _openmeteo_params([key[0] for key in chunk], [key[1] for key in chunk]),
+                    force_refresh=force_refresh)
+            except Exception as e:
+                logging.error(f"Failed to fetch Open-Meteo batch of {len(chunk)} locations: {e}", exc_info=True)
+                continue
+
+            for cache_key, response in zip(chunk, responses):
+                cube = ForecastCube.from_response(response, HOURLY_VARIABLES)
+                _store_forecast(cache_key, cube, fetched_at)
+                cubes[cache_key] = (cube, fetched_at)
+        return cubes
+
+    # Same per-cell flights as get_openmeteo_data, so overlapping requests share upstream calls
+    for cache_key, (cube, fetched_at) in forecast_flight.do_many(remaining, fetch_cells).items():
+        fetched[cache_key] = cube
+        _record_data_age('forecast', time.time() - fetched_at)
+    return fetched
+
+
+def _refresh_forecasts_async(cell_keys):
+    # Stale-while-revalidate: one background refresh per cell, however many requests see it stale
+    claimed = forecast_cache.begin_refresh(cell_keys)
+    if not claimed:
+        return
+
+    def refresh():
+        try:
+            # The stale entry came from the previous run hour; the HTTP cache may still hold that payload
+            _fetch_forecast_cells(claimed, force_refresh=True)
+        finally:
+            forecast_cache.end_refresh(claimed)
 
-        for i, var_name in enumerate(params["hourly"]):
-            hourly_data[var_name] = hourly.Variables(i).ValuesAsNumpy()
+    threading.Thread(target=refresh, daemon=True).start()
 
-        return pd.DataFrame(data=hourly_data)
+
+# Returns a shared, cached ForecastCube (read-only arrays; use .to_dataframe() for pandas).
+def get_openmeteo_data(lat, lon):
+    cache_key = forecast_cache.key_for(lat, lon)
+    hit = forecast_cache.lookup(cache_key) or _forecast_from_shared(cache_key)
+    if hit is not None:
+        cube, age, is_fresh = hit
+        if not is_fresh:
+            _refresh_forecasts_async([cache_key])
+        _record_data_age('forecast', age)
+        return cube
+
+    def fetch_cell():
+        # Another request may have filled the cell while we were queueing for the flight
+        filled = forecast_cache.lookup(cache_key)
+        if filled is not None and filled[2]:
+            return filled[0], time.time() - filled[1]
+        # Fetch at the cell centre so every point in the cell shares one forecast
+        cell_lat, cell_lon = cache_key
+        responses, fetched_at = openmeteo_pool.fetch(_openmeteo_params([cell_lat], [cell_lon]))
+        fetched_cube = ForecastCube.from_response(responses[0], HOURLY_VARIABLES)
+        _store_forecast(cache_key, fetched_cube, fetched_at)
+        return fetched_cube, fetched_at
+
+    try:
+        cube, fetched_at = forecast_flight.do(cache_key, fetch_cell)
+        _record_data_age('forecast', time.time() - fetched_at)
+        return cube
 
     except Exception as e:
         logging.error(f"Failed to fetch Open-Meteo data: {e}", exc_info=True)
         raise ValueError("Failed to fetch weather data. Please try again later.")
 
 
+def _fetch_forecast_cells_parallel(cell_keys, fanout, timeout):
+    """Splits the cells into `fanout` concurrent requests; cells not back within `timeout` are left out."""
+    chunk_size = max(1, -(-len(cell_keys) // fanout))
+    futures = [
+        ai_fetch_executor.submit(contextvars.copy_context().run, _fetch_forecast_cells,
+                                 cell_keys[start:start + chunk_size])
+        for start in range(0, len(cell_keys), chunk_size)
+    ]
+    done, not_done = futures_wait(futures, timeout=timeout)
+    if not_done:
+        # They keep running and still land in the cache for the next request
+        logging.warning(f"Open-Meteo fan-out: {len(not_done)}/{len(futures)} request(s) missed the deadline")
+    fetched = {}
+    for future in done:
+        if future.exception() is None:
+            fetched.update(future.result())
+    return fetched
+
+
+def get_openmeteo_data_batch(points, fanout=1, timeout=None):
+    """
+    Fetches forecasts for many (lat, lon) points with as few upstream requests as possible.
+
+    Points that snap to the same grid cell are fetched once, cached cells are skipped
+    (stale ones are served and refreshed in the background), and the remaining cells
+    are requested OPENMETEO_BATCH_SIZE locations at a time. With fanout > 1 the cells
+    are split across that many concurrent requests, and `timeout` bounds the wait.
+    Returns a list aligned with `points`; entries are None where the fetch failed or timed out.
+    """
+    results = [None] * len(points)
+    pending = {}  # cache key -> indices into points
+    stale_keys = []
+
+    for i, (lat, lon) in enumerate(points):
+        cache_key = forecast_cache.key_for(lat, lon)
+        if cache_key in pending:
+            pending[cache_key].append(i)
+            continue
+        hit = forecast_cache.lookup(cache_key) or _forecast_from_shared(cache_key)
+        if hit is not None:
+            results[i] = hit[0]
+            _record_data_age('forecast', hit[1])
+            if not hit[2]:
+                stale_keys.append(cache_key)
+        else:
+            pending.setdefault(cache_key, []).append(i)
+
+    if stale_keys:
+        _refresh_forecasts_async(list(dict.fromkeys(stale_keys)))
+
+    cell_keys = list(pending.keys())
+    if fanout > 1 and len(cell_keys) > 1:
+        fetched = _fetch_forecast_cells_parallel(cell_keys, fanout, timeout)
+    else:
+        fetched = _fetch_forecast_cells(cell_keys)
+    for cache_key, indices in pending.items():
+        for i in indices:
+            results[i] = fetched.get(cache_key)
+
+    logging.info(f"Open-Meteo batch: {len(points)} points, {len(fetched)}/{len(cell_keys)} cells fetched "
+                 f"(fanout {fanout})")
+    return results
+
+
 # --- Helper to format Open-Meteo Data for AI ---
-def format_openmeteo_data_for_ai(df):
-    if df.empty:
+FLYING_HOURS = (9, 18)  # Inclusive, UTC
+
+# One pre-built block per hour; filled with str.format instead of per-row f-strings
+AI_HOUR_COLUMNS = (
+    "wind_speed_10m", "wind_gusts_10m", "wind_speed_850hPa", "wind_direction_850hPa",
+    "cloud_cover", "precipitation", "temperature_2m", "cape"
+)
+AI_HOUR_TEMPLATE = (
+    "Time: {:02d}:00\n"
+    " - Wind (Surface): {:.1f} km/h (Gusts: {:.1f})\n"
+    " - Wind (1500m/850hPa): {:.1f} km/h from {:.0f}°\n"
+    " - Cloud Cover: {:.0f}%\n"
+    " - Rain (Precipitation): {:.1f} mm\n"
+    " - Temp (Surface): {:.1f}°C\n"
+    " - Thermal Quality (CAPE): {:.0f}\n"
+)
+
+
+# Compact alternative: one pipe-separated row per hour under a fixed column legend
+AI_TABLE_LEGEND = ("Columns: hour UTC | wind 10m km/h | gusts km/h | wind 850hPa (~1500m) km/h | "
+                   "dir 850hPa deg | cloud % | rain mm | temp 2m C | CAPE J/kg")
+AI_TABLE_TEMPLATE = "{:02d}|{:.0f}|{:.0f}|{:.0f}|{:.0f}|{:.0f}|{:.1f}|{:.0f}|{:.0f}"
+
+# Forecast encoding in the prompt: 'verbose' (labelled block per hour) or 'table' (compact, values rounded).
+# AI_PROMPT_ENCODING is the default; AI_PROMPT_ENCODING_BY_STYLE switches single styles, e.g. "basic=table",
+# once /api/metrics token accounting shows the saving holds for that style.
+AI_PROMPT_ENCODING = os.environ.get("AI_PROMPT_ENCODING", "verbose")
+AI_PROMPT_ENCODING_BY_STYLE = {
+    style.strip().lower(): encoding.strip()
+    for style, encoding in (item.split("=", 1) for item in os.environ.get("AI_PROMPT_ENCODING_BY_STYLE", "").split(",")
+                            if "=" in item)
+}
+
+
+def prompt_encoding_for(style):
+    return AI_PROMPT_ENCODING_BY_STYLE.get(str(style).lower(), AI_PROMPT_ENCODING)
+
+
+def format_openmeteo_data_for_ai(forecast, now=None, encoding='verbose'):
+    if forecast.empty:
         return "No hourly data available."
 
-    now = pd.Timestamp.now(tz='UTC')
-    future_df = df[df['date'] >= now].copy()
+    now = now or datetime.now(timezone.utc)
+    future_mask = forecast.times >= now.timestamp()
 
-    if future_df.empty:
+    if not future_mask.any():
         return "No future data available in the forecast window."
 
+    table = encoding == 'table'
     summary_lines = ["--- Open-Meteo Hourly Data Summary for AI Interpretation ---"]
     summary_lines.append(f"Report Generated At: {now.strftime('%Y-%m-%d %H:%M UTC')}")
     summary_lines.append("INSTRUCTION: Treat the first available date below as 'Day 1'.")
-    summary_lines.append("")
+    summary_lines.append(AI_TABLE_LEGEND if table else "")
 
-    future_df['hour_only'] = future_df['date'].dt.hour
-    flying_hours_df = future_df[(future_df['hour_only'] >= 9) & (future_df['hour_only'] <= 18)]
+    hours = forecast.hour_of_day()
+    flying_idx = np.flatnonzero(future_mask & (hours >= FLYING_HOURS[0]) & (hours <= FLYING_HOURS[1]))
 
-    if flying_hours_df.empty:
+    if flying_idx.size == 0:
         return "No flyable hours (09:00-18:00) found in the remaining forecast."
 
-    unique_days = flying_hours_df['date'].dt.date.unique()
+    # Gather everything in one pass: hour-of-day, day number and the printed columns
+    flying_hours = hours[flying_idx].tolist()
+    flying_days = forecast.day_index()[flying_idx]
+    rows = np.stack([forecast[name][flying_idx] for name in AI_HOUR_COLUMNS], axis=1).tolist()
+    day_starts = set((np.flatnonzero(np.diff(flying_days)) + 1).tolist())
+    day_starts.add(0)
 
-    for day in unique_days:
-        day_data = flying_hours_df[flying_hours_df['date'].dt.date == day]
-        summary_lines.append(f"=== FORECAST FOR DATE: {day} ===")
-
-        for _, row in day_data.iterrows():
-            summary_lines.append(f"Time: {row['date'].strftime('%H:00')}")
-            summary_lines.append(
-                f" - Wind (Surface): {row['wind_speed_10m']:.1f} km/h (Gusts: {row['wind_gusts_10m']:.1f})")
-            summary_lines.append(
-                f" - Wind (1500m/850hPa): {row['wind_speed_850hPa']:.1f} km/h from {row['wind_direction_850hPa']:.0f}°")
-            summary_lines.append(f" - Cloud Cover: {row['cloud_cover']:.0f}%")
-            summary_lines.append(f" - Rain (Precipitation): {row['precipitation']:.1f} mm")
-            summary_lines.append(f" - Temp (Surface): {row['temperature_2m']:.1f}°C")
-            summary_lines.append(f" - Thermal Quality (CAPE): {row['cape']:.0f}")
-            summary_lines.append("")
+    template = AI_TABLE_TEMPLATE if table else AI_HOUR_TEMPLATE
+    for i, (hour, row) in enumerate(zip(flying_hours, rows)):
+        if i in day_starts:
+            day = np.datetime64(int(flying_days[i]), 'D')
+            summary_lines.append(f"# {day}" if table else f"=== FORECAST FOR DATE: {day} ===")
+        summary_lines.append(template.format(hour, *row))
 
     return "\n".join(summary_lines)
 
+# --- Helpers to fetch the Meteoblue Meteogram (Cached to ~7km / 100m grids) ---
+def meteogram_key(lat, lon, asl):
+    return round(float(lat), 1), round(float(lon), 1), int(round(float(asl or 0) / 100.0) * 100)
+
+
+def meteoblue_meteogram_url(lat, lon, asl):
+    lat_rounded, lon_rounded, asl_rounded = meteogram_key(lat, lon, asl)
+    return (
+        f"https://my.meteoblue.com/images/meteogram_thermal"
+        f"?lat={lat_rounded}&lon={lon_rounded}&asl={asl_rounded}&apikey={METEOBLUE_API_KEY}"
+    )
+
+
+def _cached_response_age(resp):
+    created_at = getattr(resp, 'created_at', None)
+    if not getattr(resp, 'from_cache', False) or created_at is None:
+        return 0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return max((datetime.now(timezone.utc) - created_at).total_seconds(), 0)
+
+
+def get_meteogram_artifact(lat, lon, asl, timeout=15):
+    """
+    The MeteogramArtifact for a location: shared cache first, then the Meteoblue HTTP cache.
+    Each image is fetched, decoded and sliced once per grid key, whichever path asks first.
+    """
+    key = meteogram_key(lat, lon, asl)
+    artifact = shared_cache.get(METEOGRAM_NAMESPACE, key)
+    if artifact is None:
+        def fetch():
+            image_resp = meteoblue_cache.get(meteoblue_meteogram_url(lat, lon, asl), timeout=timeout)
+            image_resp.raise_for_status()
+            fetched_at = time.time() - _cached_response_age(image_resp)
+            built = MeteogramArtifact.build(image_resp.content, image_resp.headers.get('Content-Type', 'image/png'),
+                                            fetched_at)
+            shared_cache.set(METEOGRAM_NAMESPACE, key, built,
+                             ttl=max(METEOGRAM_SHARED_TTL - (time.time() - fetched_at), 1))
+            return built
+
+        artifact = meteogram_flight.do(key, fetch)
+    _record_data_age('meteogram', time.time() - artifact.fetched_at)
+    return artifact
+
+
+def fetch_meteogram(lat, lon, asl, timeout=15):
+    """Returns (image_bytes, content_type)."""
+    artifact = get_meteogram_artifact(lat, lon, asl, timeout=timeout)
+    return artifact.content, artifact.content_type
+
+
+def _data_age_payload():
+    # {'forecast': seconds, 'meteogram': seconds} for whatever upstream data this request used
+    return dict(g.get('data_ages', {}))
+
+
+def _tag_data_age(response):
+    ages = _data_age_payload()
+    if ages:
+        response.headers["Age"] = str(max(ages.values()))
+    return response
+
+
+# --- AI Interpretation Cache ---
+# Entries answer fresh requests only during their own forecast run (run_hour is part of the key); older
+# ones are kept this long as the stale fallback while Gemini is unavailable
+INTERPRETATION_RETENTION_HOURS = float(os.environ.get("INTERPRETATION_RETENTION_HOURS", 48))
+INTERPRETATION_PRUNE_EVERY = 600  # seconds between retention sweeps per worker
+_interpretation_pruned_at = 0.0
+
+
+def resolve_ai_preferences(req_language=None, req_style=None, req_units=None):
+    """Language, style and units for a prompt. Priority: explicit request > user settings > default."""
+    target_language = "English"
+    style_pref = "Basic"
+
+    if req_language:
+        target_language = LANGUAGE_MAP.get(req_language, target_language)
+    elif current_user and current_user.is_authenticated and current_user.ai_language:
+        target_language = LANGUAGE_MAP.get(current_user.ai_language, target_language)
+
+    if req_style:
+        style_pref = req_style
+    elif current_user and current_user.is_authenticated and current_user.ai_prompt_style:
+        style_pref = current_user.ai_prompt_style
+
+    return target_language, style_pref, req_units if req_units else "metric"
+
+
+def interpretation_cache_key(lat, lon, asl, language, style, units, run_hour=None):
+    """(0.1 deg cell, 100 m ASL bucket, language, style, units, forecast run) -> cache key and its parts."""
+    lat_cell, lon_cell = forecast_cache.key_for(lat, lon)
+    asl_bucket = meteogram_key(lat, lon, asl)[2]
+    run_hour = current_run_hour() if run_hour is None else run_hour
+    parts = {"lat_cell": lat_cell, "lon_cell": lon_cell, "asl_bucket": asl_bucket,
+             "language": language, "style": style, "units": units, "run_hour": run_hour}
+    return ":".join(str(v) for v in parts.values()), parts
+
+
+def get_cached_interpretation(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+    """Stored interpretation for the current forecast run, or None."""
+    key, _ = interpretation_cache_key(lat, lon, asl, *resolve_ai_preferences(req_language, req_style, req_units))
+    entry = InterpretationCache.query.filter_by(cache_key=key).first()
+    if entry is None:
+        return None
+    entry.hits += 1
+    db.session.commit()
+    return entry.content
+
+
+def get_stale_interpretation(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+    """Newest stored interpretation for this cell and settings from any retained forecast run (fallback while the model is down)."""
+    _, parts = interpretation_cache_key(lat, lon, asl, *resolve_ai_preferences(req_language, req_style, req_units))
+    current = parts.pop("run_hour")
+    return (InterpretationCache.query.filter_by(**parts)
+            .filter(InterpretationCache.run_hour > current - INTERPRETATION_RETENTION_HOURS)
+            .order_by(InterpretationCache.run_hour.desc()).first())
+
+
+def _model_unavailable_response(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+    """Free stale interpretation when one exists, otherwise 503. Nothing is charged."""
+    entry = get_stale_interpretation(lat, lon, asl, req_language=req_language, req_style=req_style, req_units=req_units)
+    if entry is None:
+        return jsonify({"error": "AI is temporarily unavailable. Please try again in a few minutes."}), 503
+    return jsonify({"interpretation": entry.content, "remaining_credits": current_user.credits, "cached": True,
+                    "stale": True, "forecast_run": datetime.fromtimestamp(entry.run_hour * 3600, timezone.utc).isoformat()})
+
+
+def prune_interpretations():
+    """Deletes interpretations older than INTERPRETATION_RETENTION_HOURS (at most every INTERPRETATION_PRUNE_EVERY s)."""
+    global _interpretation_pruned_at
+    if time.monotonic() - _interpretation_pruned_at < INTERPRETATION_PRUNE_EVERY and _interpretation_pruned_at:
+        return
+    _interpretation_pruned_at = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=INTERPRETATION_RETENTION_HOURS)
+    try:
+        InterpretationCache.query.filter(InterpretationCache.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Could not prune interpretation cache: {e}")
+
+
+def store_interpretation(lat, lon, asl, content, req_language=None, req_style=None, req_units=None):
+    """Saves an interpretation for reuse; entries past the retention window are swept now and then."""
+    key, parts = interpretation_cache_key(lat, lon, asl, *resolve_ai_preferences(req_language, req_style, req_units))
+    try:
+        entry = InterpretationCache.query.filter_by(cache_key=key).first()
+        if entry is None:
+            db.session.add(InterpretationCache(cache_key=key, content=content, **parts))
+        else:
+            entry.content = content
+            entry.created_at = datetime.now(timezone.utc)
+        db.session.commit()
+    except Exception as e:
+        # Another worker stored the same key first; theirs is just as good.
+        db.session.rollback()
+        logging.warning(f"Could not cache interpretation {key}: {e}")
+        return
+    prune_interpretations()
+
+
+def _prepare_forecast_text(lat, lon, timings, encoding):
+    with ai_stage_timings.stage('forecast_fetch', timings):
+        forecast = get_openmeteo_data(lat, lon)
+    with ai_stage_timings.stage('forecast_format', timings):
+        return format_openmeteo_data_for_ai(forecast, encoding=encoding)
+
+
+def _prepare_meteogram_slices(lat, lon, asl, timings):
+    with ai_stage_timings.stage('meteogram_fetch', timings):
+        artifact = get_meteogram_artifact(lat, lon, asl, timeout=15)
+    # Pre-encoded slices go to Gemini as-is: no decode, crop or re-encode per request
+    return [types.Part.from_bytes(data=data, mime_type=SLICE_MIME_TYPE) for data in artifact.slices]
+
+
+class UpstreamDataTimeout(Exception):
+    """Forecast or meteogram data was not ready in time (not a model failure)."""
+
+
+def _await_stage(future, deadline, what):
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        raise UpstreamDataTimeout(f"{what} was not ready in time.") from None
+
+
 # --- AI Interpretation Helper Function ---
-def get_ai_interpretation(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+def build_ai_contents(lat, lon, asl, req_language, req_style, req_units, timings, started):
+    """
+    Gathers the upstream data and returns (contents, encoding): the Gemini contents
+    (prompt + 4 meteogram slices) and the forecast encoding used in the prompt.
+    """
     if not GOOGLE_API_KEY:
         raise ValueError("Google API key is not configured.")
     if not METEOBLUE_API_KEY:
         raise ValueError("Meteoblue API key is not configured.")
 
-    try:
-        # 1. Fetch Open-Meteo data
-        openmeteo_df = get_openmeteo_data(lat, lon)
-        summarized_data_text = format_openmeteo_data_for_ai(openmeteo_df)
-
-        # 2. Fetch the Meteogram image from Meteoblue (Cached to ~7km / 100m grids)
-        lat_rounded = round(float(lat), 1)
-        lon_rounded = round(float(lon), 1)
-        asl_rounded = int(round(float(asl) / 100.0) * 100)
-        image_url = (
-            f"https://my.meteoblue.com/images/meteogram_thermal"
-            f"?lat={lat_rounded}&lon={lon_rounded}&asl={asl_rounded}&apikey={METEOBLUE_API_KEY}"
-        )
-        image_response = meteoblue_cache.get(image_url, timeout=15)
-        image_response.raise_for_status()
-        meteogram_image = Image.open(io.BytesIO(image_response.content))
-        
-        # --- Slice Meteogram Image to Prevent Compression ---
-        width, height = meteogram_image.size
-        # Note: crop takes (left, upper, right, lower)
-        slice_1 = meteogram_image.crop((0, 0, width, height * 0.25))
-        slice_2 = meteogram_image.crop((0, height * 0.25, width, height * 0.45))
-        slice_3 = meteogram_image.crop((0, height * 0.45, width, height * 0.75))
-        slice_4 = meteogram_image.crop((0, height * 0.75, width, height))
-
-        # --- 3. DETERMINE LANGUAGE & STYLE ---
-        target_language = "English"
-        style_pref = "Basic"
-
-        # Priority: explicit request > user settings > default
-        if req_language:
-             target_language = LANGUAGE_MAP.get(req_language, target_language)
-        elif current_user and current_user.is_authenticated and current_user.ai_language:
-             target_language = LANGUAGE_MAP.get(current_user.ai_language, target_language)
-
-        if req_style:
-            style_pref = req_style
-        elif current_user and current_user.is_authenticated and current_user.ai_prompt_style:
-            style_pref = current_user.ai_prompt_style
-
-        print(f"DEBUG AI: Prompt Language='{target_language}', Style='{style_pref}'")
-
-        # --- Specific Instructions for Prompt Styles ---
-        additional_instructions = ""
-        if style_pref == 'ridge':
-            additional_instructions = """
-            SPECIAL INSTRUCTIONS FOR RIDGE SOARING:
-            1. PRIMARY FOCUS: Wind speed and direction are the most critical factors.
-            2. IDEAL WIND: 20-25+ km/h (approx 13mph) is optimal for DHV1/EN-A paragliders.
-            3. DANGER WARNINGS: 
-               - Sustained winds > 40 km/h can cause problems (blown back). 
-               - Gusts > 20 km/h (difference between sustained and gust) can make takeoff very hard/dangerous.
-            4. Do NOT focus primarily on thermals; focus on ridge lift potential (wind perpendicular to ridge).
-            """
-        elif style_pref == 'xcperfect':
-            additional_instructions = """
-            SPECIAL INSTRUCTIONS FOR XC PERFECT ALERT:
-            1. OBJECTIVE: You are the judge. Is today an EPIC 100km+ XC day?
-            2. FORMAT: Start your response with either "✅ XC STATUS: GO!" or "❌ XC STATUS: NO GO" or "⚠️ XC STATUS: MARGINAL".
-            3. CRITERIA for GO:
-               - High Cloudbase (>2000m).
-               - Strong but safe thermals.
-               - Low wind or good tailwind.
-               - No rain/storms.
-            4. TONE:
-               - If GO: Enthusiastic, hype up the pilot! "Get to the takeoff NOW!"
-               - If NO GO: Brutally honest. Save the pilot gas money.
-            5. Provide a rough estimation of max potential distance (e.g. "Potential for 50-80km triangle").
-            """
-
-        # 4. Construct Prompt
-        prompt_content = f"""
-        You are an elite paragliding meteorologist and flight safety advisor.
-        I am providing you with 4 high-resolution image slices of a single Meteoblue Thermal Meteogram, ordered from top to bottom:
-
-        - IMAGE 1 (Surface): Surface conditions, Temperature vs Dew point, and ground winds (10m & 80m).
-        - IMAGE 2 (Stability): Stability indices (CAPE, Lifted Index, Soaring Index, Dry/Soaring thermal heights).
-        - IMAGE 3 (Clouds): Lapse rate, Relative Humidity (colored lines), Cloud Cover (hashed areas), and Boundary Layer height.
-        - IMAGE 4 (Wind): Horizontal wind barbs and Vertical wind shear (m/s per 100m) at altitude.
-
-        The pilot has explicitly requested the analysis in: {req_units if req_units else "metric"} units.
-        
-        CRITICAL ANALYSIS INSTRUCTIONS:
-        1. Time Accuracy: Read the Time X-axis carefully across all images. Focus primarily on today's flyable hours (09:00 - 18:00). 
-        2. Cross-Reference Lift vs. Moisture: Compare the 'dry thermals' and 'soaring' heights in IMAGE 2 with the 'Cloud Cover' and 'Rel. Humidity' in IMAGE 3. Will it overdevelop? Is there a risk of cloud suck? Are the thermals blocked by high cirrus?
-        3. Wind Shear Threat: Scrutinize IMAGE 4. Identify any dangerous wind shear layers (orange/red/purple zones) within the usable thermal altitudes. Mention specific altitudes if shear is dangerous.
-        4. Rain/Precipitation: Check IMAGE 1 for rain/showers (blue bars).
-        
-        STYLE & TONE INSTRUCTIONS:
-        - Complexity: {style_pref}
-        - If the weather is dangerous (high shear, thunderstorms, strong base winds), explicitly warn the pilot.
-        {additional_instructions}
+    # --- 3. DETERMINE LANGUAGE & STYLE --- (first: the style picks the forecast encoding)
+    target_language, style_pref, _ = resolve_ai_preferences(req_language, req_style, req_units)
+    encoding = prompt_encoding_for(style_pref)
+
+    # 1 & 2. Open-Meteo data and the Meteoblue meteogram are independent: fetch both at once.
+    # Each worker runs in a copy of this context so data ages still land on the request's `g`.
+    forecast_future = ai_fetch_executor.submit(
+        contextvars.copy_context().run, _prepare_forecast_text, lat, lon, timings, encoding)
+    meteogram_future = ai_fetch_executor.submit(
+        contextvars.copy_context().run, _prepare_meteogram_slices, lat, lon, asl, timings)
+
+    summarized_data_text = _await_stage(forecast_future, started + AI_FORECAST_DEADLINE,
+                                        "Open-Meteo forecast")
+    slice_1, slice_2, slice_3, slice_4 = _await_stage(meteogram_future, started + AI_METEOGRAM_DEADLINE,
+                                                      "Meteoblue meteogram")
+
+    prompt_started = time.perf_counter()
+
+    print(f"DEBUG AI: Prompt Language='{target_language}', Style='{style_pref}'")
+
+    # --- Specific Instructions for Prompt Styles ---
+    additional_instructions = ""
+    if style_pref == 'ridge':
+        additional_instructions = """
+        SPECIAL INSTRUCTIONS FOR RIDGE SOARING:
+        1. PRIMARY FOCUS: Wind speed and direction are the most critical factors.
+        2. IDEAL WIND: 20-25+ km/h (approx 13mph) is optimal for DHV1/EN-A paragliders.
+        3. DANGER WARNINGS: 
+           - Sustained winds > 40 km/h can cause problems (blown back). 
+           - Gusts > 20 km/h (difference between sustained and gust) can make takeoff very hard/dangerous.
+        4. Do NOT focus primarily on thermals; focus on ridge lift potential (wind perpendicular to ridge).
+        """
+    elif style_pref == 'xcperfect':
+        additional_instructions = """
+        SPECIAL INSTRUCTIONS FOR XC PERFECT ALERT:
+        1. OBJECTIVE: You are the judge. Is today an EPIC 100km+ XC day?
+        2. FORMAT: Start your response with either "✅ XC STATUS: GO!" or "❌ XC STATUS: NO GO" or "⚠️ XC STATUS: MARGINAL".
+        3. CRITERIA for GO:
+           - High Cloudbase (>2000m).
+           - Strong but safe thermals.
+           - Low wind or good tailwind.
+           - No rain/storms.
+        4. TONE:
+           - If GO: Enthusiastic, hype up the pilot! "Get to the takeoff NOW!"
+           - If NO GO: Brutally honest. Save the pilot gas money.
+        5. Provide a rough estimation of max potential distance (e.g. "Potential for 50-80km triangle").
+        """
 
-        Raw Open-Meteo Data (Supplementary - Use if Meteogram is ambiguous):
-        {summarized_data_text}
+    # 4. Construct Prompt
+    prompt_content = f"""
+    You are an elite paragliding meteorologist and flight safety advisor.
+    I am providing you with 4 high-resolution image slices of a single Meteoblue Thermal Meteogram, ordered from top to bottom:
 
-        FINAL REQUIREMENT:
-        Write the entire response strictly in {target_language}. Use clean paragraphs, bold text for key metrics, and bullet points for readability on mobile devices.
-        """
+    - IMAGE 1 (Surface): Surface conditions, Temperature vs Dew point, and ground winds (10m & 80m).
+    - IMAGE 2 (Stability): Stability indices (CAPE, Lifted Index, Soaring Index, Dry/Soaring thermal heights).
+    - IMAGE 3 (Clouds): Lapse rate, Relative Humidity (colored lines), Cloud Cover (hashed areas), and Boundary Layer height.
+    - IMAGE 4 (Wind): Horizontal wind barbs and Vertical wind shear (m/s per 100m) at altitude.
+
+    The pilot has explicitly requested the analysis in: {req_units if req_units else "metric"} units.
+    
+    CRITICAL ANALYSIS INSTRUCTIONS:
+    1. Time Accuracy: Read the Time X-axis carefully across all images. Focus primarily on today's flyable hours (09:00 - 18:00). 
+    2. Cross-Reference Lift vs. Moisture: Compare the 'dry thermals' and 'soaring' heights in IMAGE 2 with the 'Cloud Cover' and 'Rel. Humidity' in IMAGE 3. Will it overdevelop? Is there a risk of cloud suck? Are the thermals blocked by high cirrus?
+    3. Wind Shear Threat: Scrutinize IMAGE 4. Identify any dangerous wind shear layers (orange/red/purple zones) within the usable thermal altitudes. Mention specific altitudes if shear is dangerous.
+    4. Rain/Precipitation: Check IMAGE 1 for rain/showers (blue bars).
+    
+    STYLE & TONE INSTRUCTIONS:
+    - Complexity: {style_pref}
+    - If the weather is dangerous (high shear, thunderstorms, strong base winds), explicitly warn the pilot.
+    {additional_instructions}
+
+    Raw Open-Meteo Data (Supplementary - Use if Meteogram is ambiguous):
+    {summarized_data_text}
+
+    FINAL REQUIREMENT:
+    Write the entire response strictly in {target_language}. Use clean paragraphs, bold text for key metrics, and bullet points for readability on mobile devices.
+    """
+
+    prompt_ms = (time.perf_counter() - prompt_started) * 1000
+    ai_stage_timings.record('prompt_build', prompt_ms)
+    timings['prompt_build'] = round(prompt_ms, 1)
+
+    if not gemini_client:
+        raise ValueError("Gemini client not initialized.")
+    return [prompt_content, slice_1, slice_2, slice_3, slice_4], encoding
+
+
+def _record_tokens(label, usage_metadata, model_ms, lat, lon):
+    counts = token_usage.record(label, usage_metadata, model_ms)
+    if counts:
+        logging.info(f"Gemini tokens [{label}] for {lat},{lon}: prompt {counts['prompt']} "
+                     f"(text {counts['prompt_text']}, images {counts['prompt_image']}), "
+                     f"output {counts['output']}, thoughts {counts['thoughts']}")
+
+
+def _record_ai_total(lat, lon, timings, started):
+    total_ms = (time.monotonic() - started) * 1000
+    ai_stage_timings.record('total', total_ms)
+    timings['total'] = round(total_ms, 1)
+    logging.info(f"AI interpretation stages for {lat},{lon} (ms): {timings}")
+
+
+def get_ai_interpretation(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+    timings = {}
+    started = time.monotonic()
+    try:
+        contents, encoding = build_ai_contents(lat, lon, asl, req_language, req_style, req_units, timings, started)
 
         # 5. Gemini API Call
-        if not gemini_client:
-            raise ValueError("Gemini client not initialized.")
-        
         logging.info(f"Calling Gemini API with model: gemini-3.1-pro-preview for location {lat},{lon}")
-        response = gemini_client.models.generate_content(
-            model='gemini-3.1-pro-preview',
-            contents=[prompt_content, slice_1, slice_2, slice_3, slice_4]
-        )
+        with ai_stage_timings.stage('model_call', timings):
+            response = gemini_generate(contents)
+        _record_tokens(f"interpret:{encoding}", response.usage_metadata, timings['model_call'], lat, lon)
+        _record_ai_total(lat, lon, timings, started)
         if response.text:
             return response.text
         else:
@@ -510,23 +1092,61 @@ def get_ai_interpretation(lat, lon, asl, req_language=None, req_style=None, req_
         raise
 
 
+def stream_ai_interpretation(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+    """Same as get_ai_interpretation, but yields the text chunk by chunk as Gemini produces it."""
+    timings = {}
+    started = time.monotonic()
+    try:
+        contents, encoding = build_ai_contents(lat, lon, asl, req_language, req_style, req_units, timings, started)
+
+        logging.info(f"Streaming Gemini API with model: gemini-3.1-pro-preview for location {lat},{lon}")
+        model_started = time.perf_counter()
+        received = False
+        usage_metadata = None
+        for chunk in gemini_generate_stream(contents):
+            # Usage is reported on the final chunk(s)
+            usage_metadata = chunk.usage_metadata or usage_metadata
+            if not chunk.text:
+                continue
+            if not received:
+                received = True
+                first_token_ms = (time.perf_counter() - model_started) * 1000
+                ai_stage_timings.record('model_first_token', first_token_ms)
+                timings['model_first_token'] = round(first_token_ms, 1)
+            yield chunk.text
+
+        model_ms = (time.perf_counter() - model_started) * 1000
+        ai_stage_timings.record('model_call', model_ms)
+        timings['model_call'] = round(model_ms, 1)
+        _record_tokens(f"interpret_stream:{encoding}", usage_metadata, model_ms, lat, lon)
+        _record_ai_total(lat, lon, timings, started)
+        if not received:
+            logging.error(f"Gemini API returned empty stream for {lat},{lon}")
+            raise ValueError("Gemini API returned an empty response.")
+    except Exception as e:
+        logging.error(f"AI interpretation stream error for user ({lat},{lon}): {str(e)}", exc_info=True)
+        raise
+
+
 # --- Route for Prefetching Weather ---
 @app.route("/api/prefetch-weather", methods=["POST"])
 def prefetch_weather():
     data = request.get_json()
     if not data or 'lat' not in data or 'lon' not in data:
         return jsonify({"error": "Missing coordinates"}), 400
-    lat, lon = data['lat'], data['lon']
-    
-    # Just fire and forget in a background thread to prime the cache
-    def fetch_thread():
-        try:
-            get_openmeteo_data(lat, lon)
-        except Exception as e:
-            logging.warn(f"Prefetch failed for {lat}, {lon}: {e}")
-            
-    threading.Thread(target=fetch_thread).start()
-    return jsonify({"status": "prefetch started"})
+    try:
+        lat, lon = float(data['lat']), float(data['lon'])
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid coordinates"}), 400
+
+    # Prime the forecast cache on the bounded prefetch pool (one job per grid cell)
+    cache_key = forecast_cache.key_for(lat, lon)
+    status = prefetch_executor.submit(
+        cache_key,
+        lambda: get_openmeteo_data(lat, lon),
+        is_cached=lambda: forecast_cache.get(cache_key) is not None
+    )
+    return jsonify({"status": f"prefetch {status}"})
 
 # --- Root Route (Static Site) ---
 @app.route("/")
@@ -897,7 +1517,7 @@ def debug_weather():
 
     if lat and lon:
         try:
-            df = get_openmeteo_data(lat, lon)
+            df = get_openmeteo_data(lat, lon).to_dataframe()
             df['date'] = df['date'].dt.strftime('%Y-%m-%d %H:%M')
             data = df.to_dict(orient='records')
         except Exception as e:
@@ -906,6 +1526,34 @@ def debug_weather():
     return render_template("debug.html", data=data, lat=lat, lon=lon, error=error)
 
 
+# --- METRICS ROUTE ---
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    # Fail closed: without a configured METRICS_TOKEN the endpoint doesn't exist
+    if not METRICS_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    token = request.headers.get("X-Metrics-Token") or request.args.get("token") or ""
+    if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    response = jsonify({
+        "openmeteo_pool": openmeteo_pool.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "shared_cache": shared_cache.stats(),
+        "prefetch": prefetch_executor.stats(),
+        "ai_stages_ms": ai_stage_timings.stats(),
+        "ai_tokens": token_usage.stats(),
+        "gemini": gemini_guard.stats(),
+        "jobs": job_queue.stats(),
+        "singleflight": {
+            "openmeteo": forecast_flight.stats(),
+            "meteoblue": meteogram_flight.stats(),
+        },
+    })
+    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
+
 # --- Rate Limiting for Emails ---
 # Structure: { user_id: [timestamp1, timestamp2, ...] }
 EMAIL_LIMITS = {}
@@ -944,10 +1592,7 @@ def send_brevo_email(email_to, lat, lon, asl, interpretation_text):
     attachment = None
     if lat and lon and METEOBLUE_API_KEY:
         try:
-            img_url = f"https://my.meteoblue.com/images/meteogram_thermal?lat={lat}&lon={lon}&asl={asl}&apikey={METEOBLUE_API_KEY}"
-            img_response = requests.get(img_url, timeout=15)
-            img_response.raise_for_status()
-            img_b64 = base64.b64encode(img_response.content).decode('utf-8')
+            img_b64 = get_meteogram_artifact(lat, lon, asl, timeout=15).b64
             attachment = [{
                 "content": img_b64,
                 "name": "meteogram_thermal.png",
@@ -1226,6 +1871,51 @@ def update_user_state():
         return jsonify({'error': str(e)}), 500
 
 
+def _save_ai_report(data, lat, lon, result, user=None):
+    user = user or current_user
+    # Save to DB
+    new_report = AIReport(user_id=user.id, lat=lat, lon=lon, content=result)
+    db.session.add(new_report)
+
+    # CHECKPOINT UPDATE: Save this location as the user's last state
+    user.last_lat = float(lat)
+    user.last_lon = float(lon)
+    # We don't have zoom/pitch/bearing in this payload usually, so we might leave them or set defaults.
+    # Ideally, we would want the current view state, but `interpret` payload might be just lat/lon.
+    # However, checking frontend calls, `interpret` usually happens at current view center or clicked point.
+    # If we update lat/lon, the init logic will center there.
+    # If we want to preserve zoom, we can check if data has it, otherwise keep current value.
+    if 'zoom' in data: user.last_zoom = float(data['zoom'])
+    if 'pitch' in data: user.last_pitch = float(data['pitch'])
+    if 'bearing' in data: user.last_bearing = float(data['bearing'])
+    if 'map_type' in data: user.last_map_type = data['map_type']
+
+    db.session.commit()
+
+
+# --- Local XC pre-score ---
+def score_location(lat, lon, asl=None, cube=None):
+    """Deterministic GO / MARGINAL / NO-GO for the next flyable day, without calling the model."""
+    if cube is None:
+        cube = get_openmeteo_data(float(lat), float(lon))
+    return score_forecast(cube, time.time(), asl=asl, flying_hours=FLYING_HOURS)
+
+
+@app.route("/api/xc-score", methods=["GET"])
+def xc_score_api():
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    lat = request.args.get("lat", type=float)
+    lon = request.args.get("lon", type=float)
+    asl = request.args.get("asl", type=float)
+    if lat is None or lon is None:
+        return jsonify({'error': 'Latitude and longitude are required.'}), 400
+    try:
+        return _tag_data_age(jsonify(score_location(lat, lon, asl)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 502
+
+
 @app.route("/api/interpret", methods=["POST"])
 # @login_required
 def interpret():
@@ -1239,47 +1929,144 @@ def interpret():
     req_lang = data.get("language")
     req_style = data.get("style")
     req_units = data.get("units")
+    force_fresh = bool(data.get("force_fresh", False))
+    precheck = bool(data.get("precheck", False))
 
     if not all([lat, lon]):
         return jsonify({"error": "Missing required data."}), 400
     if current_user.credits < INTERPRETATION_COST:
         return jsonify({"error": f"Insufficient credits."}), 403
 
+    # Optional free pre-check: a clear local NO-GO is answered without spending a credit on the model
+    if precheck:
+        try:
+            score = score_location(lat, lon, asl)
+        except ValueError:
+            score = None
+        if score and score["verdict"] == NO_GO:
+            return _tag_data_age(jsonify({"interpretation": None, "xc_score": score,
+                                          "remaining_credits": current_user.credits, "data_age": _data_age_payload()}))
+
+    # A pilot already asked about this cell with the same settings during this forecast run
+    cached = None
+    if not force_fresh:
+        cached = get_cached_interpretation(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
+    if not cached and gemini_guard.is_open():
+        return _model_unavailable_response(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
+
     current_user.credits -= INTERPRETATION_COST
     db.session.add(Transaction(user_id=current_user.id, type='interpretation', amount=-INTERPRETATION_COST,
-                               description=f'AI interpretation for {lat},{lon}'))
+                               description=f'AI interpretation for {lat},{lon}{" (cached)" if cached else ""}'))
     db.session.commit()
 
     try:
-        result = get_ai_interpretation(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
-        
-        # Save to DB
-        new_report = AIReport(user_id=current_user.id, lat=lat, lon=lon, content=result)
-        db.session.add(new_report)
-
-        # CHECKPOINT UPDATE: Save this location as the user's last state
-        current_user.last_lat = float(lat)
-        current_user.last_lon = float(lon)
-        # We don't have zoom/pitch/bearing in this payload usually, so we might leave them or set defaults.
-        # Ideally, we would want the current view state, but `interpret` payload might be just lat/lon.
-        # However, checking frontend calls, `interpret` usually happens at current view center or clicked point.
-        # If we update lat/lon, the init logic will center there.
-        # If we want to preserve zoom, we can check if data has it, otherwise keep current value.
-        if 'zoom' in data: current_user.last_zoom = float(data['zoom'])
-        if 'pitch' in data: current_user.last_pitch = float(data['pitch'])
-        if 'bearing' in data: current_user.last_bearing = float(data['bearing'])
-        if 'map_type' in data: current_user.last_map_type = data['map_type']
+        if cached:
+            result = cached
+        else:
+            result = get_ai_interpretation(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
+            store_interpretation(lat, lon, asl, result, req_language=req_lang, req_style=req_style, req_units=req_units)
         
-        db.session.commit()
+        _save_ai_report(data, lat, lon, result)
 
-        return jsonify({"interpretation": result, "remaining_credits": current_user.credits})
+        return _tag_data_age(jsonify({"interpretation": result, "remaining_credits": current_user.credits,
+                                      "cached": bool(cached), "data_age": _data_age_payload()}))
     except Exception as e:
         logging.error(f"AI error: {e}", exc_info=True)
+        db.session.rollback()
         current_user.credits += INTERPRETATION_COST
         db.session.commit()
+        if isinstance(e, UpstreamDataTimeout):
+            return jsonify({"error": "Weather data is taking too long to load. Please try again shortly."}), 504
+        if isinstance(e, (CircuitOpenError, TimeoutError)):
+            return _model_unavailable_response(lat, lon, asl, req_language=req_lang, req_style=req_style,
+                                               req_units=req_units)
         return jsonify({"error": "AI failed."}), 500
 
 
+def _sse(payload, event=None):
+    # One Server-Sent Event; JSON keeps newlines in the markdown intact
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+
+@app.route("/api/interpret-stream", methods=["POST"])
+def interpret_stream():
+    """Streaming variant of /api/interpret: the answer is sent as Server-Sent Events while Gemini writes it."""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json()
+    lat = data.get("lat")
+    lon = data.get("lon")
+    asl = data.get("asl", 0)
+
+    req_lang = data.get("language")
+    req_style = data.get("style")
+    req_units = data.get("units")
+    force_fresh = bool(data.get("force_fresh", False))
+
+    if not all([lat, lon]):
+        return jsonify({"error": "Missing required data."}), 400
+    if current_user.credits < INTERPRETATION_COST:
+        return jsonify({"error": f"Insufficient credits."}), 403
+
+    cached = None
+    if not force_fresh:
+        cached = get_cached_interpretation(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
+    if not cached and gemini_guard.is_open():
+        # Plain JSON, like the other early answers; the client renders it without streaming
+        return _model_unavailable_response(lat, lon, asl, req_language=req_lang, req_style=req_style, req_units=req_units)
+
+    # Pin the user's settings now: the commit below expires current_user, and the
+    # generator runs after the view returns, so it must not lazy-load it again
+    req_lang = req_lang or current_user.ai_language or 'en'
+    req_style = req_style or current_user.ai_prompt_style or 'Basic'
+    req_units = req_units or 'metric'
+    user_id = current_user.id
+
+    current_user.credits -= INTERPRETATION_COST
+    db.session.add(Transaction(user_id=user_id, type='interpretation', amount=-INTERPRETATION_COST,
+                               description=f'AI interpretation for {lat},{lon}{" (cached)" if cached else ""}'))
+    db.session.commit()
+
+    def generate():
+        parts = []
+        completed = False
+        try:
+            if cached:
+                parts.append(cached)
+                yield _sse({"text": cached})
+            else:
+                for text in stream_ai_interpretation(lat, lon, asl, req_language=req_lang,
+                                                     req_style=req_style, req_units=req_units):
+                    parts.append(text)
+                    yield _sse({"text": text})
+                store_interpretation(lat, lon, asl, "".join(parts),
+                                     req_language=req_lang, req_style=req_style, req_units=req_units)
+
+            user = db.session.get(User, user_id)
+            _save_ai_report(data, lat, lon, "".join(parts), user=user)
+            completed = True
+            yield _sse({"remaining_credits": user.credits, "cached": bool(cached),
+                        "data_age": _data_age_payload()}, event="done")
+        except UpstreamDataTimeout as e:
+            logging.error(f"AI stream error: {e}")
+            yield _sse({"error": "Weather data is taking too long to load. Please try again shortly."}, event="error")
+        except Exception as e:
+            logging.error(f"AI stream error: {e}", exc_info=True)
+            yield _sse({"error": "AI failed."}, event="error")
+        finally:
+            # Failed or abandoned mid-way (including the client disconnecting): give the credit back
+            if not completed:
+                db.session.rollback()
+                db.session.get(User, user_id).credits += INTERPRETATION_COST
+                db.session.commit()
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
 # --- NEW BACKGROUND ROUTE ---
 @app.route("/api/interpret-and-email", methods=["POST"])
 # @login_required
@@ -1356,6 +2143,138 @@ def send_email_route():
         return jsonify({'error': msg}), 500
 
 
+# --- ROUTE INTERPRETATION ---
+MAX_ROUTE_POINTS = 10
+ROUTE_FETCH_FANOUT = int(os.environ.get("ROUTE_FETCH_FANOUT", 4))           # concurrent forecast requests
+ROUTE_FETCH_DEADLINE = float(os.environ.get("ROUTE_FETCH_DEADLINE", 12))    # seconds for all points
+ROUTE_SAMPLE_KM = float(os.environ.get("ROUTE_SAMPLE_KM", 10))              # along-track sample spacing
+MAX_ROUTE_SAMPLES = int(os.environ.get("MAX_ROUTE_SAMPLES", 100))
+
+
+def route_sample_spacing(turnpoints):
+    # ROUTE_SAMPLE_KM apart, widened on long routes so there are at most MAX_ROUTE_SAMPLES samples
+    lat = np.radians([p[0] for p in turnpoints])
+    lon = np.radians([p[1] for p in turnpoints])
+    hav = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    total_km = float(np.sum(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(hav))))
+    return max(ROUTE_SAMPLE_KM, total_km / MAX_ROUTE_SAMPLES)
+
+
+def sample_route(route):
+    # Cap points to avoid abuse/timeout
+    if len(route) > MAX_ROUTE_POINTS:
+        # Sample it down to 10 points max (start, end, and even intermediates)
+        indices = np.linspace(0, len(route) - 1, MAX_ROUTE_POINTS, dtype=int)
+        route = [route[i] for i in indices]
+    return route
+
+
+def run_route_interpretation(route, req_lang=None, req_style=None, req_units=None):
+    """
+    Point-by-point and along-track (per-leg) route analysis (text only).
+    Returns (answer, missing) where `missing` lists the 1-based points that had no forecast data.
+    """
+    # 1. Densify the route along great circles; fetch turnpoints and samples concurrently
+    #    (samples sharing a grid cell are one location upstream), bounded by an overall deadline
+    turnpoints = [(point['lat'], point['lon']) for point in route]
+    samples = densify_route(turnpoints, spacing_km=route_sample_spacing(turnpoints))
+    sample_cells = [forecast_cache.key_for(lat, lon) for lat, lon in zip(samples["lat"], samples["lon"])]
+    unique_cells = list(dict.fromkeys(sample_cells))
+    fetched = get_openmeteo_data_batch(turnpoints + unique_cells,
+                                       fanout=ROUTE_FETCH_FANOUT, timeout=ROUTE_FETCH_DEADLINE)
+    forecasts, cell_cubes = fetched[:len(turnpoints)], fetched[len(turnpoints):]
+
+    aggregated_data = []
+    missing = []
+    for i, (point, cube) in enumerate(zip(route, forecasts)):
+        lat, lon = point['lat'], point['lon']
+        if cube is None:
+            logging.error(f"Failed to fetch data for point {i}")
+            missing.append(i + 1)
+            continue
+        try:
+            # Just take the first meaningful time slice for "now" or "next flyable hour"
+            # For summary, we'll grab specific metrics for "12:00" or next closest flying hour of TODAY/TOMORROW
+            
+            # Simplified Summary extraction
+            future = cube.window(start=int(time.time()))
+            if not future.empty:
+                # Pick a representative hour (noon-ish) or next available
+                # Let's try to find next 13:00, or just taking the 1st row if close
+                rep_row = future.row(0)
+                
+                aggregated_data.append({
+                    "point_index": i + 1,
+                    "lat": lat, "lon": lon,
+                    "wind_speed": rep_row['wind_speed_10m'],
+                    "wind_dir": rep_row.get('wind_direction_1000hPa', 0), # Fallback
+                    "cloud_cover": rep_row['cloud_cover'],
+                    "thermals_cape": rep_row['cape'],
+                    "temp": rep_row['temperature_2m']
+                })
+        except Exception as e:
+            logging.error(f"Failed to summarize data for point {i}: {e}")
+            missing.append(i + 1)
+            continue
+    
+    if not aggregated_data:
+         raise ValueError("Failed to fetch weather data for any point in the route.")
+
+    # 2. Construct Prompt
+    data_summary_text = "\n".join([
+        f"Point {d['point_index']} ({d['lat']:.2f},{d['lon']:.2f}): Wind {d['wind_speed']:.1f}km/h, Clouds {d['cloud_cover']:.0f}%, Thermals(CAPE) {d['thermals_cape']:.0f}"
+        for d in aggregated_data
+    ])
+    if missing:
+        data_summary_text += (f"\nNo forecast data available for point(s) {', '.join(map(str, missing))}; "
+                              f"say so instead of guessing their conditions.")
+
+    # Along-track wind per leg over the next flyable hours, all samples x hours at once
+    reference = next((cube for cube in cell_cubes if cube is not None), None)
+    target_times = flyable_times(reference, int(time.time()), FLYING_HOURS) if reference is not None else []
+    leg_summary_text = ""
+    if len(target_times) and len(sample_cells):
+        cell_index = {cell: i for i, cell in enumerate(unique_cells)}
+        fields = sample_fields(cell_cubes, np.array([cell_index[c] for c in sample_cells]), target_times)
+        legs = summarize_legs(samples, fields, target_times)
+        day = datetime.fromtimestamp(int(target_times[0]), tz=timezone.utc).strftime('%a %d %b')
+        leg_summary_text = format_leg_summary(legs, f"{day}, {FLYING_HOURS[0]:02d}-{FLYING_HOURS[1]:02d}h UTC, "
+                                                    f"{len(samples['lat'])} samples")
+
+    target_language = LANGUAGE_MAP.get(req_lang, "English")
+    
+    prompt = f"""
+    Analyze this paragliding route by interpreting EACH point separately:
+    
+    {data_summary_text}
+
+    {leg_summary_text}
+    
+    INSTRUCTIONS:
+    - Role: Expert XC Pilot.
+    - Style: {req_style or 'Concise'}
+    - Language: {target_language}
+    - Units: {req_units or 'metric'}
+    
+    STRUCTURE:
+    1. **Point-by-Point Analysis**: Briefly analyze the conditions (Wind, Cloudbase, Thermals) for each point listed above.
+    2. **Route Verdict**: Is the connection feasible? Where is the crux? Use the along-track headwind/crosswind per leg and the best hours to suggest timing and direction.
+    
+    (Make sure to provide value for every point since the pilot paid for each location analysis.)
+    """
+    
+    # 3. Call AI (Text only for route, no meteogram image stitch yet)
+    if not gemini_client:
+        raise ValueError("Gemini client not initialized.")
+
+    logging.info(f"Calling Gemini API for Route with model: gemini-3.1-pro-preview. Points: {len(route)}")
+    model_started = time.perf_counter()
+    response = gemini_generate(prompt)
+    _record_tokens("route", response.usage_metadata, (time.perf_counter() - model_started) * 1000,
+                   route[0]['lat'], route[0]['lon'])
+    return (response.text if response.text else "AI returned no analysis."), missing
+
+
 # --- ROUTE INTERPRETATION ENDPOINT ---
 @app.route("/api/interpret-route", methods=["POST"])
 # @login_required
@@ -1371,11 +2290,7 @@ def interpret_route():
     if not route or not isinstance(route, list) or len(route) < 2:
         return jsonify({"error": "Route must contain at least 2 points."}), 400
     
-    # Cap points to avoid abuse/timeout
-    if len(route) > 10:
-        # Sample it down to 10 points max (start, end, and even intermediates)
-        indices = np.linspace(0, len(route) - 1, 10, dtype=int)
-        route = [route[i] for i in indices]
+    route = sample_route(route)
 
     # Calculate cost: 1 credit per point (as each is interpreted separately)
     ROUTE_COST = len(route) * INTERPRETATION_COST
@@ -1389,84 +2304,15 @@ def interpret_route():
     db.session.commit()
 
     try:
-        # 1. Fetch Data for each point (or key points)
-        # We'll fetch concurrently or sequentially. For simplicity and reliability -> Sequential loop with error handling.
-        
-        aggregated_data = []
-        for i, point in enumerate(route):
-            lat, lon = point['lat'], point['lon']
-            try:
-                df = get_openmeteo_data(lat, lon)
-                # Just take the first meaningful time slice for "now" or "next flyable hour"
-                # For summary, we'll grab specific metrics for "12:00" or next closest flying hour of TODAY/TOMORROW
-                
-                # Simplified Summary extraction
-                now = pd.Timestamp.now(tz='UTC')
-                future = df[df['date'] >= now]
-                if not future.empty:
-                    # Pick a representative hour (noon-ish) or next available
-                    # Let's try to find next 13:00, or just taking the 1st row if close
-                    rep_row = future.iloc[0]
-                    
-                    aggregated_data.append({
-                        "point_index": i + 1,
-                        "lat": lat, "lon": lon,
-                        "wind_speed": rep_row['wind_speed_10m'],
-                        "wind_dir": rep_row.get('wind_direction_1000hPa', 0), # Fallback
-                        "cloud_cover": rep_row['cloud_cover'],
-                        "thermals_cape": rep_row['cape'],
-                        "temp": rep_row['temperature_2m']
-                    })
-            except Exception as e:
-                logging.error(f"Failed to fetch data for point {i}: {e}")
-                continue
-        
-        if not aggregated_data:
-             raise ValueError("Failed to fetch weather data for any point in the route.")
-
-        # 2. Construct Prompt
-        data_summary_text = "\n".join([
-            f"Point {d['point_index']} ({d['lat']:.2f},{d['lon']:.2f}): Wind {d['wind_speed']:.1f}km/h, Clouds {d['cloud_cover']:.0f}%, Thermals(CAPE) {d['thermals_cape']:.0f}"
-            for d in aggregated_data
-        ])
-
-        target_language = LANGUAGE_MAP.get(req_lang, "English")
-        
-        prompt = f"""
-        Analyze this paragliding route by interpreting EACH point separately:
-        
-        {data_summary_text}
-        
-        INSTRUCTIONS:
-        - Role: Expert XC Pilot.
-        - Style: {req_style or 'Concise'}
-        - Language: {target_language}
-        - Units: {req_units or 'metric'}
-        
-        STRUCTURE:
-        1. **Point-by-Point Analysis**: Briefly analyze the conditions (Wind, Cloudbase, Thermals) for each point listed above.
-        2. **Route Verdict**: Is the connection feasible? Where is the crux?
-        
-        (Make sure to provide value for every point since the pilot paid for each location analysis.)
-        """
-        
-        # 3. Call AI (Text only for route, no meteogram image stitch yet)
-        if not gemini_client:
-            raise ValueError("Gemini client not initialized.")
-
-        logging.info(f"Calling Gemini API for Route with model: gemini-3.1-pro-preview. Points: {len(route)}")
-        response = gemini_client.models.generate_content(
-            model='gemini-3.1-pro-preview',
-            contents=prompt
-        )
-        result_text = response.text if response.text else "AI returned no analysis."
+        result_text, missing = run_route_interpretation(route, req_lang, req_style, req_units)
 
         # Save Report
         new_report = AIReport(user_id=current_user.id, lat=route[0]['lat'], lon=route[0]['lon'], content=f"**Route Analysis:**\n\n{result_text}")
         db.session.add(new_report)
         db.session.commit()
 
-        return jsonify({"interpretation": result_text, "remaining_credits": current_user.credits})
+        return _tag_data_age(jsonify({"interpretation": result_text, "remaining_credits": current_user.credits,
+                                      "missing_points": missing, "data_age": _data_age_payload()}))
 
     except Exception as e:
         logging.error(f"Route AI error: {str(e)}", exc_info=True)
@@ -1475,6 +2321,136 @@ def interpret_route():
         return jsonify({"error": f"Route analysis failed: {str(e)}"}), 500
 
 
+# --- ASYNC INTERPRETATION JOBS ---
+# Same work as /api/interpret and /api/interpret-route, but the request returns a job id at once
+# and a bounded pool (JOB_WORKERS threads per process) does the slow part. Clients poll /api/jobs/<id>.
+def _run_interpret_job(job):
+    data = json.loads(job.payload)
+    user = db.session.get(User, job.user_id)
+    lat, lon, asl = data["lat"], data["lon"], data.get("asl", 0)
+    prefs = dict(req_language=data.get("language"), req_style=data.get("style"), req_units=data.get("units"))
+
+    result = None if data.get("force_fresh") else get_cached_interpretation(lat, lon, asl, **prefs)
+    if result is None:
+        try:
+            if gemini_guard.is_open():
+                raise CircuitOpenError("gemini circuit is open")
+            result = get_ai_interpretation(lat, lon, asl, **prefs)
+        except (CircuitOpenError, TimeoutError):
+            return _stale_job_result(job, lat, lon, asl, prefs)
+        store_interpretation(lat, lon, asl, result, **prefs)
+    _save_ai_report(data, lat, lon, result, user=user)
+    return result
+
+
+def _stale_job_result(job, lat, lon, asl, prefs):
+    # Same fallback as _model_unavailable_response: a stale interpretation for free, or the job fails (and is refunded)
+    entry = get_stale_interpretation(lat, lon, asl, **prefs)
+    if entry is None:
+        raise RuntimeError("AI is temporarily unavailable.")
+    _refund_job(job)
+    job.cost = 0
+    return entry.content
+
+
+def _run_route_job(job):
+    data = json.loads(job.payload)
+    route = data["route"]
+    result_text, missing = run_route_interpretation(route, data.get("language"), data.get("style"), data.get("units"))
+    if missing:
+        logging.info(f"Route job {job.id}: no forecast for point(s) {missing}")
+    db.session.add(AIReport(user_id=job.user_id, lat=route[0]['lat'], lon=route[0]['lon'],
+                            content=f"**Route Analysis:**\n\n{result_text}"))
+    db.session.commit()
+    return result_text
+
+
+def _refund_job(job):
+    user = db.session.get(User, job.user_id)
+    if user is not None and job.cost:
+        user.credits += job.cost
+
+
+job_queue.register('interpret', _run_interpret_job)
+job_queue.register('interpret_route', _run_route_job)
+job_queue.on_failure = _refund_job
+
+
+@app.before_request
+def start_job_workers():
+    job_queue.ensure_workers()
+
+
+@app.route("/api/jobs/interpret", methods=["POST"])
+def submit_interpret_job():
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json() or {}
+    if not all([data.get("lat"), data.get("lon")]):
+        return jsonify({"error": "Missing required data."}), 400
+    if current_user.credits < INTERPRETATION_COST:
+        return jsonify({"error": f"Insufficient credits."}), 403
+
+    # Workers have no logged-in user: resolve the settings fallbacks now
+    data["language"] = data.get("language") or current_user.ai_language
+    data["style"] = data.get("style") or current_user.ai_prompt_style
+
+    # Model down and nothing fresh to serve: answer with the stale fallback now instead of queueing
+    prefs = dict(req_language=data["language"], req_style=data["style"], req_units=data.get("units"))
+    if gemini_guard.is_open() and (data.get("force_fresh") or
+                                   not get_cached_interpretation(data["lat"], data["lon"], data.get("asl", 0), **prefs)):
+        return _model_unavailable_response(data["lat"], data["lon"], data.get("asl", 0), **prefs)
+
+    current_user.credits -= INTERPRETATION_COST
+    db.session.add(Transaction(user_id=current_user.id, type='interpretation', amount=-INTERPRETATION_COST,
+                               description=f'AI interpretation for {data["lat"]},{data["lon"]}'))
+    job_id = job_queue.submit('interpret', current_user.id, json.dumps(data), cost=INTERPRETATION_COST)
+    return jsonify({"job_id": job_id, "status": "queued", "remaining_credits": current_user.credits}), 202
+
+
+@app.route("/api/jobs/interpret-route", methods=["POST"])
+def submit_route_job():
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json() or {}
+    route = data.get("route")
+    if not route or not isinstance(route, list) or len(route) < 2:
+        return jsonify({"error": "Route must contain at least 2 points."}), 400
+
+    data["route"] = route = sample_route(route)
+    route_cost = len(route) * INTERPRETATION_COST
+    if current_user.credits < route_cost:
+        return jsonify({"error": f"Insufficient credits. This route has {len(route)} points, requiring {route_cost} credits."}), 403
+
+    current_user.credits -= route_cost
+    db.session.add(Transaction(user_id=current_user.id, type='route_interpretation', amount=-route_cost,
+                               description=f'AI Route analysis for {len(route)} points ({route_cost} credits)'))
+    job_id = job_queue.submit('interpret_route', current_user.id, json.dumps(data), cost=route_cost)
+    return jsonify({"job_id": job_id, "status": "queued", "remaining_credits": current_user.credits}), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    job = db.session.get(InterpretationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+
+    payload = {"job_id": job.id, "type": job.job_type, "status": job.status}
+    if job.status == 'queued':
+        payload["position"] = job_queue.position(job)
+    elif job.status == 'done':
+        payload["interpretation"] = job.result
+        payload["remaining_credits"] = current_user.credits
+    elif job.status == 'failed':
+        payload["error"] = "AI failed."
+        payload["remaining_credits"] = current_user.credits
+    response = jsonify(payload)
+    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
+
 
 
 @app.route("/api/tts", methods=["POST"])
@@ -1561,20 +2537,12 @@ def get_thermal_image():
     if not METEOBLUE_API_KEY:
         return jsonify({'error': 'Server configuration error: API Key missing'}), 500
 
-    lat_rounded = round(float(lat), 1)
-    lon_rounded = round(float(lon), 1)
-    asl_rounded = int(round(float(asl) / 100.0) * 100)
-
-    img_url = f"https://my.meteoblue.com/images/meteogram_thermal?lat={lat_rounded}&lon={lon_rounded}&asl={asl_rounded}&apikey={METEOBLUE_API_KEY}"
-    
     try:
         # Proxy request to Meteoblue using global cache
-        resp = meteoblue_cache.get(img_url, timeout=10)
-        resp.raise_for_status()
+        image_bytes, content_type = fetch_meteogram(lat, lon, asl, timeout=10)
         
         # Return cached image bytes directly
-        from flask import Response
-        return Response(resp.content, content_type=resp.headers.get('Content-Type', 'image/png'))
+        return _tag_data_age(Response(image_bytes, content_type=content_type))
     except Exception as e:
         print(f"Meteoblue Proxy Error: {e}")
         return jsonify({'error': 'Failed to retrieve thermal image'}), 502
@@ -1854,6 +2822,22 @@ def proxy_paragliding_sites():
     if not current_user.is_authenticated:
         return jsonify({'error': 'Unauthorized'}), 401
     bounds = {k: request.args.get(k) for k in ["south", "north", "west", "east"]}
+    try:
+        # Widen the box to a 0.05° grid so nearby map views share one cached site list
+        step = 0.05
+        bounds = {
+            "south": round(np.floor(float(bounds["south"]) / step) * step, 2),
+            "north": round(np.ceil(float(bounds["north"]) / step) * step, 2),
+            "west": round(np.floor(float(bounds["west"]) / step) * step, 2),
+            "east": round(np.ceil(float(bounds["east"]) / step) * step, 2),
+        }
+    except (TypeError, ValueError):
+        pass
+    sites_key = (bounds["south"], bounds["north"], bounds["west"], bounds["east"])
+    cached_sites = shared_cache.get('sites', sites_key)
+    if cached_sites is not None:
+        return jsonify(cached_sites)
+
     try:
         # Add User-Agent to avoid blocking
         headers = {
@@ -1865,7 +2849,9 @@ def proxy_paragliding_sites():
                          timeout=5) # Reduced timeout
         r.raise_for_status()
         try:
-            return jsonify(r.json())
+            sites = r.json()
+            shared_cache.set('sites', sites_key, sites, ttl=SITES_CACHE_TTL)
+            return jsonify(sites)
         except ValueError:
             print(f"Upstream API Error (Non-JSON): {r.text[:200]}")
             # Return empty feature collection instead of error to keep map alive
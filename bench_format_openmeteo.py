@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: legacy iterrows formatter vs. vectorized format_openmeteo_data_for_ai.
+
+Builds a synthetic 72-hour forecast, checks both formatters produce byte-identical
+text and times them.
+
+Usage: python bench_format_openmeteo.py [iterations]
+"""
+import sys
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app import format_openmeteo_data_for_ai, HOURLY_VARIABLES
+from forecast_cube import ForecastCube
+
+
+def legacy_format_openmeteo_data_for_ai(df, now):
+    # Verbatim copy of the pre-vectorization formatter, with `now` injected.
+    if df.empty:
+        return "No hourly data available."
+
+    future_df = df[df['date'] >= now].copy()
+
+    if future_df.empty:
+        return "No future data available in the forecast window."
+
+    summary_lines = ["--- Open-Meteo Hourly Data Summary for AI Interpretation ---"]
+    summary_lines.append(f"Report Generated At: {now.strftime('%Y-%m-%d %H:%M UTC')}")
+    summary_lines.append("INSTRUCTION: Treat the first available date below as 'Day 1'.")
+    summary_lines.append("")
+
+    future_df['hour_only'] = future_df['date'].dt.hour
+    flying_hours_df = future_df[(future_df['hour_only'] >= 9) & (future_df['hour_only'] <= 18)]
+
+    if flying_hours_df.empty:
+        return "No flyable hours (09:00-18:00) found in the remaining forecast."
+
+    unique_days = flying_hours_df['date'].dt.date.unique()
+
+    for day in unique_days:
+        day_data = flying_hours_df[flying_hours_df['date'].dt.date == day]
+        summary_lines.append(f"=== FORECAST FOR DATE: {day} ===")
+
+        for _, row in day_data.iterrows():
+            summary_lines.append(f"Time: {row['date'].strftime('%H:00')}")
+            summary_lines.append(
+                f" - Wind (Surface): {row['wind_speed_10m']:.1f} km/h (Gusts: {row['wind_gusts_10m']:.1f})")
+            summary_lines.append(
+                f" - Wind (1500m/850hPa): {row['wind_speed_850hPa']:.1f} km/h from {row['wind_direction_850hPa']:.0f}°")
+            summary_lines.append(f" - Cloud Cover: {row['cloud_cover']:.0f}%")
+            summary_lines.append(f" - Rain (Precipitation): {row['precipitation']:.1f} mm")
+            summary_lines.append(f" - Temp (Surface): {row['temperature_2m']:.1f}°C")
+            summary_lines.append(f" - Thermal Quality (CAPE): {row['cape']:.0f}")
+            summary_lines.append("")
+
+    return "\n".join(summary_lines)
+
+
+def make_forecast(hours=72, seed=42):
+    rng = np.random.default_rng(seed)
+    start = int(datetime.now(timezone.utc).timestamp()) // 86400 * 86400
+    times = start + 3600 * np.arange(hours, dtype=np.int64)
+    values = (rng.random((len(HOURLY_VARIABLES), hours)) * 360).astype(np.float32)
+    values[0, 5] = np.nan  # NaNs must format the same way in both paths
+    return ForecastCube(times, values, HOURLY_VARIABLES)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cube = make_forecast()
+    df = cube.to_dataframe()
+    # Early morning UTC so all three forecast days have flyable hours
+    now = pd.Timestamp(int(cube.times[0]) + 3 * 3600, unit='s', tz='UTC')
+
+    legacy = legacy_format_openmeteo_data_for_ai(df, now)
+    vectorized = format_openmeteo_data_for_ai(cube, now=now.to_pydatetime())
+    if legacy != vectorized:
+        print("MISMATCH between legacy and vectorized output!")
+        sys.exit(1)
+    print(f"Outputs identical ({len(vectorized)} chars, {len(cube)} hours).")
+
+    t_legacy = timeit.timeit(lambda: legacy_format_openmeteo_data_for_ai(df, now), number=iterations)
+    t_vector = timeit.timeit(lambda: format_openmeteo_data_for_ai(cube, now=now.to_pydatetime()), number=iterations)
+    print(f"legacy (iterrows):  {t_legacy / iterations * 1e3:8.3f} ms/call")
+    print(f"vectorized:         {t_vector / iterations * 1e3:8.3f} ms/call")
+    print(f"speedup:            {t_legacy / t_vector:8.1f}x")
+
+    table = format_openmeteo_data_for_ai(cube, now=now.to_pydatetime(), encoding='table')
+    print(f"table encoding:     {len(table)} chars ({len(table) / len(vectorized):.0%} of verbose)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+import pytest
+
+# Tests never touch instance/site.db: app.py reads DATABASE_URL at import
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='xcthermal-test-'), 'test.db')}")
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _tables():
+    from app import app, db
+    with app.app_context():
+        db.create_all()
+    yield
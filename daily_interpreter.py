@@ -1,7 +1,55 @@
+import os
 import time
+import socket
+import argparse
 import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from app import app, db, User, UserActivity, get_ai_interpretation, send_brevo_email
+from sqlalchemy.exc import IntegrityError
+from app import (app, db, User, UserActivity, DailyRun, DailyRunOutcome, get_ai_interpretation, get_openmeteo_data_batch, send_brevo_email,
+                 score_location, get_meteogram_artifact, meteogram_key, shared_cache, METEOGRAM_NAMESPACE,
+                 OPENMETEO_BATCH_SIZE, interpretation_cache_key, resolve_ai_preferences,
+                 get_cached_interpretation, store_interpretation)
+from local_time import local_date
+from rate_limiter import TokenBucket
+from stage_timings import StageTimings
+from xc_score import NO_GO
+
+# Score every location locally first and only ask the model when the day isn't an obvious no-go
+PRESCORE_ENABLED = os.environ.get('DAILY_PRESCORE', '1') != '0'
+
+# Users processed concurrently; each upstream is paced by its own token bucket instead of a global sleep
+DAILY_WORKERS = int(os.environ.get('DAILY_WORKERS', 4))
+PROGRESS_INTERVAL = float(os.environ.get('DAILY_PROGRESS_SECONDS', 30))
+DAILY_STYLE = 'xcperfect'
+REPORT_ACTION = 'automatic_daily_report'
+REPORT_INTERVAL = timedelta(hours=20)  # at most one automatic report per user in this window
+
+# Checkpointing: every decision is stored per run, so a restarted (or second) runner skips decided users
+FINAL_OUTCOMES = ('no_go', 'no_match', 'sent')
+RETRY_OUTCOMES = ('send_failed', 'error')
+MAX_ATTEMPTS = int(os.environ.get('DAILY_MAX_ATTEMPTS', 3))
+RETRY_BACKOFF = float(os.environ.get('DAILY_RETRY_BACKOFF', 60))        # seconds, doubled per attempt
+RETRY_MAX_WAIT = float(os.environ.get('DAILY_RETRY_MAX_WAIT', 900))     # longer waits are left to the next invocation
+CLAIM_TIMEOUT = timedelta(seconds=int(os.environ.get('DAILY_CLAIM_TIMEOUT', 1800)))  # claims of a crashed runner
+RUN_CLOSE_AFTER = timedelta(days=2)  # a local date is over everywhere by then; its run is closed
+RUN_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _limiter(name, rate, burst):
+    # DAILY_RATE_<NAME> (requests per second, 0 = unlimited) and DAILY_BURST_<NAME>
+    return TokenBucket(name, float(os.environ.get(f'DAILY_RATE_{name.upper()}', rate)),
+                       int(os.environ.get(f'DAILY_BURST_{name.upper()}', burst)))
+
+
+limiters = {
+    'openmeteo': _limiter('openmeteo', 1, 2),   # one batch request per token
+    'meteoblue': _limiter('meteoblue', 2, 4),
+    'gemini': _limiter('gemini', 0.5, 2),
+    'brevo': _limiter('brevo', 5, 5),
+}
+daily_timings = StageTimings('daily_interpreter')
 
 # Configure logging
 logging.basicConfig(
@@ -13,91 +61,430 @@ logging.basicConfig(
     ]
 )
 
-def run_daily_interpreter():
+
+class RunProgress:
+    """Outcome counts, throughput and ETA for one daily run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.started = time.monotonic()
+        self.outcomes = Counter()
+        self._last_report = self.started
+
+    @property
+    def done(self):
+        return sum(self.outcomes.values())
+
+    def record(self, outcomes):
+        self.outcomes.update(outcomes)
+        if time.monotonic() - self._last_report >= PROGRESS_INTERVAL:
+            self.report()
+
+    def report(self, final=False):
+        self._last_report = time.monotonic()
+        elapsed = self._last_report - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate else None
+        stages = {stage: f"p50 {s['p50']:.0f} / p95 {s['p95']:.0f}" for stage, s in daily_timings.stats().items()}
+        waits = {name: limiter.stats()["waited_s"] for name, limiter in limiters.items()}
+        eta_text = f", ETA {timedelta(seconds=round(eta))}" if eta is not None and not final else ""
+        logging.info(f"{'Run finished' if final else 'Progress'}: {self.done}/{self.total} users in {elapsed:.0f}s "
+                     f"({rate * 60:.1f} users/min{eta_text}), outcomes {dict(self.outcomes)}")
+        logging.info(f"  Stage latency (ms): {stages}")
+        logging.info(f"  Rate limiter waits (s): {waits}")
+
+
+def select_eligible_users(now=None, user_ids=None):
     """
-    Checks weather for all users with daily emails enabled.
-    If conditions are 'XC Perfect', sends an email.
+    Users with daily emails on, a saved location and no automatic report within
+    REPORT_INTERVAL, in one query: latest report per user (grouped subquery) joined to User.
+    `user_ids` narrows it to those users (e.g. the scheduler's due slot).
     """
-    logging.info("Starting Daily Interpreter Cycle...")
-    
-    with app.app_context():
-        # 1. Get Users with Daily Email Enabled
-        users = User.query.filter_by(daily_email_enabled=True).all()
-        logging.info(f"Found {len(users)} users with daily emails enabled.")
-        
-        for user in users:
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - REPORT_INTERVAL).replace(tzinfo=None)  # activity timestamps are naive UTC
+    last_report = (db.session.query(UserActivity.user_id, db.func.max(UserActivity.timestamp).label('last_sent'))
+                   .filter(UserActivity.action == REPORT_ACTION)
+                   .group_by(UserActivity.user_id)
+                   .subquery())
+    query = (User.query
+             .outerjoin(last_report, last_report.c.user_id == User.id)
+             .filter(User.daily_email_enabled.is_(True),
+                     User.xc_perfect_lat.isnot(None),
+                     User.xc_perfect_lon.isnot(None),
+                     db.or_(last_report.c.last_sent.is_(None), last_report.c.last_sent < cutoff)))
+    if user_ids is not None:
+        query = query.filter(User.id.in_(list(user_ids)))
+    return query.order_by(User.id).all()
+
+
+def _utcnow():
+    # Naive UTC, compared in SQL against the stored timestamps
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_or_create_run(run_id):
+    run = db.session.get(DailyRun, run_id)
+    if run is None:
+        try:
+            db.session.add(DailyRun(id=run_id, status='running', created_at=_utcnow()))
+            db.session.commit()
+        except IntegrityError:
+            # Another runner created it first
+            db.session.rollback()
+        run = db.session.get(DailyRun, run_id)
+    return run
+
+
+def claim_jobs(run_id, jobs):
+    """
+    Claims users for this runner. A user is claimable when the run has no record for them yet,
+    when their last attempt failed and its backoff has passed, or when a runner that claimed
+    them went quiet for CLAIM_TIMEOUT. Claims are an insert against a unique (run, user)
+    constraint or a conditional UPDATE, so two hosts never get the same user.
+    """
+    now = _utcnow()
+    existing = {}
+    ids = [job["id"] for job in jobs]
+    for start in range(0, len(ids), 500):
+        rows = DailyRunOutcome.query.filter(DailyRunOutcome.run_id == run_id,
+                                            DailyRunOutcome.user_id.in_(ids[start:start + 500])).all()
+        existing.update({row.user_id: row.id for row in rows})
+
+    reclaimable = db.or_(
+        db.and_(DailyRunOutcome.status == 'failed', DailyRunOutcome.attempts < MAX_ATTEMPTS,
+                DailyRunOutcome.next_attempt_at <= now),
+        db.and_(DailyRunOutcome.status == 'claimed', DailyRunOutcome.claimed_at < now - CLAIM_TIMEOUT),
+    )
+    claimed = []
+    for job in jobs:
+        row_id = existing.get(job["id"])
+        if row_id is None:
+            db.session.add(DailyRunOutcome(run_id=run_id, user_id=job["id"], status='claimed', attempts=0,
+                                           claimed_by=RUN_OWNER, claimed_at=now, updated_at=now))
             try:
-                # 2. Context Retrieval & Validation
-                if not (user.xc_perfect_lat and user.xc_perfect_lon):
-                    logging.warning(f"User {user.username} (ID: {user.id}) has daily emails on but no location set. Skipping.")
-                    continue
-                
-                # Check Rate Limiting (UserActivity)
-                # Ensure we haven't sent an automatic report in the last 20 hours
-                last_report = UserActivity.query.filter_by(
-                    user_id=user.id, 
-                    action='automatic_daily_report'
-                ).order_by(UserActivity.timestamp.desc()).first()
-                
-                if last_report:
-                    time_since = datetime.now(timezone.utc) - last_report.timestamp.replace(tzinfo=timezone.utc)
-                    if time_since < timedelta(hours=20):
-                        logging.info(f"User {user.username} already received a report {time_since} ago. Skipping.")
-                        continue
-
-                logging.info(f"Processing User: {user.username} (Lat: {user.xc_perfect_lat}, Lon: {user.xc_perfect_lon})")
-
-                # 3. Weather Evaluation & AI Analysis
-                # We specifically request 'xcperfect' style and the user's preferred language
-                interpretation = get_ai_interpretation(
-                    lat=user.xc_perfect_lat,
-                    lon=user.xc_perfect_lon,
-                    asl=user.xc_perfect_asl or 0,
-                    req_style='xcperfect',
-                    req_language=user.ai_language,
-                    req_units=user.unit_system
-                )
-
-                # 4. Smart Filtering
-                # Check for "✅ XC STATUS: GO!"
-                if interpretation and interpretation.strip().startswith("✅ XC STATUS: GO!"):
-                    logging.info(f"  -> MATCH: XC Perfect conditions detected for {user.username}!")
-                    
-                    # 5. Delivery
-                    sent = send_brevo_email(
-                        email_to=user.email,
-                        lat=user.xc_perfect_lat,
-                        lon=user.xc_perfect_lon,
-                        asl=user.xc_perfect_asl or 0,
-                        interpretation_text=interpretation
-                    )
-                    
-                    if sent:
-                        logging.info(f"     -> Email sent successfully to {user.email}")
-                        
-                        # 6. Logging / Rate Limiting Update
-                        activity = UserActivity(
-                            user_id=user.id,
-                            action='automatic_daily_report',
-                            details=f"Sent XC Perfect report for {user.xc_perfect_lat}, {user.xc_perfect_lon}",
-                            ip_address="127.0.0.1" # Internal script
-                        )
-                        db.session.add(activity)
-                        db.session.commit()
-                    else:
-                        logging.error(f"     -> Failed to send email to {user.email}")
-                else:
-                    logging.info(f"  -> No Match: Conditions not ideal ('{interpretation[:30]}...').")
-                
-                # Sleep briefly to be nice to APIs
-                time.sleep(2)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                continue
+        else:
+            updated = (DailyRunOutcome.query.filter(DailyRunOutcome.id == row_id, reclaimable)
+                       .update({"status": 'claimed', "claimed_by": RUN_OWNER, "claimed_at": now, "updated_at": now},
+                               synchronize_session=False))
+            db.session.commit()
+            if updated != 1:
+                continue
+        claimed.append(job)
+    return claimed
+
+
+def _checkpoint(run_id, job, outcome, decided, detail=None, activity=None):
+    """Stores one user's outcome (and the report activity, in the same commit)."""
+    row = DailyRunOutcome.query.filter_by(run_id=run_id, user_id=job["id"]).one()
+    now = _utcnow()
+    row.attempts += 1
+    row.outcome = outcome
+    row.detail = (detail or '')[:500] or None
+    row.updated_at = now
+    if outcome in RETRY_OUTCOMES:
+        row.status = 'failed'
+        row.next_attempt_at = now + timedelta(seconds=RETRY_BACKOFF * 2 ** (row.attempts - 1))
+    else:
+        row.status = 'done'
+        row.next_attempt_at = None
+    if activity is not None:
+        db.session.add(activity)
+    db.session.commit()
+    decided[job["id"]] = outcome
+
+
+def _mark_sending(run_id, job, decided):
+    # Committed before the email goes out: a runner that dies mid-send leaves 'sending', which is
+    # never reclaimed, so a user may miss a report but never gets it twice. Counted as decided
+    # from here on, so an error after the send can't turn it into a retryable 'error' either.
+    DailyRunOutcome.query.filter_by(run_id=run_id, user_id=job["id"]).update(
+        {"status": 'sending', "updated_at": _utcnow()}, synchronize_session=False)
+    db.session.commit()
+    decided[job["id"]] = 'sending'
+
+
+def seconds_until_next_retry(run_id, user_ids=None):
+    """Seconds until the next failed user of the run (among `user_ids`) may be retried, or None if none will be."""
+    query = (db.session.query(db.func.min(DailyRunOutcome.next_attempt_at))
+             .filter(DailyRunOutcome.run_id == run_id, DailyRunOutcome.status == 'failed',
+                     DailyRunOutcome.attempts < MAX_ATTEMPTS))
+    if user_ids is not None:
+        query = query.filter(DailyRunOutcome.user_id.in_(list(user_ids)))
+    next_at = query.scalar()
+    if next_at is None:
+        return None
+    return max((next_at - _utcnow()).total_seconds(), 0.0)
+
+
+def finish_run(run_id, partial=False):
+    """
+    Logs the run's outcome totals; marks it done once nobody is claimed or waiting for a retry.
+    A `partial` invocation (one shard or time slice of the run's users) never marks it done, since
+    other slices may still be due; close_past_runs does that once the date is over.
+    Users stuck in 'sending' (runner died during delivery) are reported for a manual check.
+    """
+    counts = dict(db.session.query(DailyRunOutcome.outcome, db.func.count(DailyRunOutcome.id))
+                  .filter(DailyRunOutcome.run_id == run_id).group_by(DailyRunOutcome.outcome).all())
+    open_rows = DailyRunOutcome.query.filter(
+        DailyRunOutcome.run_id == run_id,
+        db.or_(DailyRunOutcome.status == 'claimed',
+               db.and_(DailyRunOutcome.status == 'failed', DailyRunOutcome.attempts < MAX_ATTEMPTS))
+    ).count()
+    unknown = DailyRunOutcome.query.filter(DailyRunOutcome.run_id == run_id, DailyRunOutcome.status == 'sending',
+                                           DailyRunOutcome.updated_at < _utcnow() - CLAIM_TIMEOUT).count()
+    if unknown:
+        logging.warning(f"Run {run_id}: {unknown} user(s) were being emailed when their runner stopped; "
+                        f"not retried to avoid duplicates.")
+    run = db.session.get(DailyRun, run_id)
+    run.updated_at = _utcnow()
+    if open_rows == 0 and not partial:
+        run.status = 'done'
+        run.finished_at = run.updated_at
+    db.session.commit()
+    logging.info(f"Run {run_id} totals: {counts} ({open_rows} user(s) still open, status {run.status})")
+    return open_rows
+
+
+def close_past_runs(now=None):
+    """
+    Marks runs whose local date ended everywhere RUN_CLOSE_AFTER ago as done. Nothing picks
+    their users up again, so anyone still open is logged as abandoned.
+    """
+    cutoff = ((now or datetime.now(timezone.utc)) - RUN_CLOSE_AFTER).date().isoformat()
+    for run in DailyRun.query.filter(DailyRun.status == 'running', DailyRun.id < cutoff).all():
+        open_rows = finish_run(run.id)
+        if run.status != 'done':
+            logging.warning(f"Run {run.id}: closing with {open_rows} user(s) never finished.")
+            run.status = 'done'
+            run.finished_at = _utcnow()
+            db.session.commit()
+
+
+def _user_job(user):
+    # Plain values, so worker threads never touch the main thread's ORM objects
+    return {
+        "id": user.id, "username": user.username, "email": user.email,
+        "lat": user.xc_perfect_lat, "lon": user.xc_perfect_lon, "asl": user.xc_perfect_asl or 0,
+        "language": user.ai_language, "units": user.unit_system,
+    }
 
+
+def group_jobs(jobs):
+    """
+    Groups users that would get the same interpretation: grid cell, ASL bucket, language,
+    units and style (the interpretation cache key). Each group needs one model call.
+    """
+    groups = {}
+    for job in jobs:
+        key, _ = interpretation_cache_key(job["lat"], job["lon"], job["asl"],
+                                          *resolve_ai_preferences(job["language"], DAILY_STYLE, job["units"]))
+        group = groups.get(key)
+        if group is None:
+            # The first member's location stands for the group: same forecast cell and meteogram
+            group = groups[key] = {"key": key, "lat": job["lat"], "lon": job["lon"], "asl": job["asl"],
+                                   "language": job["language"], "units": job["units"], "members": []}
+        group["members"].append(job)
+    return list(groups.values())
+
+
+def warm_forecasts(groups):
+    """Fetches every group's forecast in batched requests, paced by the Open-Meteo limiter."""
+    points = [(group["lat"], group["lon"]) for group in groups]
+    cubes = []
+    for start in range(0, len(points), OPENMETEO_BATCH_SIZE):
+        limiters['openmeteo'].acquire()
+        with daily_timings.stage('forecast_batch'):
+            cubes.extend(get_openmeteo_data_batch(points[start:start + OPENMETEO_BATCH_SIZE]))
+    return cubes
+
+
+def process_group(run_id, group, cube):
+    """Runs one group's check end to end and checkpoints every member. Returns a Counter of their outcomes."""
+    started = time.perf_counter()
+    members = group["members"]
+    decided = {}  # user id -> outcome, once checkpointed
+    try:
+        with app.app_context():
+            try:
+                _process_group(run_id, group, cube, decided)
             except Exception as e:
-                logging.error(f"Error processing user {user.username}: {e}", exc_info=True)
-                # Continue to next user even if one fails
-                continue
-                
+                logging.error(f"Error processing group {group['key']} ({len(members)} users): {e}", exc_info=True)
+                db.session.rollback()
+                for job in members:
+                    if job["id"] not in decided:
+                        _checkpoint(run_id, job, 'error', decided, detail=str(e) or e.__class__.__name__)
+    except Exception as e:
+        # Couldn't even checkpoint; the claims expire after CLAIM_TIMEOUT and get picked up again
+        logging.error(f"Could not checkpoint group {group['key']}: {e}", exc_info=True)
+    finally:
+        daily_timings.record('group_total', (time.perf_counter() - started) * 1000)
+    return Counter(decided.get(job["id"], 'error') for job in members)
+
+
+def _process_group(run_id, group, cube, decided):
+    lat, lon, asl = group["lat"], group["lon"], group["asl"]
+    members = group["members"]
+    logging.info(f"Processing {len(members)} user(s) at {lat}, {lon} ({asl} m): "
+                 f"{', '.join(job['username'] for job in members)}")
+
+    if PRESCORE_ENABLED and cube is not None:
+        with daily_timings.stage('prescore'):
+            score = score_location(lat, lon, asl, cube=cube)
+        if score["verdict"] == NO_GO:
+            logging.info(f"  -> Local pre-score NO-GO for {score['day']}: {' '.join(score['reasons'])} Skipping AI call.")
+            for job in members:
+                _checkpoint(run_id, job, 'no_go', decided, detail=' '.join(score['reasons']))
+            return
+        logging.info(f"  -> Local pre-score {score['verdict']}; asking the model.")
+
+    prefs = dict(req_language=group["language"], req_style=DAILY_STYLE, req_units=group["units"])
+    # Someone may already have asked for this exact interpretation during this forecast run
+    # (including an earlier attempt of this run that failed at the email step)
+    interpretation = get_cached_interpretation(lat, lon, asl, **prefs)
+    if interpretation is None:
+        # The meteogram goes through its own limiter first (only when it's not already cached),
+        # so the interpretation below finds it ready
+        if shared_cache.get(METEOGRAM_NAMESPACE, meteogram_key(lat, lon, asl)) is None:
+            limiters['meteoblue'].acquire()
+        with daily_timings.stage('meteogram'):
+            get_meteogram_artifact(lat, lon, asl)
+
+        # 3. Weather Evaluation & AI Analysis: one call for the whole group
+        limiters['gemini'].acquire()
+        with daily_timings.stage('model'):
+            interpretation = get_ai_interpretation(lat=lat, lon=lon, asl=asl, **prefs)
+        store_interpretation(lat, lon, asl, interpretation, **prefs)
+
+    # 4. Smart Filtering
+    # Check for "✅ XC STATUS: GO!"
+    if not interpretation.strip().startswith("✅ XC STATUS: GO!"):
+        logging.info(f"  -> No Match: Conditions not ideal ('{interpretation[:30]}...').")
+        for job in members:
+            _checkpoint(run_id, job, 'no_match', decided, detail=interpretation[:100])
+        return
+
+    logging.info(f"  -> MATCH: XC Perfect conditions detected for {len(members)} user(s)!")
+
+    # 5. Delivery, to every member
+    for job in members:
+        limiters['brevo'].acquire()
+        _mark_sending(run_id, job, decided)
+        with daily_timings.stage('email'):
+            sent, message = send_brevo_email(
+                email_to=job["email"],
+                lat=job["lat"],
+                lon=job["lon"],
+                asl=job["asl"],
+                interpretation_text=interpretation
+            )
+
+        if not sent:
+            logging.error(f"     -> Failed to send email to {job['email']}: {message}")
+            _checkpoint(run_id, job, 'send_failed', decided, detail=message)
+            continue
+
+        logging.info(f"     -> Email sent successfully to {job['email']}")
+
+        # 6. Logging / Rate Limiting Update, committed together with the checkpoint
+        activity = UserActivity(
+            user_id=job["id"],
+            action=REPORT_ACTION,
+            details=f"Sent XC Perfect report for {job['lat']}, {job['lon']}",
+            ip_address="127.0.0.1" # Internal script
+        )
+        _checkpoint(run_id, job, 'sent', decided, activity=activity)
+
+
+def run_daily_interpreter(run_id, user_ids=None, retry_max_wait=RETRY_MAX_WAIT):
+    """
+    Checks weather for all users with daily emails enabled (or just `user_ids`).
+    If conditions are 'XC Perfect', sends an email.
+
+    Runs are keyed by `run_id`, the users' local date (see run_local_dates); invoking it
+    again, or on another host, resumes the same run: decided users are skipped and failed
+    ones are retried with exponential backoff, up to DAILY_MAX_ATTEMPTS. Retries due within
+    `retry_max_wait` seconds are waited for here; later ones are left to the next call.
+    With `user_ids` this is one slice of the run, so it only retries those users and leaves
+    the run open.
+    """
+    logging.info(f"Starting Daily Interpreter Cycle (run {run_id}, runner {RUN_OWNER})...")
+
+    with app.app_context():
+        get_or_create_run(run_id)
+
+    retrying = False
+    while True:
+        with app.app_context():
+            # 1-2. Opted-in users with a location and no automatic report in the last 20 hours
+            selection_started = time.perf_counter()
+            eligible_users = select_eligible_users(user_ids=user_ids)
+            jobs = claim_jobs(run_id, [_user_job(user) for user in eligible_users])
+            logging.info(f"Selected {len(eligible_users)} eligible users and claimed {len(jobs)} in "
+                         f"{(time.perf_counter() - selection_started) * 1000:.0f} ms.")
+
+            # Users sharing a site, language and units share one interpretation
+            groups = group_jobs(jobs)
+
+            # Warm the forecast cache for every group in batched upstream requests,
+            # so the interpretations below read Open-Meteo data from memory.
+            cubes = warm_forecasts(groups) if groups else []
+
+        # 3-6. Evaluate and deliver, DAILY_WORKERS groups at a time
+        if jobs:
+            progress = RunProgress(len(jobs))
+            logging.info(f"Processing {len(jobs)} users in {len(groups)} site groups with {DAILY_WORKERS} workers.")
+            with ThreadPoolExecutor(max_workers=DAILY_WORKERS, thread_name_prefix='daily') as executor:
+                futures = [executor.submit(process_group, run_id, group, cube) for group, cube in zip(groups, cubes)]
+                for future in as_completed(futures):
+                    progress.record(future.result())
+            progress.report(final=True)
+
+        with app.app_context():
+            wait = seconds_until_next_retry(run_id, user_ids)
+        if wait is None:
+            break
+        if not jobs and (retrying or wait == 0):
+            # Due failures we can't claim: another runner holds them or the user is no longer eligible
+            logging.info("No failed users could be claimed for a retry; leaving them to the next invocation.")
+            break
+        if wait > retry_max_wait:
+            logging.info(f"Next retry is due in {wait:.0f}s; leaving it to the next invocation.")
+            break
+        logging.info(f"Retrying failed users in {wait:.0f}s.")
+        time.sleep(wait)
+        retrying = True
+
+    with app.app_context():
+        finish_run(run_id, partial=user_ids is not None)
     logging.info("Daily Interpreter Cycle Completed.")
 
+
+def run_local_dates(now=None, retry_max_wait=RETRY_MAX_WAIT):
+    """
+    Cron entry point: every eligible user now, as one run per local date, so a report
+    lands in the same run the scheduler would use for that user's day.
+    """
+    now = now or datetime.now(timezone.utc)
+    by_date = defaultdict(list)
+    with app.app_context():
+        for user in select_eligible_users(now):
+            by_date[local_date(user.xc_perfect_lat, user.xc_perfect_lon, now).isoformat()].append(user.id)
+    for run_id, user_ids in sorted(by_date.items()):
+        run_daily_interpreter(run_id, user_ids=user_ids, retry_max_wait=retry_max_wait)
+    with app.app_context():
+        close_past_runs(now)
+
+
 if __name__ == "__main__":
-    run_daily_interpreter()
+    parser = argparse.ArgumentParser(description="Send 'XC Perfect' daily reports.")
+    parser.add_argument("--run-id", help="Resume one run, i.e. a local date YYYY-MM-DD, for every user "
+                                         "(default: everyone, grouped by their current local date).")
+    args = parser.parse_args()
+    if args.run_id:
+        run_daily_interpreter(args.run_id)
+    else:
+        run_local_dates()
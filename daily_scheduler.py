@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import zlib
+import logging
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app import app, db, User, DailyRunOutcome
+from daily_interpreter import run_daily_interpreter, close_past_runs, MAX_ATTEMPTS
+from local_time import local_zone
+
+# Each user's report goes out in their local morning: SEND_LOCAL_TIME plus a per-user offset
+# within SEND_WINDOW_MINUTES, so a busy timezone is spread out instead of firing at once
+SEND_LOCAL_TIME = os.environ.get('DAILY_SEND_LOCAL_TIME', '06:00')
+SEND_WINDOW_MINUTES = int(os.environ.get('DAILY_SEND_WINDOW_MINUTES', 120))
+SLOT_MINUTES = int(os.environ.get('DAILY_SLOT_MINUTES', 15))
+CATCH_UP = timedelta(minutes=int(os.environ.get('DAILY_CATCH_UP_MINUTES', 180)))  # sends missed while down
+TICK_SECONDS = int(os.environ.get('DAILY_SCHEDULER_TICK', 60))
+USER_REFRESH_SECONDS = int(os.environ.get('DAILY_SCHEDULER_USER_REFRESH', 600))
+
+# Scheduler nodes split the users by a stable hash of the user id
+SHARDS = int(os.environ.get('SCHEDULER_SHARDS', 1))
+SHARD = int(os.environ.get('SCHEDULER_SHARD', 0))
+
+
+def _stable_hash(text):
+    # Same value on every host and interpreter run (unlike hash())
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def user_shard(user_id, shards=SHARDS):
+    return _stable_hash(f"shard:{user_id}") % shards
+
+
+def window_offset(user_id):
+    """The user's fixed position inside the send window."""
+    return timedelta(minutes=_stable_hash(f"slot:{user_id}") % max(SEND_WINDOW_MINUTES, 1))
+
+
+def send_time(user_id, lat, lon, local_date):
+    """UTC send time of a user's report for their `local_date`."""
+    hour, minute = (int(part) for part in SEND_LOCAL_TIME.split(':'))
+    local = datetime(local_date.year, local_date.month, local_date.day, hour, minute, tzinfo=local_zone(lat, lon))
+    return (local + window_offset(user_id)).astimezone(timezone.utc)
+
+
+def plan(users, start, end):
+    """
+    Sends that fall in (start, end], as (send_at, user_id, run_id) sorted by time.
+    The run id is the user's local date, so each local day is one resumable run.
+    """
+    sends = []
+    for user_id, lat, lon in users:
+        zone = local_zone(lat, lon)
+        day = start.astimezone(zone).date() - timedelta(days=1)
+        last_day = end.astimezone(zone).date()
+        while day <= last_day:
+            send_at = send_time(user_id, lat, lon, day)
+            if start < send_at <= end:
+                sends.append((send_at, user_id, day.isoformat()))
+            day += timedelta(days=1)
+    sends.sort()
+    return sends
+
+
+def load_users(shard=SHARD, shards=SHARDS):
+    """(id, lat, lon) of daily subscribers with a location that belong to this shard."""
+    rows = (db.session.query(User.id, User.xc_perfect_lat, User.xc_perfect_lon)
+            .filter(User.daily_email_enabled.is_(True), User.xc_perfect_lat.isnot(None),
+                    User.xc_perfect_lon.isnot(None))
+            .all())
+    return [(user_id, lat, lon) for user_id, lat, lon in rows if user_shard(user_id, shards) == shard]
+
+
+def slot_of(moment):
+    return moment.replace(minute=moment.minute - moment.minute % SLOT_MINUTES, second=0, microsecond=0)
+
+
+class DailyScheduler:
+    """
+    In-process scheduler for this shard: every tick, runs the daily interpreter for the
+    users whose local send time has come (looking back CATCH_UP for sends missed while
+    down). Checkpoints make repeats harmless; `_handled` just keeps ticks from re-asking
+    about users this process already decided. Failed users are picked up again once
+    their retry backoff has passed.
+    """
+
+    def __init__(self, shard=SHARD, shards=SHARDS):
+        self.shard = shard
+        self.shards = shards
+        self._users = []
+        self._users_loaded = 0.0
+        self._handled = set()  # (run_id, user_id)
+
+    def users(self):
+        if time.monotonic() - self._users_loaded > USER_REFRESH_SECONDS or not self._users_loaded:
+            with app.app_context():
+                self._users = load_users(self.shard, self.shards)
+            self._users_loaded = time.monotonic()
+            logging.info(f"Scheduler shard {self.shard}/{self.shards}: {len(self._users)} subscribers")
+        return self._users
+
+    def tick(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        due = defaultdict(list)
+        for _, user_id, run_id in plan(self.users(), now - CATCH_UP, now):
+            if (run_id, user_id) not in self._handled:
+                due[run_id].append(user_id)
+
+        for run_id, user_ids in sorted(due.items()):
+            logging.info(f"Scheduler: {len(user_ids)} user(s) due for run {run_id}")
+            run_daily_interpreter(run_id, user_ids=user_ids, retry_max_wait=0)
+            self._handled.update((run_id, user_id) for user_id in user_ids)
+            with app.app_context():
+                retry = {row.user_id for row in DailyRunOutcome.query.filter(
+                    DailyRunOutcome.run_id == run_id, DailyRunOutcome.user_id.in_(user_ids),
+                    DailyRunOutcome.status == 'failed', DailyRunOutcome.attempts < MAX_ATTEMPTS)}
+            self._handled.difference_update((run_id, user_id) for user_id in retry)
+
+        # Local dates older than the catch-up window can't come round again
+        oldest = (now - CATCH_UP - timedelta(days=2)).date().isoformat()
+        self._handled = {entry for entry in self._handled if entry[0] >= oldest}
+        with app.app_context():
+            close_past_runs(now)
+
+    def run_forever(self):
+        logging.info(f"Daily scheduler started (shard {self.shard}/{self.shards}, local send window "
+                     f"{SEND_LOCAL_TIME} + {SEND_WINDOW_MINUTES} min)")
+        while True:
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Scheduler tick failed: {e}", exc_info=True)
+            time.sleep(max(TICK_SECONDS - (time.monotonic() - started), 1))
+
+
+def print_schedule(sends, limit):
+    for send_at, user_id, run_id in sends[:limit]:
+        print(f"{send_at:%Y-%m-%d %H:%M} UTC  user {user_id:>7}  run {run_id}")
+    if len(sends) > limit:
+        print(f"... {len(sends) - limit} more")
+    print(f"{len(sends)} send(s)")
+
+
+def print_load(per_shard):
+    """Sends per SLOT_MINUTES slot, one column per shard."""
+    slots = sorted({slot for counts in per_shard.values() for slot in counts})
+    shards = sorted(per_shard)
+    print("slot (UTC)        " + "".join(f"{f'shard {s}':>10}" for s in shards) + f"{'total':>10}")
+    for slot in slots:
+        counts = [per_shard[s].get(slot, 0) for s in shards]
+        print(f"{slot:%Y-%m-%d %H:%M}  " + "".join(f"{c:>10}" for c in counts) + f"{sum(counts):>10}")
+    totals = [sum(per_shard[s].values()) for s in shards]
+    peak = max((sum(per_shard[s].get(slot, 0) for s in shards) for slot in slots), default=0)
+    print(f"{'total':<18}" + "".join(f"{t:>10}" for t in totals) + f"{sum(totals):>10}")
+    print(f"peak slot: {peak} send(s) per {SLOT_MINUTES} min")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timezone-aware scheduler for the daily XC reports.")
+    parser.add_argument("command", choices=["run", "schedule", "load"],
+                        help="run: keep sending as users come due; schedule: list upcoming sends; "
+                             "load: sends per slot")
+    parser.add_argument("--shard", type=int, default=SHARD, help="This node's shard (default SCHEDULER_SHARD).")
+    parser.add_argument("--shards", type=int, default=SHARDS, help="Number of shards (default SCHEDULER_SHARDS).")
+    parser.add_argument("--hours", type=float, default=24, help="How far ahead to look (schedule/load).")
+    parser.add_argument("--limit", type=int, default=50, help="Max sends to list (schedule).")
+    parser.add_argument("--all-shards", action="store_true", help="Show every shard (load).")
+    args = parser.parse_args()
+
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+
+    if args.command == "run":
+        DailyScheduler(args.shard, args.shards).run_forever()
+        sys.exit(0)
+
+    now = datetime.now(timezone.utc)
+    end = now + timedelta(hours=args.hours)
+    with app.app_context():
+        if args.command == "schedule":
+            print_schedule(plan(load_users(args.shard, args.shards), now, end), args.limit)
+        else:
+            shards = range(args.shards) if args.all_shards else [args.shard]
+            print_load({shard: Counter(slot_of(send_at) for send_at, _, _ in
+                                       plan(load_users(shard, args.shards), now, end))
+                        for shard in shards})
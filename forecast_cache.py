@@ -0,0 +1,139 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def grid_cell(lat, lon, resolution=0.1):
+    """Snaps a coordinate to the centre of the grid cell it falls into."""
+    lat_cell = round(round(float(lat) / resolution) * resolution, 4)
+    lon_cell = round(round(float(lon) / resolution) * resolution, 4)
+    return lat_cell, lon_cell
+
+
+def current_run_hour(now=None):
+    """UTC hour bucket used as the model run identifier (Open-Meteo refreshes at most hourly)."""
+    now = time.time() if now is None else now
+    return int(now // 3600)
+
+
+def estimate_nbytes(value):
+    """Approximate in-memory size of a cached forecast."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return 1024
+
+
+class ForecastCache:
+    """
+    In-memory LRU of decoded forecasts keyed by grid cell, with stale-while-revalidate.
+
+    An entry is fresh during the model run hour it was fetched in. After that it is
+    stale but still served for `grace_seconds`, while the caller refreshes it in the
+    background; past the grace window it counts as a miss. Bounded by total bytes
+    rather than entry count. Values are shared between callers, so they must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, resolution=0.1, grace_seconds=3600):
+        self.max_bytes = max_bytes
+        self.resolution = resolution
+        self.grace_seconds = grace_seconds
+        self._entries = OrderedDict()  # key -> (value, nbytes, stored_at, run_hour)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._refreshes = 0
+
+    def key_for(self, lat, lon):
+        return grid_cell(lat, lon, self.resolution)
+
+    def lookup(self, key):
+        """Returns (value, age_seconds, is_fresh), or None on a miss or once past the grace window."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, nbytes, stored_at, run_hour = entry
+            age = now - stored_at
+            if run_hour == current_run_hour(now):
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value, age, True
+            if now <= (run_hour + 1) * 3600 + self.grace_seconds:
+                self._entries.move_to_end(key)
+                self._stale_hits += 1
+                return value, age, False
+            del self._entries[key]
+            self._bytes -= nbytes
+            self._misses += 1
+            return None
+
+    def get(self, key):
+        """Fresh value only (no stale serving)."""
+        hit = self.lookup(key)
+        if hit is None or not hit[2]:
+            return None
+        return hit[0]
+
+    def put(self, key, value, stored_at=None):
+        """Stores a forecast; pass `stored_at` when it was fetched earlier (e.g. by another worker)."""
+        nbytes = estimate_nbytes(value)
+        if nbytes > self.max_bytes:
+            logging.warning(f"Forecast for {key} ({nbytes} bytes) exceeds cache bound; not cached.")
+            return
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes, stored_at, current_run_hour(stored_at))
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+                self._evictions += 1
+
+    def begin_refresh(self, keys):
+        """Claims keys for a background refresh; returns the ones nobody else is refreshing."""
+        with self._lock:
+            claimed = [key for key in keys if key not in self._refreshing]
+            self._refreshing.update(claimed)
+            self._refreshes += len(claimed)
+            return claimed
+
+    def end_refresh(self, keys):
+        with self._lock:
+            self._refreshing.difference_update(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "background_refreshes": self._refreshes,
+                "refreshing": len(self._refreshing),
+                "resolution_deg": self.resolution,
+                "grace_seconds": self.grace_seconds,
+            }
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+
+class ForecastCube:
+    """
+    Compact, array-backed hourly forecast for one location.
+
+    `values` is a read-only float32 matrix of shape (n_variables, n_hours), so each
+    variable is a contiguous row; `times` holds the UTC epoch seconds of every hour.
+    Cubes are cheap to cache, pickle and share; build a DataFrame only when a
+    consumer really needs one (`to_dataframe`).
+    """
+
+    __slots__ = ('times', 'values', 'variables', 'latitude', 'longitude', 'elevation',
+                 'utc_offset_seconds', '_index')
+
+    def __init__(self, times, values, variables, latitude=None, longitude=None, elevation=None,
+                 utc_offset_seconds=0):
+        self.times = np.ascontiguousarray(times, dtype=np.int64)
+        self.values = np.ascontiguousarray(values, dtype=np.float32)
+        self.variables = tuple(variables)
+        if self.values.shape != (len(self.variables), len(self.times)):
+            raise ValueError(f"values shape {self.values.shape} does not match "
+                             f"{len(self.variables)} variables x {len(self.times)} hours")
+        self.values.flags.writeable = False
+        self.times.flags.writeable = False
+        self.latitude = latitude
+        self.longitude = longitude
+        self.elevation = elevation
+        self.utc_offset_seconds = utc_offset_seconds
+        self._index = {name: i for i, name in enumerate(self.variables)}
+
+    @classmethod
+    def from_response(cls, response, variables):
+        """Decodes an Open-Meteo FlatBuffers WeatherApiResponse straight into a cube."""
+        hourly = response.Hourly()
+        times = np.arange(hourly.Time(), hourly.TimeEnd(), hourly.Interval(), dtype=np.int64)
+        values = np.empty((len(variables), len(times)), dtype=np.float32)
+        for i in range(len(variables)):
+            values[i] = hourly.Variables(i).ValuesAsNumpy()
+        return cls(times, values, variables,
+                   latitude=response.Latitude(), longitude=response.Longitude(),
+                   elevation=response.Elevation(), utc_offset_seconds=response.UtcOffsetSeconds())
+
+    # --- Pickling (slots + the derived index) ---
+    def __getstate__(self):
+        return (self.times, self.values, self.variables, self.latitude, self.longitude,
+                self.elevation, self.utc_offset_seconds)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    # --- Basic container protocol ---
+    def __len__(self):
+        return len(self.times)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        """Read-only view of one variable across all hours."""
+        return self.values[self._index[name]]
+
+    def get(self, name, default=None):
+        if name not in self._index:
+            return default
+        return self[name]
+
+    @property
+    def empty(self):
+        return len(self.times) == 0
+
+    @property
+    def nbytes(self):
+        return int(self.values.nbytes + self.times.nbytes)
+
+    # --- Slicing ---
+    def _slice(self, selector):
+        return ForecastCube(self.times[selector], self.values[:, selector], self.variables,
+                            latitude=self.latitude, longitude=self.longitude,
+                            elevation=self.elevation, utc_offset_seconds=self.utc_offset_seconds)
+
+    def window(self, start=None, end=None):
+        """Hours with start <= time < end (UTC epoch seconds, or anything pd.Timestamp accepts)."""
+        lo = 0 if start is None else int(np.searchsorted(self.times, _to_epoch(start), side='left'))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, _to_epoch(end), side='left'))
+        return self._slice(slice(lo, hi))
+
+    def hour_of_day(self):
+        """UTC hour (0-23) of every time step."""
+        return (self.times // 3600) % 24
+
+    def day_index(self):
+        """UTC day number (days since epoch) of every time step."""
+        return self.times // 86400
+
+    def select(self, mask):
+        """Hours where a boolean mask (or index array) is set."""
+        return self._slice(np.asarray(mask))
+
+    def row(self, i):
+        """One hour as a plain dict of floats, keyed by variable name."""
+        return {name: float(self.values[j, i]) for j, name in enumerate(self.variables)}
+
+    # --- Conversion ---
+    def datetimes(self):
+        return pd.to_datetime(self.times, unit="s", utc=True)
+
+    def to_dataframe(self):
+        """Builds the legacy DataFrame layout (`date` column + one column per variable)."""
+        data = {"date": self.datetimes()}
+        for i, name in enumerate(self.variables):
+            data[name] = self.values[i].copy()
+        return pd.DataFrame(data=data)
+
+
+def _to_epoch(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, float):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp())
@@ -0,0 +1,180 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone, timedelta
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class JobQueue:
+    """
+    Persistent job queue backed by a database table, worked by a bounded thread pool.
+
+    Every web worker process runs `workers` threads. A job is claimed with a
+    conditional UPDATE (queued -> running), so each job runs exactly once no matter
+    how many processes poll the table. Handlers are registered per job type and
+    return the result text; if a handler raises, the job is marked failed and
+    `on_failure(job)` is called (e.g. to refund credits). Jobs left 'running' by a
+    crashed process are failed the same way once they exceed `stale_after`.
+    """
+
+    def __init__(self, app, db, model, workers=2, poll_interval=1.0, stale_after=600, stats_window=200):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.stats_window = stats_window
+        self.on_failure = None
+
+        self._handlers = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def register(self, job_type, handler):
+        self._handlers[job_type] = handler
+
+    def ensure_workers(self):
+        """Starts this process's workers (lazily, so scripts that import the app don't run jobs)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, job_type, user_id, payload, cost=0):
+        """Persists a new job and returns its id."""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        job = self.model(id=uuid.uuid4().hex, job_type=job_type, user_id=user_id, payload=payload,
+                         cost=cost, status='queued', created_at=_now())
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.ensure_workers()
+        self._wakeup.set()
+        return job.id
+
+    def _claim(self):
+        Job = self.model
+        while True:
+            candidate = (self.db.session.query(Job.id).filter(Job.status == 'queued')
+                         .order_by(Job.created_at).first())
+            if candidate is None:
+                return None
+            claimed = (Job.query.filter(Job.id == candidate.id, Job.status == 'queued')
+                       .update({"status": 'running', "started_at": _now()}, synchronize_session=False))
+            self.db.session.commit()
+            if claimed == 1:
+                return self.db.session.get(Job, candidate.id)
+            # Another worker got there first; try the next one
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = _now()
+        self.db.session.commit()
+
+    def _fail(self, job, error):
+        self.db.session.rollback()
+        self._finish(job, 'failed', error=error)
+        if self.on_failure is not None:
+            try:
+                self.on_failure(job)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                logging.error(f"Job {job.id} failure callback failed: {e}", exc_info=True)
+
+    def _fail_stale(self):
+        Job = self.model
+        cutoff = _now() - timedelta(seconds=self.stale_after)
+        for job in Job.query.filter(Job.status == 'running', Job.started_at < cutoff).all():
+            claimed = (Job.query.filter(Job.id == job.id, Job.status == 'running')
+                       .update({"status": 'failed'}, synchronize_session=False))
+            self.db.session.commit()
+            if claimed == 1:
+                logging.warning(f"Job {job.id} ({job.job_type}) was abandoned while running; marking failed.")
+                self.db.session.refresh(job)
+                self._fail(job, "Job was interrupted.")
+
+    def _worker(self):
+        last_stale_check = 0.0
+        while True:
+            try:
+                with self.app.app_context():
+                    if time.time() - last_stale_check > 60:
+                        last_stale_check = time.time()
+                        self._fail_stale()
+                    job = self._claim()
+                    if job is not None:
+                        self._run(job)
+                        continue
+            except Exception as e:
+                logging.error(f"Job worker error: {e}", exc_info=True)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _run(self, job):
+        handler = self._handlers.get(job.job_type)
+        if handler is None:
+            self._fail(job, f"No handler for job type '{job.job_type}'")
+            return
+        logging.info(f"Job {job.id} ({job.job_type}) started for User {job.user_id}")
+        try:
+            result = handler(job)
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.job_type}) failed: {e}", exc_info=True)
+            self._fail(job, str(e) or e.__class__.__name__)
+            return
+        self._finish(job, 'done', result=result)
+        logging.info(f"Job {job.id} ({job.job_type}) done")
+
+    def position(self, job):
+        """1-based place of a queued job among the queued jobs of its type."""
+        Job = self.model
+        return Job.query.filter(Job.job_type == job.job_type, Job.status == 'queued',
+                                Job.created_at <= job.created_at).count()
+
+    def stats(self):
+        """Queue depth, running count and recent wait/run times (ms) per job type, across all processes."""
+        Job = self.model
+        counts = (self.db.session.query(Job.job_type, Job.status, self.db.func.count(Job.id))
+                  .filter(Job.status.in_(('queued', 'running'))).group_by(Job.job_type, Job.status).all())
+
+        stats = {}
+        for job_type in self._handlers:
+            recent = (Job.query.filter(Job.job_type == job_type, Job.finished_at.isnot(None),
+                                       Job.started_at.isnot(None))
+                      .order_by(Job.finished_at.desc()).limit(self.stats_window).all())
+            stats[job_type] = {
+                "queued": 0,
+                "running": 0,
+                "recent_failed": sum(1 for job in recent if job.status == 'failed'),
+                "wait_ms": _percentiles([(job.started_at - job.created_at).total_seconds() * 1000 for job in recent]),
+                "run_ms": _percentiles([(job.finished_at - job.started_at).total_seconds() * 1000 for job in recent]),
+            }
+        for job_type, status, count in counts:
+            if job_type in stats:
+                stats[job_type][status] = count
+        return {"workers_per_process": self.workers, "types": stats}
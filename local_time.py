@@ -0,0 +1,30 @@
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from timezonefinder import TimezoneFinder
+
+_tz_finder = None
+
+
+@lru_cache(maxsize=4096)
+def _zone_for_cell(lat, lon):
+    global _tz_finder
+    if _tz_finder is None:
+        _tz_finder = TimezoneFinder()
+    name = _tz_finder.timezone_at(lng=lon, lat=lat)
+    if name:
+        return ZoneInfo(name)
+    # Outside every zone polygon (only happens near the poles): local solar time, to the hour
+    return timezone(timedelta(hours=max(-12, min(14, round(lon / 15)))))
+
+
+def local_zone(lat, lon):
+    """IANA timezone (DST-aware) of a location, cached per ~1 km cell."""
+    return _zone_for_cell(round(lat, 2), round(lon, 2))
+
+
+def local_date(lat, lon, now=None):
+    """The calendar date at a location; daily runs are keyed by it (as 'YYYY-MM-DD')."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(local_zone(lat, lon)).date()
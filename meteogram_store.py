@@ -0,0 +1,48 @@
+import io
+import base64
+
+from PIL import Image
+
+# Horizontal bands of the Meteoblue thermal meteogram, as fractions of its height:
+# surface, stability, clouds, wind. Sent to Gemini as separate images to prevent compression.
+SLICE_BOUNDS = (0.0, 0.25, 0.45, 0.75, 1.0)
+SLICE_MIME_TYPE = 'image/png'
+
+
+class MeteogramArtifact:
+    """
+    Everything any request path needs from one Meteoblue meteogram, prepared once.
+
+    - content / content_type: the image as served by Meteoblue (proxy endpoint)
+    - b64: base64 of the image (email attachment)
+    - slices: the four bands, each encoded as PNG (Gemini)
+    """
+
+    __slots__ = ('content', 'content_type', 'fetched_at', 'b64', 'slices')
+
+    def __init__(self, content, content_type, fetched_at, b64, slices):
+        self.content = content
+        self.content_type = content_type
+        self.fetched_at = fetched_at
+        self.b64 = b64
+        self.slices = slices
+
+    @classmethod
+    def build(cls, content, content_type, fetched_at):
+        """Decodes the image once, and crops and encodes the slices."""
+        image = Image.open(io.BytesIO(content))
+        image.load()
+        width, height = image.size
+
+        slices = []
+        for top, bottom in zip(SLICE_BOUNDS, SLICE_BOUNDS[1:]):
+            # Note: crop takes (left, upper, right, lower)
+            buffer = io.BytesIO()
+            image.crop((0, height * top, width, height * bottom)).save(buffer, 'PNG')
+            slices.append(buffer.getvalue())
+
+        return cls(content, content_type, fetched_at, base64.b64encode(content).decode('utf-8'), tuple(slices))
+
+    @property
+    def nbytes(self):
+        return len(self.content) + len(self.b64) + sum(len(s) for s in self.slices)
@@ -0,0 +1,194 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """The model endpoint is failing; calls are rejected without trying until the breaker resets."""
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class ModelGuard:
+    """
+    Deadline, optional hedging and a circuit breaker around a blocking model call.
+
+    `call(fn, ...)` runs fn on `executor` and waits at most `deadline` seconds. With
+    `hedge_percentile` set (e.g. 0.95), a second identical request is sent once the
+    first has been running longer than that percentile of recent successful calls;
+    whichever answers first wins. After `failure_threshold` consecutive failures the
+    breaker opens and calls raise CircuitOpenError immediately; after `reset_after`
+    seconds a single probe call is let through (half-open) and its outcome closes or
+    re-opens the breaker. `is_failure(exc)` decides which errors count against the
+    endpoint (e.g. not a rejected prompt).
+    """
+
+    def __init__(self, name, executor, deadline=60.0, hedge_percentile=None, hedge_min_samples=20,
+                 failure_threshold=5, reset_after=30.0, is_failure=None, samples=256):
+        self.name = name
+        self.executor = executor
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.is_failure = is_failure or (lambda exc: True)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=samples)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._counts = dict.fromkeys(("calls", "successes", "failures", "timeouts", "rejected",
+                                      "hedged", "hedge_wins", "opened"), 0)
+
+    # --- Breaker ---
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                return HALF_OPEN
+            return self._state
+
+    def is_open(self):
+        """True while calls would be rejected (open, or half-open with the probe already out)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_after:
+                return True
+            return self._probe_in_flight
+
+    def _admit(self):
+        """Reserves a slot for one call (the probe, if half-open) or raises CircuitOpenError."""
+        with self._lock:
+            self._counts["calls"] += 1
+            if self._state == CLOSED:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_after and not self._probe_in_flight:
+                self._state = HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            self._counts["rejected"] += 1
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open).")
+
+    def _on_success(self, latency_ms, probe):
+        with self._lock:
+            self._counts["successes"] += 1
+            self._latencies.append(latency_ms)
+            self._consecutive_failures = 0
+            if probe:
+                self._probe_in_flight = False
+            if self._state != CLOSED:
+                logging.info(f"{self.name}: circuit closed again")
+            self._state = CLOSED
+
+    def _on_error(self, exc, probe):
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+            if not self.is_failure(exc):
+                if probe:
+                    self._state = CLOSED
+                return
+            self._counts["failures"] += 1
+            if isinstance(exc, TimeoutError):
+                self._counts["timeouts"] += 1
+            self._consecutive_failures += 1
+            if probe or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._counts["opened"] += 1
+                logging.warning(f"{self.name}: circuit opened after {self._consecutive_failures} consecutive "
+                                f"failure(s); failing fast for {self.reset_after:g}s ({exc.__class__.__name__})")
+
+    # --- Calls ---
+    def hedge_after(self):
+        """Seconds after which a hedged request is sent, or None (disabled / not enough samples)."""
+        if not self.hedge_percentile:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return _percentile(ordered, self.hedge_percentile) / 1000
+
+    def call(self, fn, *args, **kwargs):
+        probe = self._admit()
+        started = time.monotonic()
+        deadline_at = started + self.deadline
+        try:
+            futures = [self.executor.submit(fn, *args, **kwargs)]
+            hedge_after = self.hedge_after()
+            if hedge_after is not None and hedge_after < self.deadline:
+                done, _ = wait(futures, timeout=hedge_after)
+                if not done:
+                    futures.append(self.executor.submit(fn, *args, **kwargs))
+                    with self._lock:
+                        self._counts["hedged"] += 1
+
+            pending, error = set(futures), None
+            while pending:
+                done, pending = wait(pending, timeout=max(deadline_at - time.monotonic(), 0),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    # Late calls keep running in the executor; their results are dropped
+                    raise TimeoutError(f"{self.name} did not answer within {self.deadline:g}s.")
+                for future in done:
+                    if future.exception() is None:
+                        if len(futures) > 1 and future is futures[1]:
+                            with self._lock:
+                                self._counts["hedge_wins"] += 1
+                        self._on_success((time.monotonic() - started) * 1000, probe)
+                        return future.result()
+                    error = future.exception()
+            raise error
+        except Exception as e:
+            self._on_error(e, probe)
+            raise
+
+    def stream(self, make_stream):
+        """
+        Breaker and deadline for a streaming call: yields from make_stream(). The deadline
+        is checked as chunks arrive, so a stalled connection still needs a transport timeout.
+        """
+        probe = self._admit()
+        started = time.monotonic()
+        try:
+            for item in make_stream():
+                if time.monotonic() - started > self.deadline:
+                    raise TimeoutError(f"{self.name} did not finish within {self.deadline:g}s.")
+                yield item
+        except GeneratorExit:
+            # Consumer went away (client disconnected): says nothing about the endpoint
+            with self._lock:
+                if probe:
+                    self._probe_in_flight = False
+            raise
+        except Exception as e:
+            self._on_error(e, probe)
+            raise
+        self._on_success((time.monotonic() - started) * 1000, probe)
+
+    def stats(self):
+        hedge_after = self.hedge_after()
+        state = self.state()
+        with self._lock:
+            ordered = sorted(self._latencies)
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._counts,
+                "deadline_s": self.deadline,
+                "hedge_after_ms": round(hedge_after * 1000, 1) if hedge_after is not None else None,
+                "latency_ms": {"p50": round(_percentile(ordered, 0.5), 1),
+                               "p95": round(_percentile(ordered, 0.95), 1)} if ordered else None,
+            }
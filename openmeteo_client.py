@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+import threading
+from datetime import timezone
+
+import openmeteo_requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+OPENMETEO_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Hourly variables requested for every forecast (order matters: the FlatBuffers
+# response returns them by index in the same order).
+HOURLY_VARIABLES = [
+    "temperature_2m", "relative_humidity_2m", "precipitation", "cloud_cover", "wind_speed_10m",
+    "wind_gusts_10m", "cape", "convective_inhibition", "surface_pressure",
+    "direct_normal_irradiance_instant", "soil_moisture_0_to_1cm",
+    "temperature_1000hPa", "temperature_950hPa", "temperature_900hPa", "temperature_850hPa",
+    "temperature_800hPa", "wind_speed_1000hPa", "wind_speed_950hPa", "wind_speed_900hPa",
+    "wind_speed_850hPa", "wind_speed_800hPa", "wind_direction_1000hPa", "wind_direction_950hPa",
+    "wind_direction_900hPa", "wind_direction_850hPa", "wind_direction_800hPa",
+    "geopotential_height_1000hPa", "geopotential_height_950hPa", "geopotential_height_900hPa",
+    "geopotential_height_850hPa", "geopotential_height_800hPa"
+]
+
+
+class OpenMeteoPool:
+    """
+    One long-lived Open-Meteo client per worker process.
+
+    The cached session, retry adapter and keep-alive connection pool are built
+    lazily on first use and shared by every thread in the process. If the
+    process forks (gunicorn with --preload), the child rebuilds its own pool
+    instead of sharing sockets with the parent.
+    """
+
+    def __init__(self, cache_name='.cache', expire_after=3600, pool_size=10,
+                 connect_timeout=5.0, read_timeout=20.0, retries=5, backoff_factor=0.2):
+        self.cache_name = cache_name
+        self.expire_after = expire_after
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._adapter = None
+        self._client = None
+
+        self._local = threading.local()  # fetch time of this thread's last response
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._http_cache_hits = 0
+        self._sessions_built = 0
+
+    def _build(self):
+        session = requests_cache.CachedSession(self.cache_name, expire_after=self.expire_after)
+        retry_strategy = Retry(total=self.retries, backoff_factor=self.backoff_factor,
+                               status_forcelist=[500, 502, 504])
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                              max_retries=retry_strategy)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.hooks['response'].append(self._on_response)
+
+        self._session = session
+        self._adapter = adapter
+        self._client = openmeteo_requests.Client(session=session)
+        self._pid = os.getpid()
+        self._sessions_built += 1
+        logging.info(f"Open-Meteo pool ready (pid={self._pid}, pool_size={self.pool_size}, timeout={self.timeout})")
+
+    def _get_client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._build()
+        return self._client
+
+    def _on_response(self, response, *args, **kwargs):
+        # Hooks run on the requesting thread: remember when the data was really fetched upstream
+        created_at = getattr(response, 'created_at', None)
+        if getattr(response, 'from_cache', False) and created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            self._local.fetched_at = min(created_at.timestamp(), time.time())
+            with self._stats_lock:
+                self._http_cache_hits += 1
+        else:
+            self._local.fetched_at = time.time()
+        return response
+
+    def weather_api(self, params, url=OPENMETEO_FORECAST_URL, force_refresh=False):
+        """Runs one forecast request through the shared client and returns the decoded responses."""
+        return self.fetch(params, url, force_refresh)[0]
+
+    def fetch(self, params, url=OPENMETEO_FORECAST_URL, force_refresh=False):
+        """
+        Like weather_api, but returns (responses, fetched_at): the epoch time the payload was
+        fetched upstream, which is older than now when it came from the HTTP cache.
+        `force_refresh` skips the HTTP cache (background refreshes need the new model run).
+        """
+        client = self._get_client()
+        with self._stats_lock:
+            self._requests += 1
+        self._local.fetched_at = None
+        kwargs = {"force_refresh": True} if force_refresh else {}
+        try:
+            responses = client.weather_api(url, params=params, timeout=self.timeout, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self._errors += 1
+            raise
+        fetched_at = self._local.fetched_at
+        return responses, time.time() if fetched_at is None else fetched_at
+
+    def _pool_counters(self):
+        # Best effort: urllib3 exposes per-host pools as a dict, urllib3-future
+        # (pulled in by niquests) does not, in which case we report None.
+        pools = getattr(getattr(self._adapter, 'poolmanager', None), 'pools', None)
+        if pools is None or not hasattr(pools, 'values'):
+            return None, None
+        connections_opened = 0
+        pooled_requests = 0
+        for pool in list(pools.values()):
+            connections_opened += getattr(pool, 'num_connections', 0)
+            pooled_requests += getattr(pool, 'num_requests', 0)
+        return connections_opened, max(pooled_requests - connections_opened, 0)
+
+    def stats(self):
+        """Request counters plus keep-alive reuse figures from the underlying connection pools."""
+        connections_opened, connections_reused = self._pool_counters()
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "errors": self._errors,
+                "http_cache_hits": self._http_cache_hits,
+                "sessions_built": self._sessions_built,
+                "session_reuses": max(self._requests - self._sessions_built, 0),
+                "connections_opened": connections_opened,
+                "connections_reused": connections_reused,
+                "pool_size": self.pool_size,
+            }
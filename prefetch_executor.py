@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+
+class PrefetchExecutor:
+    """
+    Fixed-size worker pool for best-effort cache warming.
+
+    Jobs are identified by a key; a key that is already queued or running is not
+    queued again. The queue is bounded: when it is full the oldest pending job is
+    dropped, since the newest request is the one most likely to be needed next.
+    Workers are started lazily (and restarted after a fork).
+    """
+
+    def __init__(self, name, workers=2, max_queue=64, latency_samples=512):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> (fn, enqueued_at)
+        self._running = set()
+        self._pid = None
+
+        self._submitted = 0
+        self._duplicates = 0
+        self._cached = 0
+        self._dropped = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_ms = deque(maxlen=latency_samples)
+        self._run_ms = deque(maxlen=latency_samples)
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._running.clear()
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True).start()
+
+    def submit(self, key, fn, is_cached=None):
+        """
+        Queues fn() under key. Returns 'queued', 'duplicate', 'cached' or 'queued_dropped_oldest'.
+        `is_cached` is an optional zero-argument check that skips the job when it returns True.
+        """
+        if is_cached is not None and is_cached():
+            with self._cond:
+                self._cached += 1
+            return 'cached'
+
+        with self._cond:
+            self._ensure_workers()
+            if key in self._pending or key in self._running:
+                self._duplicates += 1
+                return 'duplicate'
+
+            status = 'queued'
+            if len(self._pending) >= self.max_queue:
+                dropped_key, _ = self._pending.popitem(last=False)
+                self._dropped += 1
+                status = 'queued_dropped_oldest'
+                logging.info(f"{self.name} queue full ({self.max_queue}); dropped oldest job {dropped_key}")
+
+            self._pending[key] = (fn, time.monotonic())
+            self._submitted += 1
+            self._cond.notify()
+            return status
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, (fn, enqueued_at) = self._pending.popitem(last=False)
+                self._running.add(key)
+
+            started = time.monotonic()
+            ok = True
+            try:
+                fn()
+            except Exception as e:
+                ok = False
+                logging.warning(f"{self.name} job {key} failed: {e}")
+            finished = time.monotonic()
+
+            with self._cond:
+                self._running.discard(key)
+                self._wait_ms.append((started - enqueued_at) * 1000)
+                self._run_ms.append((finished - started) * 1000)
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    @staticmethod
+    def _percentiles(samples):
+        if not samples:
+            return {"p50": None, "p95": None, "max": None}
+        ordered = sorted(samples)
+        return {
+            "p50": round(ordered[len(ordered) // 2], 1),
+            "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 1),
+            "max": round(ordered[-1], 1),
+        }
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._pending),
+                "max_queue": self.max_queue,
+                "running": len(self._running),
+                "submitted": self._submitted,
+                "duplicates": self._duplicates,
+                "skipped_cached": self._cached,
+                "dropped": self._dropped,
+                "completed": self._completed,
+                "failed": self._failed,
+                "queue_wait_ms": self._percentiles(self._wait_ms),
+                "run_ms": self._percentiles(self._run_ms),
+            }
@@ -0,0 +1,226 @@
+import re
+import ast
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from app import (app, User, AIReport, UserActivity, forecast_cache, shared_cache, openmeteo_pool,
+                 meteogram_key, get_openmeteo_data_batch, fetch_meteogram, OPENMETEO_BATCH_SIZE,
+                 METEOGRAM_NAMESPACE)
+
+# How much each signal counts towards a cell's popularity (before recency decay)
+SIGNAL_WEIGHTS = {
+    'daily_subscriber': 5.0,   # User.xc_perfect_* with daily emails enabled
+    'saved_takeoff': 3.0,      # User.xc_perfect_* without daily emails
+    'ai_report': 3.0,          # AIReport lat/lon
+    'last_position': 1.0,      # User.last_lat/lon
+    'map_click': 1.0,          # UserActivity 'map_click' details
+}
+HALF_LIFE_DAYS = 7.0
+LOOKBACK_DAYS = 30
+ELEVATION_BATCH = 100  # Open-Meteo elevation API accepts up to 100 coordinates per call
+
+_LATLON_RE = re.compile(r'["\']?lat["\']?\s*:\s*(-?\d+(?:\.\d+)?).*?["\']?lon["\']?\s*:\s*(-?\d+(?:\.\d+)?)')
+
+
+def _decay(timestamp, now):
+    if timestamp is None:
+        return 1.0
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    age_days = max((now - timestamp).total_seconds() / 86400.0, 0.0)
+    return 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def _parse_click(details):
+    """(lat, lon) from a map_click's details: the str() of a dict as /api/log-activity stores it, or JSON."""
+    if not details:
+        return None
+    try:
+        try:
+            payload = ast.literal_eval(details)
+        except (ValueError, SyntaxError, RecursionError):
+            payload = json.loads(details)
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        return float(payload['lat']), float(payload['lon'])
+    except (ValueError, TypeError, KeyError, SyntaxError):
+        match = _LATLON_RE.search(details)
+        if match:
+            return float(match.group(1)), float(match.group(2))
+    return None
+
+
+def rank_hot_cells(now=None):
+    """
+    Scores forecast grid cells by how often pilots look at them.
+
+    Returns a list of dicts sorted by score, each with the cell, a representative
+    point (the most-weighted raw coordinate in the cell) and its ASL if known.
+    """
+    now = now or datetime.now(timezone.utc)
+    since = now - timedelta(days=LOOKBACK_DAYS)
+    cells = {}
+
+    def add(lat, lon, weight, asl=None):
+        if lat is None or lon is None:
+            return
+        key = forecast_cache.key_for(lat, lon)
+        cell = cells.setdefault(key, {"cell": key, "score": 0.0, "points": {}, "asl": None})
+        cell["score"] += weight
+        point = (round(float(lat), 3), round(float(lon), 3))
+        cell["points"][point] = cell["points"].get(point, 0.0) + weight
+        if asl is not None and cell["asl"] is None:
+            cell["asl"] = float(asl)
+
+    for user in User.query.filter(User.xc_perfect_lat.isnot(None), User.xc_perfect_lon.isnot(None)).all():
+        signal = 'daily_subscriber' if user.daily_email_enabled else 'saved_takeoff'
+        add(user.xc_perfect_lat, user.xc_perfect_lon, SIGNAL_WEIGHTS[signal], asl=user.xc_perfect_asl)
+
+    for user in User.query.filter(User.last_lat.isnot(None), User.last_lon.isnot(None)).all():
+        add(user.last_lat, user.last_lon, SIGNAL_WEIGHTS['last_position'])
+
+    for report in AIReport.query.filter(AIReport.timestamp >= since).all():
+        add(report.lat, report.lon, SIGNAL_WEIGHTS['ai_report'] * _decay(report.timestamp, now))
+
+    clicks = UserActivity.query.filter(UserActivity.action == 'map_click',
+                                       UserActivity.timestamp >= since).all()
+    for activity in clicks:
+        point = _parse_click(activity.details)
+        if point:
+            add(point[0], point[1], SIGNAL_WEIGHTS['map_click'] * _decay(activity.timestamp, now))
+
+    ranked = sorted(cells.values(), key=lambda c: c["score"], reverse=True)
+    for cell in ranked:
+        cell["point"] = max(cell["points"].items(), key=lambda item: item[1])[0]
+        del cell["points"]
+    return ranked
+
+
+def fetch_elevations(points):
+    """Terrain elevation for each (lat, lon), ELEVATION_BATCH points per upstream call."""
+    elevations = []
+    for start in range(0, len(points), ELEVATION_BATCH):
+        chunk = points[start:start + ELEVATION_BATCH]
+        response = requests.get("https://api.open-meteo.com/v1/elevation", params={
+            "latitude": ",".join(str(p[0]) for p in chunk),
+            "longitude": ",".join(str(p[1]) for p in chunk),
+        }, timeout=10)
+        response.raise_for_status()
+        elevations.extend(response.json().get('elevation', [0] * len(chunk)))
+    return elevations
+
+
+def run_prewarm_cycle(budget=100, top_n=300):
+    """
+    Warms the shared caches for the most popular cells, spending at most `budget` upstream calls.
+
+    Forecasts are cheap (OPENMETEO_BATCH_SIZE cells per call), so they are warmed
+    first; the remaining budget goes to meteograms, most popular cell first.
+    Run it as a separate process: the results land in the shared cache (and the
+    on-disk Meteoblue HTTP cache), where every web worker picks them up.
+    """
+    started = time.time()
+    with app.app_context():
+        ranked = rank_hot_cells()[:top_n]
+        logging.info(f"Pre-warm: {len(ranked)} hot cells (budget {budget} upstream calls)")
+        if not ranked:
+            return {"cells": 0, "calls": 0}
+
+        calls = 0
+
+        # 1. Forecasts: cells already fresh (here or in the shared cache) cost no upstream call
+        forecast_cells = ranked[:budget * OPENMETEO_BATCH_SIZE]
+        requests_before = openmeteo_pool.stats()["requests"]
+        results = get_openmeteo_data_batch([c["cell"] for c in forecast_cells])
+        calls += openmeteo_pool.stats()["requests"] - requests_before
+        warmed = sum(1 for r in results if r is not None)
+        logging.info(f"Pre-warm: {warmed}/{len(forecast_cells)} forecasts warm ({calls} upstream calls)")
+
+        # 2. Meteograms need an ASL; look up terrain elevation for cells that lack one
+        missing_asl = [c for c in ranked if c["asl"] is None]
+        elevation_calls = min(math.ceil(len(missing_asl) / ELEVATION_BATCH), budget - calls)
+        if elevation_calls > 0:
+            try:
+                lookup = missing_asl[:elevation_calls * ELEVATION_BATCH]
+                for cell, elevation in zip(lookup, fetch_elevations([c["point"] for c in lookup])):
+                    cell["asl"] = elevation
+            except Exception as e:
+                logging.warning(f"Pre-warm: elevation lookup failed: {e}")
+            calls += elevation_calls
+
+        meteograms = 0
+        seen = set()
+        for cell in ranked:
+            if calls >= budget:
+                break
+            if cell["asl"] is None:
+                continue
+            lat, lon = cell["point"]
+            key = meteogram_key(lat, lon, cell["asl"])
+            if key in seen:
+                continue
+            seen.add(key)
+            if shared_cache.get(METEOGRAM_NAMESPACE, key) is not None:
+                continue
+            try:
+                fetch_meteogram(lat, lon, cell["asl"], timeout=15)
+                meteograms += 1
+            except Exception as e:
+                logging.warning(f"Pre-warm: meteogram failed for {key}: {e}")
+            calls += 1
+
+        elapsed = time.time() - started
+        logging.info(f"Pre-warm cycle done in {elapsed:.1f}s: {warmed} forecasts, "
+                     f"{meteograms} meteograms, {calls}/{budget} upstream calls")
+        return {"cells": len(ranked), "forecasts": warmed, "meteograms": meteograms,
+                "calls": calls, "elapsed_s": round(elapsed, 1)}
+
+
+def seconds_until_next_cycle(minute_offset, now=None):
+    """Seconds until `minute_offset` past the next hour (models publish shortly after the hour)."""
+    now = now or datetime.now(timezone.utc)
+    target = now.replace(minute=minute_offset, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(hours=1)
+    return (target - now).total_seconds()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm forecast and meteogram caches for popular takeoffs.")
+    parser.add_argument("--budget", type=int, default=100, help="Max upstream calls per cycle.")
+    parser.add_argument("--top", type=int, default=300, help="Number of hottest cells to consider.")
+    parser.add_argument("--loop", action="store_true", help="Keep running, one cycle after every model update.")
+    parser.add_argument("--minute", type=int, default=5, help="Minutes past the hour to run each cycle (with --loop).")
+    args = parser.parse_args()
+
+    # Configure logging (here, not at import: importing the module must not create prewarmer.log).
+    # force: app.py has already configured the root logger by now
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("prewarmer.log"),
+            logging.StreamHandler()
+        ],
+        force=True,
+    )
+
+    if not args.loop:
+        run_prewarm_cycle(budget=args.budget, top_n=args.top)
+        sys.exit(0)
+
+    while True:
+        wait = seconds_until_next_cycle(args.minute)
+        logging.info(f"Next pre-warm cycle in {wait / 60:.1f} min")
+        time.sleep(wait)
+        try:
+            run_prewarm_cycle(budget=args.budget, top_n=args.top)
+        except Exception as e:
+            logging.error(f"Pre-warm cycle crashed: {e}", exc_info=True)
@@ -0,0 +1,48 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst` saved up.
+
+    `acquire()` blocks until a token is available, so callers in a worker pool are
+    spaced out to the upstream's allowance instead of sleeping a fixed time.
+    A rate of 0 (or None) disables limiting.
+    """
+
+    def __init__(self, name, rate, burst=1):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._waited = 0.0
+
+    def acquire(self, tokens=1):
+        """Takes `tokens`, waiting as long as needed. Returns the seconds spent waiting."""
+        if not self.rate:
+            with self._lock:
+                self._acquired += tokens
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._acquired += tokens
+                    self._waited += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self):
+        with self._lock:
+            return {"rate_per_s": self.rate, "burst": self.burst, "acquired": self._acquired,
+                    "waited_s": round(self._waited, 1)}
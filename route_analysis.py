@@ -0,0 +1,163 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Variables pulled from the forecast cube for every (sample, hour)
+ROUTE_VARIABLES = ("wind_speed_850hPa", "wind_direction_850hPa", "cape", "cloud_cover", "precipitation")
+
+
+def _unit_vectors(lat_deg, lon_deg):
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def densify_route(points, spacing_km=10.0):
+    """
+    Samples a polyline of (lat, lon) turnpoints along great circles, about every `spacing_km`.
+
+    Each leg is sampled from its start to its end turnpoint inclusive (so shared turnpoints
+    appear once per leg). Returns a dict of arrays, one entry per sample:
+    lat, lon, leg (0-based leg index), track (true course in degrees at the sample),
+    plus per-leg `leg_km` and `leg_start` (index of each leg's first sample).
+    Zero-length legs (repeated clicks, anything under ~6 m) are dropped.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    v = _unit_vectors(pts[:, 0], pts[:, 1])
+    a, b = v[:-1], v[1:]
+    normal = np.cross(a, b)
+    # Central angle per leg; arctan2 stays accurate for tiny legs where arccos of the dot product doesn't
+    omega = np.arctan2(np.linalg.norm(normal, axis=1), np.einsum('ij,ij->i', a, b))
+    keep = omega > 1e-6  # ~6 m: anything shorter is a repeated click with no usable direction
+    a, b, omega, normal = a[keep], b[keep], omega[keep], normal[keep]
+    leg_km = omega * EARTH_RADIUS_KM
+
+    n_seg = np.maximum(np.ceil(leg_km / spacing_km).astype(np.int64), 1)
+    counts = n_seg + 1
+    leg_start = np.cumsum(counts) - counts
+    leg = np.repeat(np.arange(len(counts)), counts)
+    frac = (np.arange(counts.sum()) - np.repeat(leg_start, counts)) / np.repeat(n_seg, counts)
+
+    # Spherical linear interpolation between each leg's endpoints
+    w = omega[leg]
+    sin_w = np.sin(w)
+    p = (np.sin((1 - frac) * w) / sin_w)[:, None] * a[leg] + (np.sin(frac * w) / sin_w)[:, None] * b[leg]
+    lat = np.degrees(np.arcsin(np.clip(p[:, 2], -1.0, 1.0)))
+    lon = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+
+    # Track = direction of the great-circle tangent (normal x position) in the local north/east frame
+    normal /= np.linalg.norm(normal, axis=1)[:, None]
+    tangent = np.cross(normal[leg], p)
+    lat_r, lon_r = np.radians(lat), np.radians(lon)
+    north = np.stack([-np.sin(lat_r) * np.cos(lon_r), -np.sin(lat_r) * np.sin(lon_r), np.cos(lat_r)], axis=-1)
+    east = np.stack([-np.sin(lon_r), np.cos(lon_r), np.zeros_like(lon_r)], axis=-1)
+    track = np.degrees(np.arctan2(np.einsum('ij,ij->i', tangent, east),
+                                  np.einsum('ij,ij->i', tangent, north)))
+    track = np.round(track, 6) % 360  # -0.0 would otherwise wrap to 360
+
+    return {"lat": lat, "lon": lon, "leg": leg, "track": track,
+            "leg_km": leg_km, "leg_start": leg_start, "legs_kept": np.flatnonzero(keep)}
+
+
+def wind_components(speed, direction_from, track):
+    """
+    Headwind (+) / tailwind (-) and crosswind (+ from the right) for a given track.
+    `direction_from` is meteorological (where the wind blows from), all angles in degrees.
+    """
+    angle = np.radians(direction_from - track)
+    return speed * np.cos(angle), speed * np.sin(angle)
+
+
+def flyable_times(cube, now, flying_hours):
+    """UTC epoch seconds of the next day's flyable hours still ahead of `now`."""
+    times = cube.times
+    hours = (times // 3600) % 24
+    mask = (times >= (now // 3600) * 3600) & (hours >= flying_hours[0]) & (hours <= flying_hours[1])
+    if not mask.any():
+        return times[:0]
+    days = times // 86400
+    first_day = days[mask][0]
+    return times[mask & (days == first_day)]
+
+
+def sample_fields(cubes, cell_index, target_times, variables=ROUTE_VARIABLES):
+    """
+    Stacks each variable into an (n_samples, n_hours) array.
+
+    `cubes` holds one ForecastCube (or None) per grid cell, `cell_index` maps every
+    sample to its cell. Hours a cube doesn't cover, and cells without data, are NaN.
+    """
+    n_cells, n_hours = len(cubes), len(target_times)
+    per_cell = {name: np.full((n_cells, n_hours), np.nan, dtype=np.float32) for name in variables}
+    for c, cube in enumerate(cubes):
+        if cube is None or cube.empty:
+            continue
+        idx = np.searchsorted(cube.times, target_times)
+        found = idx < len(cube.times)
+        found[found] = cube.times[idx[found]] == target_times[found]
+        for name in variables:
+            row = cube.get(name)
+            if row is not None:
+                per_cell[name][c, found] = row[idx[found]]
+    return {name: values[cell_index] for name, values in per_cell.items()}
+
+
+def summarize_legs(route, fields, target_times):
+    """
+    Per-leg along-track summary over the flyable hours.
+
+    Returns a list of dicts (one per kept leg) with distance, mean track, mean/max
+    headwind and max crosswind at 850 hPa, CAPE range, mean cloud cover, total rain,
+    the best hour (lowest mean headwind) and how many samples had no data.
+    """
+    head, cross = wind_components(fields["wind_speed_850hPa"], fields["wind_direction_850hPa"],
+                                  route["track"][:, None])
+    hours = (target_times // 3600) % 24
+    legs = []
+    ends = np.append(route["leg_start"][1:], len(route["leg"]))
+    for i, (start, end) in enumerate(zip(route["leg_start"], ends)):
+        sl = slice(start, end)
+        valid = ~np.isnan(head[sl]).all(axis=1)
+        leg = {
+            "leg": int(route["legs_kept"][i]) + 1,
+            "km": float(route["leg_km"][i]),
+            "track": float(np.degrees(np.arctan2(np.sin(np.radians(route["track"][sl])).mean(),
+                                                 np.cos(np.radians(route["track"][sl])).mean())) % 360),
+            "samples": int(end - start),
+            "missing": int((~valid).sum()),
+        }
+        if valid.any():
+            leg_head = head[sl][valid]
+            hourly_head = np.nanmean(leg_head, axis=0)
+            best = int(np.nanargmin(hourly_head)) if not np.isnan(hourly_head).all() else None
+            leg.update({
+                "head_mean": float(np.nanmean(leg_head)),
+                "head_max": float(np.nanmax(leg_head)),
+                "cross_max": float(np.nanmax(np.abs(cross[sl][valid]))),
+                "cape_min": float(np.nanmin(fields["cape"][sl][valid])),
+                "cape_max": float(np.nanmax(fields["cape"][sl][valid])),
+                "cloud_mean": float(np.nanmean(fields["cloud_cover"][sl][valid])),
+                "rain_mm": float(np.nansum(np.nanmean(fields["precipitation"][sl][valid], axis=0))),
+                "best_hour": int(hours[best]) if best is not None else None,
+                "best_head": float(hourly_head[best]) if best is not None else None,
+            })
+        legs.append(leg)
+    return legs
+
+
+def format_leg_summary(legs, hours_label):
+    """One compact line per leg for the prompt."""
+    lines = []
+    for leg in legs:
+        head = f"Leg {leg['leg']} (P{leg['leg']}->P{leg['leg'] + 1}): {leg['km']:.0f}km, track {leg['track']:.0f}deg"
+        if "head_mean" not in leg:
+            lines.append(f"{head}: no forecast data")
+            continue
+        line = (f"{head}; 850hPa headwind avg {leg['head_mean']:+.0f} max {leg['head_max']:+.0f} km/h, "
+                f"crosswind max {leg['cross_max']:.0f} km/h; CAPE {leg['cape_min']:.0f}-{leg['cape_max']:.0f}; "
+                f"cloud {leg['cloud_mean']:.0f}%; rain {leg['rain_mm']:.1f}mm")
+        if leg["best_hour"] is not None:
+            line += f"; best {leg['best_hour']:02d}h UTC (head {leg['best_head']:+.0f})"
+        if leg["missing"]:
+            line += f"; {leg['missing']}/{leg['samples']} samples missing"
+        lines.append(line)
+    return f"Along-track analysis ({hours_label}, +head/-tail):\n" + "\n".join(lines)
@@ -0,0 +1,358 @@
+import os
+import mmap
+import stat
+import time
+import pickle
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryLRU:
+    """Byte-bounded, TTL-aware in-process LRU (the L1 in front of a shared backend)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, nbytes, expires_at):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes, expires_at)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class NullBackend:
+    """No cross-worker sharing: every worker relies on its own L1."""
+
+    name = 'none'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, data, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class MmapFileBackend:
+    """
+    Cross-process store in a local directory, ideally on tmpfs (e.g. /dev/shm).
+
+    One file per key: an 8-byte expiry timestamp followed by the payload. Writes go
+    to a temp file and are published with os.replace, so readers (which mmap the
+    file) never see a partial entry and no inter-process lock is needed. Total size
+    is kept under `max_bytes` by deleting the least recently written files.
+
+    Entries are unpickled, so the directory must be private to this user: it is
+    created with mode 0700 and refused if it is a symlink, belongs to someone else
+    or is accessible to group/other.
+    """
+
+    name = 'mmap'
+    _HEADER = struct.Struct('<d')
+    _PRUNE_EVERY = 64
+    _TMP_PREFIX = '.tmp-'
+    _TMP_MAX_AGE = 300  # seconds; older temp files were left by a crashed writer
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._ensure_private_directory(directory)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ensure_private_directory(directory):
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode):
+            raise RuntimeError(f"{directory} is not a directory")
+        if st.st_uid != os.getuid():
+            raise RuntimeError(f"{directory} is owned by uid {st.st_uid}, not by this user")
+        if st.st_mode & 0o077:
+            raise RuntimeError(f"{directory} is accessible to other users (mode {stat.S_IMODE(st.st_mode):o}); "
+                               f"it must be 0700")
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                if os.fstat(f.fileno()).st_size <= self._HEADER.size:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    (expires_at,) = self._HEADER.unpack_from(mm, 0)
+                    if expires_at >= time.time():
+                        return mm[self._HEADER.size:]
+        except FileNotFoundError:
+            return None
+        self.delete(key)
+        return None
+
+    def set(self, key, data, ttl):
+        if len(data) + self._HEADER.size > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=self._TMP_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._HEADER.pack(time.time() + ttl))
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self._PRUNE_EVERY == 0
+        if should_prune:
+            self.prune()
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _scan(self, temp_files=None):
+        """(mtime, size, path) of the published entries; in-progress temp files are left out."""
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.startswith(self._TMP_PREFIX):
+                    if temp_files is not None:
+                        temp_files.append((st.st_mtime, entry.path))
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return files
+
+    def prune(self):
+        """Deletes the oldest entries until the store is back under 90% of max_bytes."""
+        temp_files = []
+        files = self._scan(temp_files)
+        abandoned_before = time.time() - self._TMP_MAX_AGE
+        for mtime, path in temp_files:
+            if mtime < abandoned_before:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= target:
+                break
+
+    def stats(self):
+        files = self._scan()
+        return {
+            "directory": self.directory,
+            "entries": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+        }
+
+
+class RedisBackend:
+    """Any Redis-compatible server (Redis, Valkey, KeyDB...). Size limits come from the server's maxmemory."""
+
+    name = 'redis'
+
+    def __init__(self, url, max_value_bytes=8 * 1024 * 1024, socket_timeout=0.5):
+        if redis is None:
+            raise RuntimeError("The 'redis' package is required for SHARED_CACHE_BACKEND=redis.")
+        self.url = url
+        self.max_value_bytes = max_value_bytes
+        self._client = redis.Redis.from_url(url, socket_timeout=socket_timeout,
+                                            socket_connect_timeout=socket_timeout)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, data, ttl):
+        if len(data) > self.max_value_bytes:
+            return
+        self._client.set(key, data, ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def stats(self):
+        info = self._client.info('memory')
+        return {
+            "url": self.url.split('@')[-1],
+            "used_memory": info.get('used_memory'),
+            "maxmemory": info.get('maxmemory'),
+        }
+
+
+def create_backend(kind, directory=None, max_bytes=256 * 1024 * 1024, url=None):
+    """Builds the configured backend, falling back to no sharing if it cannot be set up."""
+    kind = (kind or 'none').lower()
+    try:
+        if kind == 'mmap':
+            # Per-user default so another account can't pre-create it
+            return MmapFileBackend(directory or os.path.join(tempfile.gettempdir(),
+                                                             f'xcthermal-shared-cache-{os.getuid()}'),
+                                   max_bytes=max_bytes)
+        if kind == 'redis':
+            return RedisBackend(url or 'redis://127.0.0.1:6379/0')
+    except Exception as e:
+        logging.error(f"Shared cache backend '{kind}' unavailable ({e}); falling back to per-worker caching.")
+        return NullBackend()
+    if kind != 'none':
+        logging.error(f"Unknown shared cache backend '{kind}'; falling back to per-worker caching.")
+    return NullBackend()
+
+
+class SharedCache:
+    """
+    Two-level cache: an in-process L1 in front of a backend shared by all workers.
+
+    Values are pickled together with their absolute expiry, so every backend
+    honours the same TTL. Backend errors are logged and treated as misses; the
+    cache never takes a request down.
+    """
+
+    def __init__(self, backend, l1_max_bytes=32 * 1024 * 1024, prefix='xct'):
+        self.backend = backend
+        self.prefix = prefix
+        self.l1 = MemoryLRU(l1_max_bytes)
+        self._lock = threading.Lock()
+        self._counters = {"l1_hits": 0, "shared_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _key(self, namespace, key):
+        if isinstance(key, (tuple, list)):
+            key = ":".join(str(part) for part in key)
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace, key, l1=True):
+        full_key = self._key(namespace, key)
+        if l1:
+            value = self.l1.get(full_key)
+            if value is not None:
+                self._count("l1_hits")
+                return value
+
+        try:
+            data = self.backend.get(full_key)
+        except Exception as e:
+            logging.warning(f"Shared cache read failed for {full_key}: {e}")
+            self._count("errors")
+            data = None
+        if data is None:
+            self._count("misses")
+            return None
+
+        try:
+            expires_at, value = pickle.loads(data)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable shared cache entry {full_key}: {e}")
+            self._count("errors")
+            return None
+        if expires_at < time.time():
+            self._count("misses")
+            return None
+
+        self._count("shared_hits")
+        if l1:
+            self.l1.set(full_key, value, len(data), expires_at)
+        return value
+
+    def set(self, namespace, key, value, ttl, l1=True):
+        full_key = self._key(namespace, key)
+        expires_at = time.time() + ttl
+        data = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        if l1:
+            self.l1.set(full_key, value, len(data), expires_at)
+        try:
+            self.backend.set(full_key, data, ttl)
+            self._count("writes")
+        except Exception as e:
+            logging.warning(f"Shared cache write failed for {full_key}: {e}")
+            self._count("errors")
+
+    def delete(self, namespace, key):
+        full_key = self._key(namespace, key)
+        self.l1.delete(full_key)
+        try:
+            self.backend.delete(full_key)
+        except Exception as e:
+            logging.warning(f"Shared cache delete failed for {full_key}: {e}")
+            self._count("errors")
+
+    def stats(self):
+        try:
+            backend_stats = self.backend.stats()
+        except Exception as e:
+            backend_stats = {"error": str(e)}
+        with self._lock:
+            counters = dict(self._counters)
+        return {"backend": self.backend.name, **counters, "l1": self.l1.stats(), "shared": backend_stats}
@@ -0,0 +1,108 @@
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for it and receive the same result (or the same exception).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+                is_leader = True
+            else:
+                self._coalesced += 1
+                is_leader = False
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def do_many(self, keys, fn):
+        """
+        Batch version of do(): `fn(keys)` runs once for the keys nobody is fetching yet and
+        returns {key: result}; keys already in flight (from do() or another batch) are
+        waited for instead. Returns {key: result} without the keys that failed, so a batch
+        caller gets what could be fetched. Single-key callers waiting on a key the batch
+        left out get a LookupError.
+        """
+        led, followed = {}, {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    led[key] = self._calls[key] = _Call()
+                    self._executions += 1
+                else:
+                    followed[key] = call
+                    self._coalesced += 1
+
+        results = {}
+        if led:
+            try:
+                produced = fn(list(led))
+                for key, call in led.items():
+                    if key in produced:
+                        call.result = results[key] = produced[key]
+                    else:
+                        call.error = LookupError(f"{self.name}: no result for {key}")
+            except BaseException as e:
+                for call in led.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._calls.pop(key, None)
+                for call in led.values():
+                    call.event.set()
+
+        for key, call in followed.items():
+            call.event.wait()
+            if call.error is None:
+                results[key] = call.result
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,49 @@
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict, deque
+
+
+class StageTimings:
+    """
+    Rolling latency samples per pipeline stage (fetch, decode, model call...).
+
+    `stage()` times a block, records it, and optionally copies the duration into a
+    per-call dict so a single run can be logged as well as aggregated.
+    """
+
+    def __init__(self, name, samples=512):
+        self.name = name
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=samples))
+        self._counts = defaultdict(int)
+
+    def record(self, stage, ms):
+        with self._lock:
+            self._samples[stage].append(ms)
+            self._counts[stage] += 1
+
+    @contextmanager
+    def stage(self, stage, timings=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self.record(stage, ms)
+            if timings is not None:
+                timings[stage] = round(ms, 1)
+
+    @staticmethod
+    def _percentiles(samples):
+        ordered = sorted(samples)
+        return {
+            "p50": round(ordered[len(ordered) // 2], 1),
+            "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 1),
+            "max": round(ordered[-1], 1),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {stage: {"count": self._counts[stage], **self._percentiles(samples)}
+                    for stage, samples in self._samples.items() if samples}
@@ -218,6 +218,57 @@ function getLatestWeatherDataFromHistory() {
   } catch (e) { return null; }
 }
 
+// --- STREAMING HELPERS ---
+// Reads the Server-Sent Events from /api/interpret-stream.
+// Calls onText(fullTextSoFar) as chunks arrive and resolves with { interpretation, ...donePayload }.
+async function readInterpretationStream(response, onText) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = 'message';
+      let data = '';
+      raw.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (!data) continue;
+      const payload = JSON.parse(data);
+
+      if (event === 'error') throw new Error(payload.error || "AI failed.");
+      if (event === 'done') return { interpretation: text, ...payload };
+      text += payload.text || '';
+      onText(text);
+    }
+  }
+  throw new Error("Connection lost before the interpretation finished.");
+}
+
+// --- JOB HELPERS ---
+// Polls /api/jobs/<id> until the job is done; resolves with its payload or throws on failure.
+async function waitForJob(jobId, intervalMs = 1500) {
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+    const response = await fetch(`/api/jobs/${jobId}`);
+    const job = await response.json();
+    if (!response.ok) throw new Error(job.error || "Error");
+    if (job.status === 'done') return job;
+    if (job.status === 'failed') throw new Error(job.error || "Route analysis failed");
+  }
+}
+
 // --- MAIN SETUP ---
 export function setupAIInterpretation() {
   const aiToggleBtn = document.getElementById('aiToggleBtn');
@@ -412,7 +463,7 @@ export function setupAIInterpretation() {
             payload.bearing = window.currentMap.getBearing();
           }
 
-          const response = await fetch('/api/interpret', {
+          const response = await fetch('/api/interpret-stream', {
             method: 'POST',
             headers: {
               'Content-Type': 'application/json'
@@ -420,17 +471,38 @@ export function setupAIInterpretation() {
             body: JSON.stringify(payload)
           });
 
-          const result = await response.json();
+          const renderInterpretation = (text) => {
+            if (!aiOutput) return;
+            if (typeof marked !== 'undefined') {
+              aiOutput.innerHTML = marked.parse(text);
+            } else {
+              aiOutput.textContent = text;
+            }
+          };
 
-          // Save to History (only if successful or partial)
+          let result;
+          if ((response.headers.get('Content-Type') || '').includes('text/event-stream')) {
+            // Render the answer as it is written; the game goes away with the first words
+            result = await readInterpretationStream(response, (text) => {
+              if (isAiLoading) {
+                isAiLoading = false;
+                stopLoadingGame();
+                stopProgressAnimation();
+              }
+              renderInterpretation(text);
+            });
+          } else {
+            // Errors (auth, credits, free trial) still come back as plain JSON
+            result = await response.json();
 
-          if (result.error === 'FREE_TRIAL_ENDED') {
-            // Show Free Trial Ended Popup immediately if they try again
-            document.getElementById('freeTrialModalOverlay').classList.add('active');
-            throw new Error(result.message);
-          }
+            if (result.error === 'FREE_TRIAL_ENDED') {
+              // Show Free Trial Ended Popup immediately if they try again
+              document.getElementById('freeTrialModalOverlay').classList.add('active');
+              throw new Error(result.message);
+            }
 
-          if (!response.ok) throw new Error(result.error || "Error");
+            if (!response.ok) throw new Error(result.error || "Error");
+          }
 
           // FINISHED STATE
           isAiLoading = false;
@@ -438,11 +510,7 @@ export function setupAIInterpretation() {
           stopProgressAnimation();
 
           if (aiOutput) {
-            if (typeof marked !== 'undefined') {
-              aiOutput.innerHTML = marked.parse(result.interpretation);
-            } else {
-              aiOutput.textContent = result.interpretation;
-            }
+            renderInterpretation(result.interpretation);
 
             // --- FREE TRIAL LOGIC ---
             if (result.free_trial) {
@@ -602,7 +670,8 @@ export async function interpretRoute(points) {
     // Prepare payload: convert array of arrays to array of objects
     const routePayload = points.map(p => ({ lat: p[1], lon: p[0] }));
 
-    const response = await fetch("/api/interpret-route", {
+    // Queue the analysis as a job, then poll until a worker has finished it
+    const response = await fetch("/api/jobs/interpret-route", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({
@@ -613,9 +682,11 @@ export async function interpretRoute(points) {
       })
     });
 
-    const result = await response.json();
+    const job = await response.json();
+
+    if (!response.ok) throw new Error(job.error || "Route analysis failed");
 
-    if (!response.ok) throw new Error(result.error || "Route analysis failed");
+    const result = await waitForJob(job.job_id);
 
     isAiLoading = false;
     stopLoadingGame();
@@ -0,0 +1,140 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import daily_interpreter
+from app import app, db, User, DailyRun, DailyRunOutcome
+from daily_interpreter import (_checkpoint, _user_job, claim_jobs, close_past_runs, get_or_create_run,
+                               process_group, run_daily_interpreter, run_local_dates, seconds_until_next_retry)
+
+RUN_ID = '2026-10-17'
+
+
+@pytest.fixture
+def users(monkeypatch):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for user_id in (1, 2):
+            db.session.add(User(id=user_id, username=f'pilot{user_id}', email=f'pilot{user_id}@example.com',
+                                daily_email_enabled=True, xc_perfect_lat=46.5, xc_perfect_lon=7.9 + user_id))
+        db.session.commit()
+
+    processed = []
+
+    def process_group(run_id, group, cube):
+        # Stands in for the forecast/model/email pipeline: every user gets a no-go
+        decided = {}
+        with app.app_context():
+            for job in group["members"]:
+                processed.append(job["id"])
+                _checkpoint(run_id, job, 'no_go', decided)
+        return Counter(decided.values())
+
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) > 5:
+            raise AssertionError("run_daily_interpreter kept polling for retries it can never claim")
+
+    monkeypatch.setattr(daily_interpreter, 'warm_forecasts', lambda groups: [None] * len(groups))
+    monkeypatch.setattr(daily_interpreter, 'process_group', process_group)
+    monkeypatch.setattr(daily_interpreter.time, 'sleep', sleep)
+    return processed, sleeps
+
+
+def _fail(user_id, due_in, run_id=RUN_ID):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.add(DailyRun(id=run_id, status='running', created_at=now))
+    db.session.add(DailyRunOutcome(run_id=run_id, user_id=user_id, status='failed', outcome='send_failed',
+                                   attempts=1, next_attempt_at=now + timedelta(seconds=due_in), updated_at=now))
+    db.session.commit()
+
+
+def test_shard_ignores_failed_users_of_other_shards(users):
+    processed, sleeps = users
+    with app.app_context():
+        _fail(2, due_in=-1)  # another shard's user, retryable right now
+
+    run_daily_interpreter(RUN_ID, user_ids=[1], retry_max_wait=0)
+
+    assert processed == [1]
+    assert sleeps == []
+    with app.app_context():
+        assert seconds_until_next_retry(RUN_ID, [1]) is None
+        assert seconds_until_next_retry(RUN_ID) == 0
+        # A slice never closes the shared run
+        assert db.session.get(DailyRun, RUN_ID).status == 'running'
+
+
+def test_due_retry_that_cannot_be_claimed_stops_the_loop(users):
+    processed, sleeps = users
+    with app.app_context():
+        _fail(1, due_in=-1)
+        db.session.get(User, 1).daily_email_enabled = False  # no longer eligible
+        db.session.commit()
+
+    run_daily_interpreter(RUN_ID, user_ids=[1])
+
+    assert processed == []
+    assert sleeps == []
+
+
+def test_full_run_is_marked_done_and_past_runs_are_closed(users):
+    processed, _ = users
+    run_daily_interpreter(RUN_ID)
+    assert sorted(processed) == [1, 2]
+    with app.app_context():
+        assert db.session.get(DailyRun, RUN_ID).status == 'done'
+
+        _fail(1, due_in=60, run_id='2026-10-10')
+        close_past_runs(datetime(2026, 10, 17, 12, tzinfo=timezone.utc))
+        assert db.session.get(DailyRun, '2026-10-10').status == 'done'
+
+
+def test_cron_runs_are_keyed_by_local_date(users):
+    processed, _ = users
+    with app.app_context():
+        pilot = db.session.get(User, 2)
+        pilot.xc_perfect_lat, pilot.xc_perfect_lon = 37.8, -122.4  # still the 16th in California
+        db.session.commit()
+
+    run_local_dates(datetime(2026, 10, 17, 4, tzinfo=timezone.utc))
+
+    assert sorted(processed) == [1, 2]
+    with app.app_context():
+        assert {(row.run_id, row.user_id) for row in DailyRunOutcome.query} == {('2026-10-17', 1), ('2026-10-16', 2)}
+
+
+def test_error_after_sending_is_never_retried(users, monkeypatch):
+    sent_to = []
+
+    def send(email_to, **kwargs):
+        sent_to.append(email_to)
+        return True, 'ok'
+
+    def checkpoint(run_id, job, outcome, decided, **kwargs):
+        if outcome == 'sent':
+            raise RuntimeError('database went away')  # after Brevo accepted the email
+        return _checkpoint(run_id, job, outcome, decided, **kwargs)
+
+    monkeypatch.setattr(daily_interpreter, 'PRESCORE_ENABLED', False)
+    monkeypatch.setattr(daily_interpreter, 'get_cached_interpretation', lambda *args, **kwargs: '✅ XC STATUS: GO! Big day.')
+    monkeypatch.setattr(daily_interpreter, 'send_brevo_email', send)
+    monkeypatch.setattr(daily_interpreter, '_checkpoint', checkpoint)
+
+    with app.app_context():
+        get_or_create_run(RUN_ID)
+        jobs = claim_jobs(RUN_ID, [_user_job(db.session.get(User, user_id)) for user_id in (1, 2)])
+    group = {"key": 'group', "lat": 46.5, "lon": 7.9, "asl": 0, "language": None, "units": None, "members": jobs}
+
+    outcomes = process_group(RUN_ID, group, None)
+
+    assert sent_to == ['pilot1@example.com']
+    assert outcomes == Counter({'sending': 1, 'error': 1})
+    with app.app_context():
+        rows = {row.user_id: row.status for row in DailyRunOutcome.query.filter_by(run_id=RUN_ID)}
+        # The emailed user is left for a manual check; the one never emailed gets retried
+        assert rows == {1: 'sending', 2: 'failed'}
@@ -0,0 +1,118 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as app_module
+from app import app, forecast_cache as shared_forecast_cache
+from forecast_cache import ForecastCache
+from forecast_cube import ForecastCube
+from shared_cache import NullBackend
+
+HOUR = 3600
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000 * HOUR + 600.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = ForecastCache(max_bytes=3 * 800)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, np.zeros(100))  # 800 bytes each
+    assert cache.get('a') is not None  # 'a' is now the most recently used
+    cache.put('d', np.zeros(100))
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd'))
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 3 * 800
+
+
+def test_oversized_values_are_not_cached():
+    cache = ForecastCache(max_bytes=100)
+    cache.put('a', np.zeros(100))
+    assert cache.stats()["entries"] == 0
+
+
+def test_fresh_then_stale_then_expired(clock):
+    cache = ForecastCache(grace_seconds=HOUR)
+    cache.put('a', np.zeros(4))
+
+    value, age, fresh = cache.lookup('a')
+    assert fresh and age == 0
+
+    clock[0] += HOUR  # next model run hour: served stale while it is refreshed
+    value, age, fresh = cache.lookup('a')
+    assert not fresh and age == HOUR
+    assert cache.get('a') is None  # get() never returns stale values
+
+    clock[0] += HOUR  # past the grace window
+    assert cache.lookup('a') is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_stored_at_decides_the_run_hour(clock):
+    cache = ForecastCache()
+    cache.put('a', np.zeros(4), stored_at=clock[0] - HOUR)  # fetched during the previous run
+    value, age, fresh = cache.lookup('a')
+    assert not fresh and age == HOUR
+
+
+def test_refresh_claims_are_exclusive():
+    cache = ForecastCache()
+    assert cache.begin_refresh(['a', 'b']) == ['a', 'b']
+    assert cache.begin_refresh(['b', 'c']) == ['c']
+    cache.end_refresh(['a', 'b', 'c'])
+    assert cache.begin_refresh(['b']) == ['b']
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Open-Meteo stand-in: every cell's 'cube' is a small array, served from an HTTP cache entry 30 min old."""
+    calls = []
+
+    def fetch(params, url=None, force_refresh=False):
+        calls.append(force_refresh)
+        n = len(params["latitude"].split(","))
+        fetched_at = time.time() if force_refresh else time.time() - 1800
+        return [np.full(4, len(calls), dtype=np.float64) for _ in range(n)], fetched_at
+
+    monkeypatch.setattr(app_module.openmeteo_pool, 'fetch', fetch)
+    monkeypatch.setattr(ForecastCube, 'from_response', staticmethod(lambda response, variables: response))
+    monkeypatch.setattr(app_module.shared_cache, 'backend', NullBackend())
+    shared_forecast_cache.clear()
+    yield calls
+    shared_forecast_cache.clear()
+
+
+def test_fetch_keeps_the_http_cache_age(upstream):
+    key = shared_forecast_cache.key_for(46.5, 7.9)
+    with app.test_request_context():
+        app_module._fetch_forecast_cells([key])
+        assert 1795 <= app_module._data_age_payload()["forecast"] <= 1805
+    assert upstream == [False]
+    assert shared_forecast_cache.lookup(key)[1] >= 1795
+
+
+def test_batch_records_forecast_age(upstream):
+    with app.test_request_context():
+        cubes = app_module.get_openmeteo_data_batch([(46.5, 7.9), (46.9, 8.3)])
+        assert all(cube is not None for cube in cubes)
+        assert "forecast" in app_module._data_age_payload()
+
+
+def test_background_refresh_bypasses_the_http_cache(upstream):
+    key = shared_forecast_cache.key_for(46.5, 7.9)
+    shared_forecast_cache.put(key, np.zeros(4), stored_at=time.time() - HOUR)  # previous run hour
+    with app.test_request_context():
+        app_module.get_openmeteo_data(46.5, 7.9)
+
+    deadline = time.monotonic() + 5
+    while shared_forecast_cache.stats()["refreshing"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert upstream == [True]
+    value, age, fresh = shared_forecast_cache.lookup(key)
+    assert fresh and age < 5
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import app as app_module
+from app import app, db, User, AIReport, INTERPRETATION_COST
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'test')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, username='pilot1', email='pilot1@example.com', credits=10))
+        db.session.commit()
+    stored = []
+    monkeypatch.setattr(app_module, 'store_interpretation', lambda *args, **kwargs: stored.append(args[3]))
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    return client, stored
+
+
+def _events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+def _state():
+    with app.app_context():
+        return db.session.get(User, 1).credits, [report.content for report in AIReport.query.all()]
+
+
+def test_cached_answer_streams_debits_and_saves_report(client, monkeypatch):
+    client, stored = client
+    monkeypatch.setattr(app_module, 'get_cached_interpretation', lambda *args, **kwargs: 'cached text')
+
+    events = _events(client.post('/api/interpret-stream', json={"lat": 46.5, "lon": 7.9}))
+
+    assert events[0] == (None, {"text": "cached text"})
+    assert events[-1][0] == 'done'
+    assert events[-1][1]["remaining_credits"] == 10 - INTERPRETATION_COST
+    assert events[-1][1]["cached"] is True
+    assert _state() == (10 - INTERPRETATION_COST, ['cached text'])
+
+
+def test_streamed_answer_is_stored_with_the_users_settings(client, monkeypatch):
+    client, stored = client
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.ai_language, user.ai_prompt_style = 'de', 'Expert'
+        db.session.commit()
+    seen = []
+
+    def stream(lat, lon, asl, req_language=None, req_style=None, req_units=None):
+        seen.append(app_module.resolve_ai_preferences(req_language, req_style, req_units))
+        yield 'part one, '
+        yield 'part two'
+
+    monkeypatch.setattr(app_module, 'get_cached_interpretation', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app_module, 'stream_ai_interpretation', stream)
+
+    events = _events(client.post('/api/interpret-stream', json={"lat": 46.5, "lon": 7.9}))
+
+    assert [payload["text"] for event, payload in events if event is None] == ['part one, ', 'part two']
+    assert events[-1][0] == 'done'
+    assert seen == [('German', 'Expert', 'metric')]
+    assert stored == ['part one, part two']
+    assert _state() == (10 - INTERPRETATION_COST, ['part one, part two'])
+
+
+def test_failed_stream_refunds_the_credit(client, monkeypatch):
+    client, stored = client
+
+    def stream(*args, **kwargs):
+        yield 'partial'
+        raise RuntimeError('model went away')
+
+    monkeypatch.setattr(app_module, 'get_cached_interpretation', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app_module, 'stream_ai_interpretation', stream)
+
+    events = _events(client.post('/api/interpret-stream', json={"lat": 46.5, "lon": 7.9}))
+
+    assert events[-1] == ('error', {"error": "AI failed."})
+    assert stored == []
+    assert _state() == (10, [])
@@ -0,0 +1,87 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from app import app, db, job_queue, User, InterpretationJob, INTERPRETATION_COST
+
+STALE = SimpleNamespace(content='yesterday\'s answer', run_hour=490000)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'test')
+    monkeypatch.setattr(job_queue, '_claim', lambda: None)  # keep the background workers off our jobs
+    monkeypatch.setattr(app_module, 'get_cached_interpretation', lambda *args, **kwargs: None)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, username='pilot1', email='pilot1@example.com', credits=10))
+        db.session.commit()
+
+
+def _job(job_type='interpret', status='queued', created_at=None, cost=INTERPRETATION_COST):
+    job = InterpretationJob(id=uuid.uuid4().hex, job_type=job_type,
+                            user_id=1, status=status, cost=cost, created_at=created_at or datetime.now(timezone.utc),
+                            payload=json.dumps({"lat": 46.5, "lon": 7.9, "language": 'en', "style": 'Basic'}))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_position_counts_queued_jobs_of_the_same_type(env):
+    start = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+    with app.app_context():
+        route = _job('interpret_route', created_at=start)
+        _job(created_at=start + timedelta(seconds=1), status='running')
+        _job(created_at=start + timedelta(seconds=2))
+        mine = _job(created_at=start + timedelta(seconds=3))
+        assert job_queue.position(mine) == 2
+        assert job_queue.position(route) == 1
+
+
+@pytest.mark.parametrize('breaker_open', [True, False])
+def test_job_serves_stale_interpretation_for_free_when_the_model_is_down(env, monkeypatch, breaker_open):
+    def model(*args, **kwargs):
+        if breaker_open:
+            raise AssertionError("the model must not be called while the breaker is open")
+        raise TimeoutError()
+
+    monkeypatch.setattr(app_module.gemini_guard, 'is_open', lambda: breaker_open)
+    monkeypatch.setattr(app_module, 'get_ai_interpretation', model)
+    monkeypatch.setattr(app_module, 'get_stale_interpretation', lambda *args, **kwargs: STALE)
+    with app.app_context():
+        job = _job()
+        job_queue._run(job)
+        assert (job.status, job.result, job.cost) == ('done', STALE.content, 0)
+        assert db.session.get(User, 1).credits == 10 + INTERPRETATION_COST  # the debit is given back
+
+
+def test_job_without_stale_interpretation_fails_and_refunds(env, monkeypatch):
+    monkeypatch.setattr(app_module.gemini_guard, 'is_open', lambda: True)
+    monkeypatch.setattr(app_module, 'get_stale_interpretation', lambda *args, **kwargs: None)
+    with app.app_context():
+        job = _job()
+        job_queue._run(job)
+        assert job.status == 'failed'
+        assert db.session.get(User, 1).credits == 10 + INTERPRETATION_COST
+
+
+def test_submit_answers_from_stale_while_the_breaker_is_open(env, monkeypatch):
+    monkeypatch.setattr(app_module.gemini_guard, 'is_open', lambda: True)
+    monkeypatch.setattr(app_module, 'get_stale_interpretation', lambda *args, **kwargs: STALE)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+
+    response = client.post('/api/jobs/interpret', json={"lat": 46.5, "lon": 7.9})
+
+    assert response.status_code == 200
+    assert response.get_json()["interpretation"] == STALE.content
+    assert response.get_json()["stale"] is True
+    with app.app_context():
+        assert db.session.get(User, 1).credits == 10
+        assert InterpretationJob.query.count() == 0
@@ -0,0 +1,17 @@
+import app as app_module
+from app import app
+
+
+def test_metrics_fail_closed_without_token(monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', None)
+    assert app.test_client().get('/api/metrics').status_code == 404
+
+
+def test_metrics_require_the_token(monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'secret')
+    client = app.test_client()
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics?token=wrong').status_code == 401
+    response = client.get('/api/metrics', headers={'X-Metrics-Token': 'secret'})
+    assert response.status_code == 200
+    assert 'forecast_cache' in response.get_json()
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model_guard import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, ModelGuard
+
+RESET = 0.05
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def _fail():
+    raise ConnectionError('endpoint down')
+
+
+def _open(guard):
+    for _ in range(guard.failure_threshold):
+        with pytest.raises(ConnectionError):
+            guard.call(_fail)
+
+
+def test_breaker_opens_after_consecutive_failures(executor):
+    guard = ModelGuard('test', executor, failure_threshold=3, reset_after=RESET)
+    guard.call(lambda: 'ok')
+    _open(guard)
+    assert guard.state() == OPEN and guard.is_open()
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        guard.call(calls.append, 1)
+    assert calls == []  # rejected without reaching the endpoint
+    assert guard.stats()["rejected"] == 1
+    assert guard.stats()["opened"] == 1
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(executor):
+    guard = ModelGuard('test', executor, failure_threshold=2, reset_after=RESET)
+    _open(guard)
+    time.sleep(RESET)
+    assert guard.state() == HALF_OPEN and not guard.is_open()
+
+    release = threading.Event()
+    probe = executor.submit(guard.call, lambda: release.wait(5) and 'probe')
+    while not guard.is_open():
+        time.sleep(0.005)
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: 'second caller')  # only one probe at a time
+    release.set()
+
+    assert probe.result() == 'probe'
+    assert guard.state() == CLOSED and not guard.is_open()
+    assert guard.call(lambda: 'ok') == 'ok'
+
+
+def test_failed_probe_reopens_the_breaker(executor):
+    guard = ModelGuard('test', executor, failure_threshold=2, reset_after=RESET)
+    _open(guard)
+    time.sleep(RESET)
+    with pytest.raises(ConnectionError):
+        guard.call(_fail)
+    assert guard.state() == OPEN
+    assert guard.stats()["opened"] == 2
+
+
+def test_errors_that_are_not_failures_leave_the_breaker_closed(executor):
+    guard = ModelGuard('test', executor, failure_threshold=1, is_failure=lambda exc: not isinstance(exc, ValueError))
+
+    def rejected_prompt():
+        raise ValueError('bad prompt')
+
+    with pytest.raises(ValueError):
+        guard.call(rejected_prompt)
+    assert guard.state() == CLOSED
+
+
+def test_deadline_raises_timeout_and_counts_as_failure(executor):
+    guard = ModelGuard('test', executor, deadline=0.05, failure_threshold=1, reset_after=60)
+    release = threading.Event()
+    with pytest.raises(TimeoutError):
+        guard.call(release.wait, 5)
+    release.set()
+    assert guard.state() == OPEN
+    assert guard.stats()["timeouts"] == 1
+
+
+def test_slow_call_is_hedged_and_the_hedge_wins(executor):
+    guard = ModelGuard('test', executor, deadline=5, hedge_percentile=0.5, hedge_min_samples=3)
+    for _ in range(3):
+        guard.call(lambda: 'fast')
+    assert guard.hedge_after() is not None and guard.hedge_after() < 0.05
+
+    release = threading.Event()
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            release.wait(5)  # the first request hangs
+            return 'late'
+        return 'hedge'
+
+    try:
+        assert guard.call(fn) == 'hedge'
+    finally:
+        release.set()
+    stats = guard.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_abandoned_stream_probe_frees_the_half_open_slot(executor):
+    guard = ModelGuard('test', executor, failure_threshold=1, reset_after=RESET)
+    _open(guard)
+    time.sleep(RESET)
+
+    stream = guard.stream(lambda: iter(['a', 'b']))
+    assert next(stream) == 'a'
+    assert guard.is_open()  # probe in flight
+    stream.close()  # client disconnected
+    assert not guard.is_open()
+    assert list(guard.stream(lambda: iter(['a', 'b']))) == ['a', 'b']
+    assert guard.state() == CLOSED
@@ -0,0 +1,21 @@
+from prewarmer import _parse_click
+
+
+def test_parse_click_stored_dict_repr():
+    # /api/log-activity stores details=str(details), i.e. a Python dict repr
+    assert _parse_click(str({'lat': 46.5, 'lon': 7.9})) == (46.5, 7.9)
+    assert _parse_click(str({'lat': -33.25, 'lon': 151})) == (-33.25, 151.0)
+    # Cut-off value: falls back to the regex
+    assert _parse_click("{'lat': 46.5, 'lon': 7.9, 'source': 'ma") == (46.5, 7.9)
+
+
+def test_parse_click_json():
+    assert _parse_click('{"lat": 46.5, "lon": 7.9}') == (46.5, 7.9)
+    assert _parse_click('{"lat": 46.5, "lon": 7.9, "zoom": null}') == (46.5, 7.9)
+
+
+def test_parse_click_unparseable():
+    assert _parse_click(None) is None
+    assert _parse_click('') is None
+    assert _parse_click('None') is None
+    assert _parse_click("{'zoom': 9}") is None
@@ -0,0 +1,36 @@
+import warnings
+
+import numpy as np
+
+from route_analysis import densify_route, wind_components
+
+
+def test_repeated_waypoint_is_dropped():
+    points = [(46.68, 7.86), (46.68, 7.86), (46.60, 8.10)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        samples = densify_route(points, spacing_km=5.0)
+    assert list(samples["legs_kept"]) == [1]
+    assert len(samples["leg_km"]) == 1
+    for name in ("lat", "lon", "track"):
+        assert np.isfinite(samples[name]).all()
+    assert abs(samples["lat"][0] - 46.68) < 1e-9
+
+
+def test_leg_length_and_track():
+    # One degree of latitude due north along a meridian
+    samples = densify_route([(46.0, 8.0), (47.0, 8.0)], spacing_km=10.0)
+    assert abs(samples["leg_km"][0] - 111.2) < 0.1
+    assert np.allclose(samples["track"], 0.0)
+    assert abs(samples["lat"][-1] - 47.0) < 1e-9
+
+
+def test_only_repeated_points():
+    samples = densify_route([(46.0, 8.0), (46.0, 8.0)])
+    assert len(samples["leg_km"]) == 0
+    assert len(samples["lat"]) == 0
+
+
+def test_wind_components():
+    head, cross = wind_components(np.array([20.0]), np.array([0.0]), np.array([0.0]))
+    assert abs(head[0] - 20.0) < 1e-9 and abs(cross[0]) < 1e-9
@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+
+from shared_cache import MemoryLRU, MmapFileBackend, NullBackend, SharedCache, create_backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / 'shared')
+
+
+def test_workers_share_entries_through_the_backend(directory):
+    first = SharedCache(MmapFileBackend(directory))
+    second = SharedCache(MmapFileBackend(directory))  # another worker process
+    first.set('meteogram', (46.5, 7.9, 500), {"png": b'\x89PNG'}, ttl=60)
+
+    assert second.get('meteogram', (46.5, 7.9, 500)) == {"png": b'\x89PNG'}
+    assert second.get('meteogram', (46.5, 7.9, 500)) == {"png": b'\x89PNG'}
+    assert second.get('meteogram', (46.5, 7.9, 600)) is None
+    stats = second.stats()
+    assert (stats["shared_hits"], stats["l1_hits"], stats["misses"]) == (1, 1, 1)
+
+    first.delete('meteogram', (46.5, 7.9, 500))
+    assert SharedCache(MmapFileBackend(directory)).get('meteogram', (46.5, 7.9, 500)) is None
+
+
+def test_entries_expire_in_l1_and_backend(directory, clock):
+    cache = SharedCache(MmapFileBackend(directory))
+    cache.set('ns', 'key', 'value', ttl=60)
+    clock[0] += 59
+    assert cache.get('ns', 'key') == 'value'
+    clock[0] += 2
+    assert cache.get('ns', 'key') is None
+    assert MmapFileBackend(directory).get('xct:ns:key') is None
+    assert MmapFileBackend(directory).stats()["entries"] == 0  # expired files are removed on read
+
+
+def test_l1_evicts_least_recently_used_by_bytes():
+    lru = MemoryLRU(max_bytes=300)
+    for key in ('a', 'b', 'c'):
+        lru.set(key, key, 100, expires_at=float('inf'))
+    assert lru.get('a') == 'a'
+    lru.set('d', 'd', 100, expires_at=float('inf'))
+    assert lru.get('b') is None
+    assert lru.stats() == {"entries": 3, "bytes": 300, "max_bytes": 300}
+    lru.set('huge', 'huge', 301, expires_at=float('inf'))
+    assert lru.get('huge') is None
+
+
+def test_unreadable_entries_and_backend_errors_are_misses(directory):
+    backend = MmapFileBackend(directory)
+    backend.set('xct:ns:key', b'not a pickle', ttl=60)
+    cache = SharedCache(backend)
+    assert cache.get('ns', 'key') is None
+
+    class BrokenBackend(NullBackend):
+        def get(self, key):
+            raise ConnectionError('down')
+
+    broken = SharedCache(BrokenBackend())
+    assert broken.get('ns', 'key') is None
+    assert (cache.stats()["errors"], broken.stats()["errors"]) == (1, 1)
+
+
+def test_directory_must_be_private(directory, tmp_path):
+    os.mkdir(directory, 0o755)
+    os.chmod(directory, 0o755)
+    with pytest.raises(RuntimeError, match='0700'):
+        MmapFileBackend(directory)
+
+    link = str(tmp_path / 'link')
+    os.symlink(directory, link)
+    with pytest.raises(RuntimeError, match='not a directory'):
+        MmapFileBackend(link)
+
+    assert isinstance(create_backend('mmap', directory=directory), NullBackend)
+    os.chmod(directory, 0o700)
+    assert isinstance(create_backend('mmap', directory=directory), MmapFileBackend)
+
+
+def test_prune_skips_fresh_temp_files_and_drops_oldest_entries(directory):
+    backend = MmapFileBackend(directory, max_bytes=3000)
+    for i, key in enumerate(('a', 'b', 'c', 'd')):
+        backend.set(key, b'x' * 900, ttl=60)
+        os.utime(backend._path(key), (1000 + i, 1000 + i))
+    fresh_tmp = os.path.join(directory, MmapFileBackend._TMP_PREFIX + 'writing')
+    stale_tmp = os.path.join(directory, MmapFileBackend._TMP_PREFIX + 'crashed')
+    for path in (fresh_tmp, stale_tmp):
+        with open(path, 'wb') as f:
+            f.write(b'x' * 900)
+    old = time.time() - MmapFileBackend._TMP_MAX_AGE - 1
+    os.utime(stale_tmp, (old, old))
+
+    assert backend.stats()["entries"] == 4  # temp files are not entries
+
+    backend.prune()
+
+    assert os.path.exists(fresh_tmp) and not os.path.exists(stale_tmp)
+    assert backend.get('a') is None and backend.get('b') is None
+    assert backend.get('c') == b'x' * 900 and backend.get('d') == b'x' * 900
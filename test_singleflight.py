@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import app as app_module
+from app import app, forecast_cache
+from forecast_cube import ForecastCube
+from shared_cache import NullBackend
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'result'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, 'key', fn) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while flight.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        assert [future.result() for future in futures] == ['result'] * 8
+    assert len(calls) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight('test')
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise RuntimeError('upstream down')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'key', fn) for _ in range(3)]
+        while flight.stats()["coalesced"] < 2:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+    # Nothing is remembered once the flight lands
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_batch_joins_and_leads_flights():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    batches = []
+
+    def single():
+        release.wait(5)
+        return 'from single'
+
+    def batch(keys):
+        batches.append(keys)
+        return {key: f'from batch {key}' for key in keys if key != 'missing'}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'a', single)
+        while flight.stats()["in_flight"] < 1:
+            time.sleep(0.01)
+        joined = pool.submit(flight.do_many, ['a', 'b', 'missing'], batch)
+        while not batches:
+            time.sleep(0.01)
+        release.set()
+        assert leader.result() == 'from single'
+        assert joined.result() == {'a': 'from single', 'b': 'from batch b'}
+    assert batches == [['b', 'missing']]  # 'a' was already in flight
+
+
+def test_single_caller_waiting_on_a_batch_gap_gets_lookup_error():
+    flight = SingleFlight('test')
+    release = threading.Event()
+
+    def batch(keys):
+        release.wait(5)
+        return {}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do_many, ['a'], batch)
+        while flight.stats()["in_flight"] < 1:
+            time.sleep(0.01)
+        follower = pool.submit(flight.do, 'a', lambda: 'never runs')
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.01)
+        release.set()
+        assert leader.result() == {}
+        with pytest.raises(LookupError):
+            follower.result()
+
+
+def test_route_batch_and_point_requests_share_upstream_calls(monkeypatch):
+    release = threading.Event()
+    requested = []
+
+    def fetch(params, url=None, force_refresh=False):
+        cells = list(zip(params["latitude"].split(","), params["longitude"].split(",")))
+        requested.extend(cells)
+        release.wait(5)
+        return [np.zeros(4) for _ in cells], time.time()
+
+    monkeypatch.setattr(app_module.openmeteo_pool, 'fetch', fetch)
+    monkeypatch.setattr(ForecastCube, 'from_response', staticmethod(lambda response, variables: response))
+    monkeypatch.setattr(app_module.shared_cache, 'backend', NullBackend())
+    forecast_cache.clear()
+
+    def point():
+        with app.test_request_context():
+            return app_module.get_openmeteo_data(46.5, 7.9)
+
+    def route():
+        with app.test_request_context():
+            return app_module.get_openmeteo_data_batch([(46.5, 7.9), (46.9, 8.3)], fanout=2, timeout=5)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            points = [pool.submit(point) for _ in range(3)]
+            while not requested:
+                time.sleep(0.01)
+            routed = pool.submit(route)
+            deadline = time.monotonic() + 5
+            while len(requested) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            assert all(future.result() is not None for future in points)
+            assert all(cube is not None for cube in routed.result())
+    finally:
+        forecast_cache.clear()
+    assert sorted(requested) == [('46.5', '7.9'), ('46.9', '8.3')]  # each cell fetched once
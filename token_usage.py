@@ -0,0 +1,70 @@
+import threading
+from collections import defaultdict
+
+
+def usage_counts(usage_metadata):
+    """Flattens Gemini usage metadata into plain token counts (missing fields count as 0)."""
+    if usage_metadata is None:
+        return None
+    counts = {
+        "prompt": usage_metadata.prompt_token_count or 0,
+        "prompt_text": 0,
+        "prompt_image": 0,
+        "output": usage_metadata.candidates_token_count or 0,
+        "thoughts": usage_metadata.thoughts_token_count or 0,
+        "cached": usage_metadata.cached_content_token_count or 0,
+        "total": usage_metadata.total_token_count or 0,
+    }
+    for detail in usage_metadata.prompt_tokens_details or []:
+        modality = str(getattr(detail.modality, 'value', detail.modality) or '').upper()
+        if modality == 'TEXT':
+            counts["prompt_text"] += detail.token_count or 0
+        elif modality == 'IMAGE':
+            counts["prompt_image"] += detail.token_count or 0
+    return counts
+
+
+class TokenUsage:
+    """
+    Running token totals per label (e.g. 'interpret:table'), alongside model latency,
+    so prompt encodings can be compared on cost and speed.
+    """
+
+    FIELDS = ("prompt", "prompt_text", "prompt_image", "output", "thoughts", "cached", "total")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(int)
+        self._unreported = defaultdict(int)
+        self._tokens = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+        self._latency_ms = defaultdict(float)
+
+    def record(self, label, usage_metadata, latency_ms):
+        """Adds one model call; returns its flattened counts (None if the SDK sent no usage data)."""
+        counts = usage_counts(usage_metadata)
+        with self._lock:
+            self._calls[label] += 1
+            self._latency_ms[label] += latency_ms
+            if counts is None:
+                self._unreported[label] += 1
+            else:
+                totals = self._tokens[label]
+                for field in self.FIELDS:
+                    totals[field] += counts[field]
+        return counts
+
+    def stats(self):
+        with self._lock:
+            stats = {}
+            for label, calls in self._calls.items():
+                reported = calls - self._unreported[label]
+                totals = self._tokens[label]
+                stats[label] = {
+                    "calls": calls,
+                    "without_usage": self._unreported[label],
+                    "totals": dict(totals),
+                    "avg_per_call": {field: round(totals[field] / reported, 1) for field in self.FIELDS}
+                    if reported else {},
+                    "avg_latency_ms": round(self._latency_ms[label] / calls, 1),
+                }
+            return stats
@@ -0,0 +1,141 @@
+import numpy as np
+
+from route_analysis import flyable_times
+
+GO = 'GO'
+MARGINAL = 'MARGINAL'
+NO_GO = 'NO-GO'
+
+PRESSURE_LEVELS = (1000, 950, 900, 850, 800)
+
+# Rules of thumb for an XC-worthy day (paragliding); tuned to be conservative about GO
+THRESHOLDS = {
+    "rain_total_mm": 1.0,          # NO-GO: rain over the flyable hours
+    "rain_hour_mm": 0.5,           # NO-GO: any hour wetter than this
+    "wind_850_nogo_kmh": 35.0,     # NO-GO: mean 850 hPa wind over the core hours
+    "wind_850_go_kmh": 20.0,       # GO: at most this at 850 hPa
+    "gust_nogo_kmh": 45.0,         # NO-GO: surface gusts
+    "cape_min": 50.0,              # below this with a stable lapse rate: NO-GO
+    "cape_storm": 1500.0,          # above this: overdevelopment risk, never GO
+    "lapse_stable_c_km": 5.0,      # NO-GO when also below cape_min
+    "lapse_go_c_km": 6.5,          # GO needs at least this
+    "cloudbase_go_m": 2000.0,      # GO: cloudbase (m ASL)
+    "cloudbase_nogo_agl_m": 600.0,  # NO-GO: cloudbase this close to the ground
+    "shear_go_kmh_km": 10.0,       # GO: wind shear across the thermal layer
+    "shear_nogo_kmh_km": 25.0,     # NO-GO
+}
+CORE_HOURS = (11, 16)  # UTC hours that decide the day, inclusive
+
+
+def dewpoint(temperature_c, relative_humidity):
+    """Magnus formula, vectorized."""
+    a, b = 17.625, 243.04
+    gamma = np.log(np.clip(relative_humidity, 1, 100) / 100.0) + a * temperature_c / (b + temperature_c)
+    return b * gamma / (a - gamma)
+
+
+def _wind_vector(speed, direction_from):
+    rad = np.radians(direction_from)
+    return -speed * np.sin(rad), -speed * np.cos(rad)
+
+
+def score_forecast(cube, now, asl=None, flying_hours=(9, 18), thresholds=THRESHOLDS):
+    """
+    Deterministic XC verdict for the next flyable day at one location.
+
+    Works on all flyable hours at once: cloudbase from the surface temperature/dew
+    point spread, lapse rate and wind shear through the pressure levels above the
+    terrain, 850 hPa wind, gusts, CAPE and rain. Returns a dict with 'verdict'
+    (GO / MARGINAL / NO-GO), human-readable 'reasons', the day and the metrics.
+    """
+    idx = np.flatnonzero(np.isin(cube.times, flyable_times(cube, int(now), flying_hours)))
+    if not len(idx):
+        return {"verdict": MARGINAL, "reasons": ["No flyable hours left in the forecast."], "day": None, "metrics": {}}
+    t = thresholds
+    hours = (cube.times[idx] // 3600) % 24
+    core = (hours >= CORE_HOURS[0]) & (hours <= CORE_HOURS[1])
+    if not core.any():
+        core = np.ones_like(hours, dtype=bool)
+
+    def field(name):
+        return np.asarray(cube[name][idx], dtype=np.float64)
+
+    ground = float(asl) if asl else float(cube.elevation or 0.0)
+
+    # Cloudbase (m ASL): ~125 m per degree of temperature/dew point spread
+    spread = field("temperature_2m") - dewpoint(field("temperature_2m"), field("relative_humidity_2m"))
+    cloudbase_agl = np.maximum(spread, 0) * 125.0
+    cloudbase = ground + cloudbase_agl
+
+    # Levels x hours; levels below the terrain are masked out
+    temps = np.stack([field(f"temperature_{p}hPa") for p in PRESSURE_LEVELS])
+    heights = np.stack([field(f"geopotential_height_{p}hPa") for p in PRESSURE_LEVELS])
+    u, v = _wind_vector(np.stack([field(f"wind_speed_{p}hPa") for p in PRESSURE_LEVELS]),
+                        np.stack([field(f"wind_direction_{p}hPa") for p in PRESSURE_LEVELS]))
+    above = heights > ground
+    lowest = np.where(above.any(axis=0), above.argmax(axis=0), len(PRESSURE_LEVELS) - 1)
+    cols = np.arange(len(idx))
+    top = len(PRESSURE_LEVELS) - 1
+    depth_km = np.maximum((heights[top] - heights[lowest, cols]) / 1000.0, 0.1)
+    # Too little depth above the terrain to measure: fall back to the full 1000-800 hPa layer
+    thin = lowest == top
+    depth_km = np.where(thin, np.maximum((heights[top] - heights[0]) / 1000.0, 0.1), depth_km)
+    base_level = np.where(thin, 0, lowest)
+    lapse = (temps[base_level, cols] - temps[top]) / depth_km                  # degC per km
+    shear = np.hypot(u[top] - u[base_level, cols], v[top] - v[base_level, cols]) / depth_km  # km/h per km
+
+    wind_850 = field("wind_speed_850hPa")
+    gusts = field("wind_gusts_10m")
+    cape = field("cape")
+    rain = field("precipitation")
+
+    metrics = {
+        "cloudbase_m": float(np.max(cloudbase[core])),
+        "cloudbase_agl_m": float(np.max(cloudbase_agl[core])),
+        "lapse_rate_c_km": float(np.mean(lapse[core])),
+        "shear_kmh_km": float(np.max(shear[core])),
+        "wind_850_kmh": float(np.mean(wind_850[core])),
+        "gusts_max_kmh": float(np.max(gusts)),
+        "cape_max": float(np.max(cape[core])),
+        "rain_total_mm": float(np.sum(rain)),
+        "rain_max_mm": float(np.max(rain)),
+    }
+    m = metrics
+
+    no_go = []
+    if m["rain_total_mm"] > t["rain_total_mm"] or m["rain_max_mm"] > t["rain_hour_mm"]:
+        no_go.append(f"Rain: {m['rain_total_mm']:.1f} mm over the flyable hours.")
+    if m["wind_850_kmh"] > t["wind_850_nogo_kmh"]:
+        no_go.append(f"Strong wind at 850 hPa: {m['wind_850_kmh']:.0f} km/h.")
+    if m["gusts_max_kmh"] > t["gust_nogo_kmh"]:
+        no_go.append(f"Surface gusts up to {m['gusts_max_kmh']:.0f} km/h.")
+    if m["cape_max"] < t["cape_min"] and m["lapse_rate_c_km"] < t["lapse_stable_c_km"]:
+        no_go.append(f"Stable air: CAPE {m['cape_max']:.0f}, lapse rate {m['lapse_rate_c_km']:.1f} C/km.")
+    if m["cloudbase_agl_m"] < t["cloudbase_nogo_agl_m"]:
+        no_go.append(f"Cloudbase only ~{m['cloudbase_agl_m']:.0f} m above takeoff.")
+    if m["shear_kmh_km"] > t["shear_nogo_kmh_km"]:
+        no_go.append(f"Strong wind shear: {m['shear_kmh_km']:.0f} km/h per km.")
+
+    day = str(np.datetime64(int(cube.times[idx[0]] // 86400), 'D'))
+    if no_go:
+        return {"verdict": NO_GO, "reasons": no_go, "day": day, "metrics": metrics}
+
+    missing = []
+    if m["cloudbase_m"] < t["cloudbase_go_m"]:
+        missing.append(f"Cloudbase ~{m['cloudbase_m']:.0f} m (GO needs {t['cloudbase_go_m']:.0f} m).")
+    if m["lapse_rate_c_km"] < t["lapse_go_c_km"]:
+        missing.append(f"Lapse rate {m['lapse_rate_c_km']:.1f} C/km (GO needs {t['lapse_go_c_km']:.1f}).")
+    if m["wind_850_kmh"] > t["wind_850_go_kmh"]:
+        missing.append(f"850 hPa wind {m['wind_850_kmh']:.0f} km/h (GO needs <= {t['wind_850_go_kmh']:.0f}).")
+    if m["shear_kmh_km"] > t["shear_go_kmh_km"]:
+        missing.append(f"Wind shear {m['shear_kmh_km']:.0f} km/h per km.")
+    if m["cape_max"] > t["cape_storm"]:
+        missing.append(f"CAPE {m['cape_max']:.0f}: overdevelopment / thunderstorm risk.")
+    if m["rain_total_mm"] > 0:
+        missing.append(f"Some rain possible ({m['rain_total_mm']:.1f} mm).")
+
+    if missing:
+        return {"verdict": MARGINAL, "reasons": missing, "day": day, "metrics": metrics}
+    return {"verdict": GO, "reasons": [f"Cloudbase ~{m['cloudbase_m']:.0f} m, lapse rate {m['lapse_rate_c_km']:.1f} C/km, "
+                                       f"850 hPa wind {m['wind_850_kmh']:.0f} km/h, CAPE {m['cape_max']:.0f}, dry."],
+            "day": day, "metrics": metrics}